@@ -0,0 +1,161 @@
+from constants import ANALYTICS_HOT_VELOCITY, ANALYTICS_VIRAL_VELOCITY, OUTLIER_MIN_CHANNEL_VIDEOS
+
+WEEK_EXPRESSION = "date(retrieved_at, 'weekday 0', '-6 days')"
+
+
+class KeywordAnalytics:
+
+    def __init__(self, db_manager):
+        self.conn = db_manager.conn
+
+    def refresh(self):
+        cursor = self.conn.cursor()
+        dirty_count = cursor.execute("SELECT COUNT(*) FROM keyword_stats_dirty").fetchone()[0]
+        if not dirty_count:
+            return 0
+
+        # Cleared first so buckets whose videos were all deleted or moved disappear
+        cursor.execute('''DELETE FROM keyword_weekly_stats
+                          WHERE EXISTS (SELECT 1 FROM keyword_stats_dirty AS dirty
+                                        WHERE dirty.search_keyword = keyword_weekly_stats.search_keyword
+                                        AND dirty.week = keyword_weekly_stats.week)''')
+        # Median and nearest-rank p90 come from a window ranking per (keyword, week) bucket;
+        # only buckets touched since the last refresh are recomputed.
+        cursor.execute(f'''
+            INSERT INTO keyword_weekly_stats
+                (search_keyword, week, video_count, total_views, avg_velocity,
+                 median_velocity, p90_velocity, hot_count, viral_count)
+            SELECT search_keyword, week, bucket_size, SUM(views), AVG(view_velocity),
+                   AVG(CASE WHEN velocity_rank IN ((bucket_size + 1) / 2, (bucket_size + 2) / 2)
+                            THEN view_velocity END),
+                   MIN(CASE WHEN velocity_rank >= (bucket_size * 9 + 9) / 10
+                            THEN view_velocity END),
+                   SUM(view_velocity >= ?), SUM(view_velocity >= ?)
+            FROM (
+                SELECT videos.search_keyword, videos.week, videos.views, videos.view_velocity,
+                       ROW_NUMBER() OVER bucket AS velocity_rank,
+                       COUNT(*) OVER (PARTITION BY videos.search_keyword, videos.week) AS bucket_size
+                FROM (
+                    SELECT COALESCE(search_keyword, '') AS search_keyword,
+                           {WEEK_EXPRESSION} AS week, views, view_velocity
+                    FROM analyzed_videos
+                    WHERE retrieved_at IS NOT NULL
+                ) AS videos
+                JOIN keyword_stats_dirty AS dirty
+                    ON dirty.search_keyword = videos.search_keyword AND dirty.week = videos.week
+                WINDOW bucket AS (PARTITION BY videos.search_keyword, videos.week
+                                  ORDER BY videos.view_velocity)
+            )
+            GROUP BY search_keyword, week
+        ''', (ANALYTICS_HOT_VELOCITY, ANALYTICS_VIRAL_VELOCITY))
+        cursor.execute("DELETE FROM keyword_stats_dirty")
+        self.conn.commit()
+        return dirty_count
+
+    def rebuild(self):
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM keyword_weekly_stats")
+        cursor.execute(f'''INSERT OR IGNORE INTO keyword_stats_dirty (search_keyword, week)
+                          SELECT DISTINCT COALESCE(search_keyword, ''), {WEEK_EXPRESSION}
+                          FROM analyzed_videos WHERE retrieved_at IS NOT NULL''')
+        return self.refresh()
+
+    def get_weekly_trends(self, keyword_filter=None, latest_only=False):
+        where_clause = ""
+        params = []
+        if keyword_filter:
+            where_clause = "WHERE search_keyword LIKE ?"
+            params.append(f"%{keyword_filter}%")
+
+        # Growth is only reported when the previous bucket is exactly the preceding week
+        cursor = self.conn.execute(f'''
+            SELECT search_keyword, week, video_count, median_velocity, p90_velocity,
+                   hot_count, viral_count,
+                   CASE WHEN previous_week = date(week, '-7 days')
+                        THEN (median_velocity - previous_median) * 100.0 / NULLIF(previous_median, 0)
+                   END
+            FROM (
+                SELECT *,
+                       LAG(week) OVER keyword_weeks AS previous_week,
+                       LAG(median_velocity) OVER keyword_weeks AS previous_median,
+                       ROW_NUMBER() OVER (PARTITION BY search_keyword ORDER BY week DESC) AS recency
+                FROM keyword_weekly_stats {where_clause}
+                WINDOW keyword_weeks AS (PARTITION BY search_keyword ORDER BY week)
+            )
+            WHERE recency = 1 OR NOT ?
+            ORDER BY week DESC, median_velocity DESC
+        ''', params + [latest_only])
+        return cursor.fetchall()
+
+
+class OutlierScores:
+
+    def __init__(self, db_manager):
+        self.conn = db_manager.conn
+
+    def refresh(self):
+        cursor = self.conn.cursor()
+        dirty_count = cursor.execute("SELECT COUNT(*) FROM outlier_dirty_channels").fetchone()[0]
+        if not dirty_count:
+            return 0
+
+        cursor.execute('''DELETE FROM channel_baselines
+                          WHERE channel_key IN (SELECT channel_key FROM outlier_dirty_channels)''')
+        cursor.execute('''DELETE FROM video_outlier_scores
+                          WHERE channel_key IN (SELECT channel_key FROM outlier_dirty_channels)''')
+
+        # Same median-by-rank approach as the weekly keyword stats, one bucket per channel
+        cursor.execute('''
+            INSERT INTO channel_baselines (channel_key, video_count, median_velocity)
+            SELECT channel_key, channel_size,
+                   AVG(CASE WHEN velocity_rank IN ((channel_size + 1) / 2, (channel_size + 2) / 2)
+                            THEN view_velocity END)
+            FROM (
+                SELECT COALESCE(channel_id, channel) AS channel_key, view_velocity,
+                       ROW_NUMBER() OVER channel_videos AS velocity_rank,
+                       COUNT(*) OVER (PARTITION BY COALESCE(channel_id, channel)) AS channel_size
+                FROM analyzed_videos
+                WHERE COALESCE(channel_id, channel) IN (SELECT channel_key FROM outlier_dirty_channels)
+                WINDOW channel_videos AS (PARTITION BY COALESCE(channel_id, channel)
+                                          ORDER BY view_velocity)
+            )
+            GROUP BY channel_key
+        ''')
+        cursor.execute('''
+            INSERT OR REPLACE INTO video_outlier_scores
+                (video_id, channel_key, views_per_subscriber, channel_velocity_ratio)
+            SELECT videos.id, COALESCE(videos.channel_id, videos.channel),
+                   videos.views * 1.0 / NULLIF(COALESCE(channels.subscribers, videos.subscribers), 0),
+                   CASE WHEN baselines.video_count >= ?
+                        THEN videos.view_velocity / NULLIF(baselines.median_velocity, 0) END
+            FROM analyzed_videos AS videos
+            JOIN channel_baselines AS baselines
+                ON baselines.channel_key = COALESCE(videos.channel_id, videos.channel)
+            LEFT JOIN channels ON channels.id = videos.channel_id
+            WHERE COALESCE(videos.channel_id, videos.channel) IN
+                (SELECT channel_key FROM outlier_dirty_channels)
+        ''', (OUTLIER_MIN_CHANNEL_VIDEOS,))
+        cursor.execute("DELETE FROM outlier_dirty_channels")
+        self.conn.commit()
+        return dirty_count
+
+    def rebuild(self):
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM channel_baselines")
+        cursor.execute("DELETE FROM video_outlier_scores")
+        cursor.execute('''INSERT OR IGNORE INTO outlier_dirty_channels
+                          SELECT DISTINCT COALESCE(channel_id, channel) FROM analyzed_videos''')
+        return self.refresh()
+
+    def get_channel_baselines(self, channel_ids):
+        channel_ids = list(channel_ids)
+        if not channel_ids:
+            return {}
+
+        placeholders = ','.join('?' for _ in channel_ids)
+        cursor = self.conn.execute(
+            f'''SELECT channel_key, median_velocity FROM channel_baselines
+                WHERE channel_key IN ({placeholders}) AND video_count >= ?''',
+            channel_ids + [OUTLIER_MIN_CHANNEL_VIDEOS]
+        )
+        return dict(cursor.fetchall())
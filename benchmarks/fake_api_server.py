@@ -0,0 +1,175 @@
+import sys
+import json
+import time
+import signal
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+from constants import DB_FILE, API_UNIT_COSTS, API_DAILY_QUOTA_UNITS
+from benchmarks.fake_youtube import SyntheticData
+
+RESOURCES = ('search', 'videos', 'channels', 'playlistItems')
+
+
+def error_body(code, reason, message, domain='global'):
+    # Same shape as Google API errors, so HttpError and the quota checks see what they expect
+    return {'error': {'code': code, 'message': message,
+                      'errors': [{'message': message, 'domain': domain, 'reason': reason}]}}
+
+
+class FakeYouTubeServer(ThreadingHTTPServer):
+    # Serves youtube/v3 list calls from SyntheticData, charging quota per API key
+
+    daemon_threads = True
+
+    def __init__(self, address, data, latency_ms=0, jitter_ms=0, error_rate=0.0,
+                 quota_units=API_DAILY_QUOTA_UNITS, seed=0, quiet=False):
+        super().__init__(address, FakeYouTubeHandler)
+        self.data = data
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.quota_units = quota_units
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.quiet = quiet
+        self.usage = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def charge(self, api_key, resource):
+        # Returns the error to send, if any. Like the real API, failed calls still cost units.
+        cost = API_UNIT_COSTS[f"{resource}.list"]
+        with self.lock:
+            usage = self.usage.setdefault(api_key, {'units': 0, 'requests': 0, 'errors': 0, 'quota_exceeded': 0})
+            usage['requests'] += 1
+            if usage['units'] + cost > self.quota_units:
+                usage['quota_exceeded'] += 1
+                return 403, error_body(
+                    403, 'quotaExceeded',
+                    "The request cannot be completed because you have exceeded your quota.", 'youtube.quota'
+                )
+            usage['units'] += cost
+            if self.random.random() < self.error_rate:
+                usage['errors'] += 1
+                return 503, error_body(503, 'backendError', "Backend Error")
+            return None
+
+    def delay(self):
+        with self.lock:
+            latency_ms = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000)
+
+    def get_stats(self):
+        with self.lock:
+            return {'quota_units': self.quota_units, 'keys': {key: dict(usage) for key, usage in self.usage.items()}}
+
+    def reset(self):
+        with self.lock:
+            self.usage = {}
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, keep-alive requests stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        # Matches both /youtube/v3/search and /search, whichever the client library builds
+        resource = url.path.rstrip('/').rsplit('/', 1)[-1]
+
+        if resource == '_stats':
+            self._send(200, self.server.get_stats())
+            return
+        if resource not in RESOURCES:
+            self._send(404, error_body(404, 'notFound', f"Unknown resource: {url.path}"))
+            return
+        if not params.get('key'):
+            self._send(403, error_body(403, 'forbidden', "The request is missing a valid API key."))
+            return
+        if 'id' in params and 'maxResults' in params:
+            # The real API does not support maxResults together with id
+            self._send(400, error_body(400, 'badRequest', "maxResults is not supported with the id parameter."))
+            return
+
+        self.server.delay()
+        error = self.server.charge(params['key'], resource)
+        if error:
+            self._send(*error)
+            return
+        self._send(200, self.server.data.respond(resource, params))
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip('/').endswith('_reset'):
+            self.server.reset()
+            self._send(200, self.server.get_stats())
+        else:
+            self._send(404, error_body(404, 'notFound', f"Unknown resource: {self.path}"))
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake YouTube Data API v3 with synthetic data.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--channels', type=int, default=500, help="number of synthetic channels")
+    parser.add_argument('--pages', type=int, default=10, help="search result pages per query")
+    parser.add_argument('--latency-ms', type=float, default=0, help="added delay per request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="random +/- variation of the delay")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests failing with 503")
+    parser.add_argument('--quota', type=int, default=API_DAILY_QUOTA_UNITS, help="units per API key")
+    parser.add_argument('--attach', action='store_true',
+                        help="point the app's database at this server until it stops")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    args = parser.parse_args()
+
+    data = SyntheticData(seed=args.seed, channel_count=args.channels, pages_per_query=args.pages)
+    server = FakeYouTubeServer((args.host, args.port), data, args.latency_ms, args.jitter_ms,
+                               args.error_rate, args.quota, args.seed, args.quiet)
+
+    db_manager = None
+    if args.attach:
+        from database import DatabaseManager
+        db_manager = DatabaseManager(DB_FILE)
+        db_manager.set_setting('api_base_url', server.base_url)
+
+    print(f"Fake YouTube API listening on {server.base_url} "
+          f"(stats: GET {server.base_url}/_stats, reset: POST {server.base_url}/_reset)")
+    # Stopping with a plain kill must detach too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if db_manager:
+            db_manager.set_setting('api_base_url', '')
+            db_manager.conn.close()
+        print(json.dumps(server.get_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import json
+import math
+import random
+import hashlib
+from datetime import datetime, timezone, timedelta
+
+ID_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+COMMON_WORDS = [
+    'funny', 'cat', 'dog', 'best', 'moments', 'top', '10', 'live', 'music', 'review', 'game',
+    'highlights', 'tutorial', 'how', 'to', 'cook', 'travel', 'vlog', 'news', 'reaction',
+    'challenge', 'shorts', 'official', 'video', 'compilation', 'epic', 'fails', 'asmr'
+]
+SYLLABLES = ['ka', 'lo', 'mi', 'ren', 'to', 'sa', 'vi', 'del', 'po', 'nu', 'zar', 'ek', 'ti', 'bo', 'ma', 'qui']
+# A few thousand words so unrelated titles share about as few shingles as real ones do
+_word_random = random.Random(0)
+TITLE_WORDS = COMMON_WORDS + [
+    ''.join(_word_random.choice(SYLLABLES) for _ in range(_word_random.randrange(2, 4))) for _ in range(3000)
+]
+# Fixed reference time so generated upload dates and velocities do not drift between runs
+REFERENCE_TIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_id(seed, *parts, length=11):
+    digest = hashlib.blake2b(':'.join(str(part) for part in (seed,) + parts).encode(), digest_size=16).digest()
+    return ''.join(ID_ALPHABET[byte % 64] for byte in digest[:length])
+
+
+class SyntheticData:
+    # Every field is derived from (seed, id) alone, so responses are identical in any call order
+
+    def __init__(self, seed=0, channel_count=500, pages_per_query=10, page_size=50, duplicate_rate=0.15):
+        self.seed = seed
+        self.channel_ids = ['UC' + make_id(seed, 'channel', i, length=22) for i in range(channel_count)]
+        self.channel_indexes = {channel_id: i for i, channel_id in enumerate(self.channel_ids)}
+        self.pages_per_query = pages_per_query
+        self.page_size = page_size
+        self.duplicate_rate = duplicate_rate
+
+    def search_page(self, q, page_token=None, order='relevance', max_results=50):
+        page = int(page_token or 0)
+        items = [
+            {'kind': 'youtube#searchResult',
+             'id': {'kind': 'youtube#video', 'videoId': make_id(self.seed, 'video', q, order, page, i)}}
+            for i in range(min(max_results, self.page_size))
+        ]
+        response = {'kind': 'youtube#searchListResponse', 'items': items,
+                    'pageInfo': {'totalResults': self.pages_per_query * self.page_size,
+                                 'resultsPerPage': len(items)}}
+        if page + 1 < self.pages_per_query:
+            response['nextPageToken'] = str(page + 1)
+        return response
+
+    def video(self, video_id):
+        rng = random.Random(f"{self.seed}:video:{video_id}")
+        channel_index = min(int(rng.paretovariate(1.2)) - 1, len(self.channel_ids) - 1)
+        if rng.random() < self.duplicate_rate:
+            # Re-upload of a small pool of popular titles
+            title_rng = random.Random(f"{self.seed}:title:{rng.randrange(50)}")
+            title = ' '.join(title_rng.choice(TITLE_WORDS) for _ in range(8)) + rng.choice(['', ' (reupload)', ' [HD]'])
+        else:
+            title = ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randrange(5, 12)))
+        published_at = REFERENCE_TIME - timedelta(days=rng.randrange(1, 730), seconds=rng.randrange(86400))
+        return {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'publishedAt': published_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'channelId': self.channel_ids[channel_index],
+                'title': title,
+                'channelTitle': f"Channel {channel_index}",
+                'thumbnails': {
+                    size: {'url': f"https://i.ytimg.com/vi/{video_id}/{name}.jpg", 'width': width, 'height': height}
+                    for size, name, width, height in (('default', 'default', 120, 90),
+                                                      ('medium', 'mqdefault', 320, 180),
+                                                      ('high', 'hqdefault', 480, 360))
+                }
+            },
+            'statistics': {
+                'viewCount': str(int(math.exp(rng.gauss(9, 2.5)))),
+                'likeCount': str(int(math.exp(rng.gauss(5, 2)))),
+                'commentCount': str(int(math.exp(rng.gauss(3, 1.5))))
+            },
+            'contentDetails': {
+                'duration': f"PT{rng.randrange(0, 60)}M{rng.randrange(1, 60)}S"
+            }
+        }
+
+    def channel(self, channel_id):
+        rng = random.Random(f"{self.seed}:channel:{channel_id}")
+        hidden = rng.random() < 0.05
+        statistics = {
+            'viewCount': str(int(math.exp(rng.gauss(14, 2.5)))),
+            'videoCount': str(self.upload_count(channel_id)),
+            'hiddenSubscriberCount': hidden
+        }
+        if not hidden:
+            statistics['subscriberCount'] = str(int(math.exp(rng.gauss(10, 2.5))))
+        return {
+            'kind': 'youtube#channel',
+            'id': channel_id,
+            'snippet': {'title': f"Channel {self.channel_indexes.get(channel_id, channel_id)}"},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}},
+            'statistics': statistics
+        }
+
+    def upload_count(self, channel_id):
+        return random.Random(f"{self.seed}:uploads:{channel_id}").randrange(1, 3000)
+
+    def playlist_page(self, playlist_id, page_token=None, max_results=5):
+        # Only uploads playlists ('UU' + channel id suffix) exist; others are empty
+        channel_id = 'UC' + playlist_id[2:]
+        total = self.upload_count(channel_id) if playlist_id.startswith('UU') else 0
+        start = int(page_token or 0)
+        end = min(start + max_results, total)
+        items = []
+        for position in range(start, end):
+            video_id = make_id(self.seed, 'upload', channel_id, position)
+            published_at = (REFERENCE_TIME - timedelta(hours=position * 37)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            items.append({
+                'kind': 'youtube#playlistItem',
+                'id': make_id(self.seed, 'playlist_item', playlist_id, position, length=22),
+                'snippet': {
+                    'publishedAt': published_at, 'channelId': channel_id, 'playlistId': playlist_id,
+                    'position': position, 'title': self.video(video_id)['snippet']['title'],
+                    'resourceId': {'kind': 'youtube#video', 'videoId': video_id}
+                },
+                'contentDetails': {'videoId': video_id, 'videoPublishedAt': published_at}
+            })
+        response = {'kind': 'youtube#playlistItemListResponse', 'items': items,
+                    'pageInfo': {'totalResults': total, 'resultsPerPage': max_results}}
+        if end < total:
+            response['nextPageToken'] = str(end)
+        return response
+
+    def videos_list(self, ids):
+        return {'kind': 'youtube#videoListResponse', 'items': [self.video(video_id) for video_id in ids]}
+
+    def channels_list(self, ids):
+        return {'kind': 'youtube#channelListResponse', 'items': [self.channel(channel_id) for channel_id in ids]}
+
+    def respond(self, resource, params):
+        # params are API query parameters, as keyword arguments or as strings from a URL
+        max_results = int(params.get('maxResults', 50 if resource == 'search' else 5))
+        if resource == 'search':
+            return self.search_page(params.get('q'), params.get('pageToken'),
+                                    params.get('order', 'relevance'), max_results)
+        if resource == 'playlistItems':
+            return self.playlist_page(params.get('playlistId', ''), params.get('pageToken'), max_results)
+        ids = [value for value in params.get('id', '').split(',') if value]
+        if resource == 'videos':
+            return self.videos_list(ids)
+        if resource == 'channels':
+            return self.channels_list(ids)
+        raise KeyError(resource)
+
+
+class _Request:
+
+    def __init__(self, execute):
+        self._execute = execute
+
+    def execute(self):
+        return self._execute()
+
+
+class _Resource:
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def list(self, **kwargs):
+        return _Request(lambda: self.client.respond(self.name, kwargs))
+
+
+class FakeYouTube:
+    # Minimal stand-in for the googleapiclient service used by VideoSearch
+
+    def __init__(self, data):
+        self.data = data
+
+    def search(self):
+        return _Resource(self, 'search')
+
+    def videos(self):
+        return _Resource(self, 'videos')
+
+    def channels(self):
+        return _Resource(self, 'channels')
+
+    def playlistItems(self):
+        return _Resource(self, 'playlistItems')
+
+    def respond(self, resource, kwargs):
+        return self.data.respond(resource, kwargs)
+
+
+def request_key(resource, kwargs):
+    return json.dumps([resource, {key: value for key, value in sorted(kwargs.items()) if key != 'key'}])
+
+
+class RecordingYouTube(FakeYouTube):
+    # Wraps a real service and keeps every response so a live search can be replayed offline
+
+    def __init__(self, service):
+        self.service = service
+        self.responses = {}
+
+    def respond(self, resource, kwargs):
+        response = getattr(self.service, resource)().list(**kwargs).execute()
+        self.responses[request_key(resource, kwargs)] = response
+        return response
+
+    def save(self, path, params):
+        # The search params are stored too: replaying with other params issues other requests
+        params = {key: value for key, value in params.items() if key != 'api_key'}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'params': params, 'responses': self.responses}, f, ensure_ascii=False)
+
+
+class ReplayYouTube(FakeYouTube):
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as f:
+            fixture = json.load(f)
+        self.params = fixture['params']
+        self.responses = fixture['responses']
+
+    def respond(self, resource, kwargs):
+        key = request_key(resource, kwargs)
+        if key not in self.responses:
+            raise KeyError(f"No recorded response for {key}")
+        return self.responses[key]
@@ -0,0 +1,376 @@
+import os
+import sys
+import json
+import gzip
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+
+from constants import SNAPSHOT_COPY_BUFFER, EXPORT_CHUNK_SIZE
+from database import DatabaseManager, analyzed_videos_filter, chunked
+from exporters import export_chunks, is_parquet_available
+from analytics import OutlierScores
+from dedup import TitleIndex
+from exclusions import ExclusionFilter
+from benchmarks.fake_youtube import SyntheticData, FakeYouTube, RecordingYouTube, ReplayYouTube, make_id
+
+SEARCH_PARAMS = {
+    'keyword': 'funny cat', 'order': 'viewCount', 'target_count': 400, 'min_views': 0,
+    'min_duration': 0, 'max_duration': 0, 'max_subs': -1, 'api_key': 'benchmark'
+}
+VIEWER_COLUMNS = ['id', 'search_keyword', 'title', 'channel', 'views', 'upload_date', 'retrieved_at',
+                  'views_per_subscriber', 'channel_velocity_ratio']
+VIEWER_PAGE_SIZE = 50
+KEYWORDS = ['funny cat', 'cooking', 'travel vlog', 'game highlights', 'music live', 'asmr', 'news', 'tutorial']
+GROUPS = ('search', 'generate', 'viewer', 'export', 'snapshot')
+
+
+def percentile(sorted_samples, fraction):
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    position = (len(sorted_samples) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(durations_ms, items):
+    samples = sorted(durations_ms)
+    mean_ms = sum(samples) / len(samples)
+    return {
+        'runs': len(samples), 'items': items,
+        'mean_ms': mean_ms, 'min_ms': samples[0], 'max_ms': samples[-1],
+        'p50_ms': percentile(samples, 0.5), 'p90_ms': percentile(samples, 0.9),
+        'p99_ms': percentile(samples, 0.99),
+        'throughput_per_s': items / (mean_ms / 1000) if items and mean_ms else None
+    }
+
+
+def measure(name, run, repeat, setup=None, trace_memory=True):
+    # run(state) returns the number of items it processed; setup() is excluded from the timing.
+    # tracemalloc slows allocation-heavy code, so peak memory comes from one extra traced run.
+    durations_ms, items = [], 0
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        items = run(state)
+        durations_ms.append((time.perf_counter() - started) * 1000)
+
+    result = summarize(durations_ms, items)
+    result['peak_memory_mb'] = None
+    if trace_memory:
+        state = setup() if setup else None
+        tracemalloc.start()
+        try:
+            run(state)
+            result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+
+    print_result(name, result)
+    return name, result
+
+
+def print_result(name, result):
+    throughput = f"{result['throughput_per_s']:>12,.0f}/s" if result['throughput_per_s'] else f"{'-':>14}"
+    memory = f"{result['peak_memory_mb']:>8.1f} MB" if result['peak_memory_mb'] is not None else f"{'-':>11}"
+    print(f"{name:<34} p50 {result['p50_ms']:>9.2f} ms  p90 {result['p90_ms']:>9.2f} ms  "
+          f"p99 {result['p99_ms']:>9.2f} ms  {throughput}  {memory}")
+
+
+def synthetic_videos(data, count, seed):
+    # Same shape as VideoSearch results; channel stats come from the synthetic channels
+    rng = random.Random(seed)
+    subscribers = {}
+    videos = []
+    for i in range(count):
+        item = data.video(make_id(seed, 'history', i))
+        snippet, statistics = item['snippet'], item['statistics']
+        channel_id = snippet['channelId']
+        if channel_id not in subscribers:
+            channel_statistics = data.channel(channel_id)['statistics']
+            subscribers[channel_id] = int(channel_statistics.get('subscriberCount', 0))
+        views = int(statistics['viewCount'])
+        videos.append({
+            'id': item['id'], 'title': snippet['title'], 'channel': snippet['channelTitle'],
+            'channel_id': channel_id, 'upload_date': snippet['publishedAt'][:10], 'views': views,
+            'subscribers': subscribers[channel_id], 'duration': rng.randrange(1, 3600),
+            'view_velocity': views / rng.randrange(1, 730), 'keyword': KEYWORDS[i % len(KEYWORDS)]
+        })
+    return videos
+
+
+def insert_videos(db_manager, videos, chunk_size=5000):
+    for chunk in chunked(videos, chunk_size):
+        by_keyword = {}
+        for video in chunk:
+            by_keyword.setdefault(video['keyword'], []).append(video)
+        for keyword, keyword_videos in by_keyword.items():
+            db_manager.add_analyzed_videos(keyword_videos, keyword)
+    return len(videos)
+
+
+def create_compressed_snapshot(db_manager, work_dir):
+    # Mirrors SyncWorker._create_compressed_snapshot
+    snapshot_path = os.path.join(work_dir, 'bench.snapshot')
+    compressed_path = snapshot_path + '.gz'
+    try:
+        db_manager.create_snapshot(snapshot_path)
+        with open(snapshot_path, 'rb') as src, open(compressed_path, 'wb') as dst:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=dst, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, SNAPSHOT_COPY_BUFFER)
+        return os.path.getsize(snapshot_path)
+    finally:
+        for path in (snapshot_path, compressed_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def run_search_pipeline(db_manager, db_path, params, youtube):
+    # Opened per run like Worker.run does, so filter and score setup cost counts
+    from search import VideoSearch
+
+    excluded_filter = ExclusionFilter(db_manager, db_path + '.exclusions')
+    try:
+        outlier_scores = OutlierScores(db_manager)
+        outlier_scores.refresh()
+        search = VideoSearch(dict(params), excluded_filter, title_index=TitleIndex(db_manager),
+                             outlier_scores=outlier_scores, youtube=youtube)
+        videos = search.run()
+        with search.metrics.span('db_write', len(videos)):
+            db_manager.add_analyzed_videos(videos, params['keyword'])
+            db_manager.save_channel_stats(search.channels, datetime.now(timezone.utc).isoformat())
+        return search, videos
+    finally:
+        excluded_filter.close()
+
+
+def bench_search(args, work_dir):
+    excluded_ids = [make_id(args.seed, 'excluded', i) for i in range(args.excluded)]
+    if args.replay:
+        youtube = ReplayYouTube(args.replay)
+        params = dict(youtube.params, api_key='benchmark')
+    elif args.api_base_url:
+        # Each run builds its own client over HTTP, as the app does
+        youtube = None
+        params = dict(SEARCH_PARAMS, api_base_url=args.api_base_url)
+    else:
+        youtube = FakeYouTube(SyntheticData(seed=args.seed))
+        params = dict(SEARCH_PARAMS)
+    if not args.replay:
+        # Exclude some first-page hits so the filter's positive path is measured too; a replay
+        # cannot, since fewer ids per videos.list call would miss the recorded requests
+        excluded_ids += [make_id(args.seed, 'video', params['keyword'], params['order'], 0, i)
+                         for i in range(0, 50, 5)]
+    stage_totals = {}
+    run_count = [0]
+
+    def setup():
+        run_count[0] += 1
+        db_path = os.path.join(work_dir, f"search_{run_count[0]}.db")
+        db_manager = DatabaseManager(db_path)
+        db_manager.add_excluded_videos(excluded_ids)
+        return db_manager, db_path
+
+    def run(state):
+        db_manager, db_path = state
+        try:
+            search, videos = run_search_pipeline(db_manager, db_path, params, youtube)
+        finally:
+            db_manager.conn.close()
+        if not tracemalloc.is_tracing():
+            for stage, total in search.metrics.totals().items():
+                stage_totals.setdefault(stage, []).append(total['duration_ms'])
+        return len(videos)
+
+    results = [measure('search.pipeline', run, args.search_runs, setup)]
+    for stage, durations_ms in stage_totals.items():
+        stage_result = summarize(durations_ms, 0)
+        stage_result['peak_memory_mb'] = None
+        print_result(f"search.stage.{stage}", stage_result)
+        results.append((f"search.stage.{stage}", stage_result))
+    return results
+
+
+def bench_generate(args, db_manager):
+    data = SyntheticData(seed=args.seed, channel_count=max(args.rows // 50, 100))
+    started = time.perf_counter()
+    videos = synthetic_videos(data, args.rows, args.seed)
+    print(f"Generated {len(videos):,} synthetic videos in {time.perf_counter() - started:.1f}s")
+
+    results = [measure('generate.insert', lambda state: insert_videos(db_manager, videos),
+                       1, trace_memory=False)]
+
+    def refresh_scores(state):
+        OutlierScores(db_manager).refresh()
+        return args.rows
+
+    results.append(measure('generate.outlier_refresh', refresh_scores, 1, trace_memory=False))
+    if args.with_dedup:
+        results.append(measure('generate.title_index', lambda state: TitleIndex(db_manager).refresh(),
+                               1, trace_memory=False))
+    return results
+
+
+def viewer_page(db_manager, search_term, collapse, order_column, descending, page):
+    # Same call DBViewerDialog._update_analyzed_table makes per refresh
+    where_clause, params = analyzed_videos_filter(search_term, collapse)
+    total_rows, rows = db_manager.get_analyzed_videos_page(
+        VIEWER_COLUMNS, where_clause, params, order_column, descending,
+        VIEWER_PAGE_SIZE, (page - 1) * VIEWER_PAGE_SIZE
+    )
+    return len(rows) if total_rows else 0
+
+
+def bench_viewer(args, db_manager):
+    deep_page = max(args.rows // VIEWER_PAGE_SIZE // 2, 1)
+    cases = [
+        ('viewer.recent', '', False, 'retrieved_at', True, 1),
+        ('viewer.views', '', False, 'views', True, 1),
+        ('viewer.views_deep_page', '', False, 'views', True, deep_page),
+        ('viewer.channel_outlier', '', False, 'channel_velocity_ratio', True, 1),
+        ('viewer.keyword_filter', 'cat', False, 'retrieved_at', True, 1),
+        ('viewer.collapse_duplicates', '', True, 'views', True, 1),
+    ]
+    results = []
+    for name, *case in cases:
+        results.append(measure(name, lambda state, case=case: viewer_page(db_manager, *case),
+                               args.repeat, trace_memory=False))
+    return results
+
+
+def bench_export(args, db_manager, work_dir):
+    # Same query HistoryExportWorker streams for an unfiltered export
+    columns = db_manager.get_column_types('analyzed_videos') + [
+        ('views_per_subscriber', 'REAL'), ('channel_velocity_ratio', 'REAL')
+    ]
+    query = (f"SELECT {', '.join(name for name, _ in columns)} FROM analyzed_videos "
+             f"LEFT JOIN video_outlier_scores AS scores ON scores.video_id = analyzed_videos.id "
+             f"ORDER BY retrieved_at DESC")
+
+    export_formats = ['csv', 'jsonl'] + (['parquet'] if is_parquet_available() else [])
+    results = []
+    for export_format in export_formats:
+        file_path = os.path.join(work_dir, f"history.{export_format}")
+
+        def run(state, export_format=export_format, file_path=file_path):
+            row_chunks = db_manager.iter_query_chunks(query, (), EXPORT_CHUNK_SIZE)
+            return export_chunks(row_chunks, columns, file_path, export_format)
+
+        results.append(measure(f"export.{export_format}", run, args.export_runs))
+        os.remove(file_path)
+    return results
+
+
+def bench_snapshot(args, db_manager, work_dir):
+    name, result = measure('snapshot.gzip', lambda state: create_compressed_snapshot(db_manager, work_dir),
+                           args.export_runs)
+    # items is the snapshot size in bytes; report it as MB/s as well
+    result['throughput_mb_per_s'] = result['items'] / (1024 * 1024) / (result['mean_ms'] / 1000)
+    print(f"{'':<34} {result['items'] / (1024 * 1024):.1f} MB at {result['throughput_mb_per_s']:.1f} MB/s")
+    return [(name, result)]
+
+
+def record_fixture(args, work_dir):
+    from googleapiclient.discovery import build
+
+    youtube = RecordingYouTube(build("youtube", "v3", developerKey=args.api_key))
+    params = dict(SEARCH_PARAMS, keyword=args.keyword, api_key=args.api_key)
+    db_path = os.path.join(work_dir, 'record.db')
+    db_manager = DatabaseManager(db_path)
+    try:
+        _, videos = run_search_pipeline(db_manager, db_path, params, youtube)
+    finally:
+        db_manager.conn.close()
+    youtube.save(args.record, params)
+    print(f"Recorded {len(youtube.responses)} responses ({len(videos)} videos) to {args.record}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    print(f"\nCompared with {baseline_path} (negative latency / positive throughput is better)")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        parts = []
+        for key, label in (('p50_ms', 'p50'), ('p90_ms', 'p90'), ('throughput_per_s', 'throughput'),
+                           ('peak_memory_mb', 'memory')):
+            if result.get(key) and before.get(key):
+                parts.append(f"{label} {(result[key] - before[key]) / before[key] * 100:+.1f}%")
+        print(f"{name:<34} {'  '.join(parts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for search, viewer queries, exports and sync.")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument('--rows', type=int, default=100000, help="synthetic analyzed_videos rows")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20, help="runs per viewer query")
+    parser.add_argument('--search-runs', type=int, default=10)
+    parser.add_argument('--export-runs', type=int, default=3, help="runs per export and snapshot")
+    parser.add_argument('--excluded', type=int, default=10000, help="excluded videos seeded for search runs")
+    parser.add_argument('--with-dedup', action='store_true', help="index titles before the viewer benchmarks")
+    parser.add_argument('--replay', help="replay recorded API responses instead of synthetic ones")
+    parser.add_argument('--api-base-url', help="search against this API host, e.g. benchmarks.fake_api_server")
+    parser.add_argument('--record', help="record a live search to this fixture file and exit")
+    parser.add_argument('--api-key', help="API key used with --record")
+    parser.add_argument('--keyword', default=SEARCH_PARAMS['keyword'], help="keyword used with --record")
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.record and not args.api_key:
+        parser.error("--record requires --api-key")
+
+    work_dir = tempfile.mkdtemp(prefix='yta_bench_')
+    results = []
+    try:
+        if args.record:
+            record_fixture(args, work_dir)
+            return
+        if 'search' in args.only:
+            results += bench_search(args, work_dir)
+
+        table_groups = [group for group in ('generate', 'viewer', 'export', 'snapshot') if group in args.only]
+        if table_groups:
+            db_manager = DatabaseManager(os.path.join(work_dir, 'history.db'))
+            try:
+                results += bench_generate(args, db_manager)
+                if 'viewer' in args.only:
+                    results += bench_viewer(args, db_manager)
+                if 'export' in args.only:
+                    results += bench_export(args, db_manager, work_dir)
+                if 'snapshot' in args.only:
+                    results += bench_snapshot(args, db_manager, work_dir)
+            finally:
+                db_manager.conn.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = dict(results)
+    if args.compare:
+        compare(results, args.compare)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'environment': {
+                    'python': sys.version.split()[0], 'sqlite': sqlite3.sqlite_version,
+                    'platform': platform.platform()
+                },
+                'args': vars(args), 'results': results
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
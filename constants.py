@@ -8,9 +8,85 @@ def get_db_path():
     else:
         return 'youtube_analysis.db'
 
+def get_archive_dir():
+    if getattr(sys, 'frozen', False):
+        documents_dir = os.path.expanduser('~/Documents')
+        return os.path.join(documents_dir, '.youtube_analysis_archive')
+    else:
+        return 'youtube_analysis_archive'
+
+def get_thumbnail_cache_dir():
+    if getattr(sys, 'frozen', False):
+        documents_dir = os.path.expanduser('~/Documents')
+        return os.path.join(documents_dir, '.youtube_analysis_thumbnails')
+    else:
+        return 'youtube_analysis_thumbnails'
+
+def get_metrics_log_path():
+    if getattr(sys, 'frozen', False):
+        documents_dir = os.path.expanduser('~/Documents')
+        return os.path.join(documents_dir, '.youtube_analysis_metrics.jsonl')
+    else:
+        return 'youtube_analysis_metrics.jsonl'
+
 DB_FILE = get_db_path()
+EXCLUSION_FILTER_FILE = DB_FILE + '.exclusions'
+ARCHIVE_DIR = get_archive_dir()
+THUMBNAIL_CACHE_DIR = get_thumbnail_cache_dir()
+METRICS_LOG_FILE = get_metrics_log_path()
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 
+DEFAULT_RETENTION_RULES = {
+    '*': {'days': 0, 'top_k': 0}
+}
+SYNC_COMPACT_THRESHOLD = 20
+SNAPSHOT_COPY_BUFFER = 1024 * 1024
+SYNC_CHUNK_SIZE_MB = 8
+SYNC_MAX_RETRIES = 5
+AUTOSYNC_QUIET_PERIOD_MS = 30 * 1000
+CLOSE_POLL_INTERVAL_MS = 200
+
+THUMBNAIL_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+THUMBNAIL_DISK_CACHE_BYTES = 256 * 1024 * 1024
+THUMBNAIL_REVALIDATE_AFTER_DAYS = 7
+THUMBNAIL_REQUEST_TIMEOUT = 10
+THUMBNAIL_WORKER_COUNT = 6
+THUMBNAIL_DISPLAY_SIZE = (160, 90)
+THUMBNAIL_DISPLAY_VARIANT = 'display'
+THUMBNAIL_FULL_VARIANT = 'full'
+THUMBNAIL_EXPORT_WORKER_COUNT = 8
+EXPORT_CHUNK_SIZE = 5000
+ANALYTICS_HOT_VELOCITY = 1000
+ANALYTICS_VIRAL_VELOCITY = 10000
+STATS_REFRESH_BATCH_SIZE = 50
+STATS_REFRESH_WORKER_COUNT = 4
+STATS_REFRESH_QUOTA_UNITS = 200
+STATS_REFRESH_STALE_HOURS = 24
+STATS_REFRESH_WRITE_BATCHES = 20
+CHANNEL_REFRESH_QUOTA_UNITS = 20
+CHANNEL_REFRESH_STALE_HOURS = 72
+BREAKOUT_MAX_SUBSCRIBERS = 100000
+BREAKOUT_MIN_VELOCITY_RATIO = 0.5
+SEARCH_MAX_PAGES = 20
+API_UNIT_COSTS = {'search.list': 100, 'videos.list': 1, 'channels.list': 1, 'playlistItems.list': 1}
+API_DAILY_QUOTA_UNITS = 10000
+WATCHLIST_WINDOW_START_HOUR = 6
+WATCHLIST_WINDOW_END_HOUR = 22
+WATCHLIST_FRESH_HOURS = 20
+WATCHLIST_DEFAULT_UNIT_ESTIMATE = 510
+WATCHLIST_POLL_SECONDS = 60
+TITLE_SHINGLE_SIZE = 4
+TITLE_LSH_BANDS = 16
+TITLE_LSH_ROWS = 4
+TITLE_DUPLICATE_SIMILARITY = 0.6
+EXCLUSION_FILTER_MIN_CAPACITY = 100000
+EXCLUSION_FILTER_FALSE_POSITIVE_RATE = 0.01
+OUTLIER_MIN_CHANNEL_VIDEOS = 3
+METRICS_RETENTION_DAYS = 90
+
+MAINTENANCE_INTERVAL_MS = 30 * 60 * 1000
+VACUUM_PAGES_PER_RUN = 2000
+
 DEFAULT_SETTINGS = {
     'min_views': '100000',
     'min_duration': '60',
@@ -18,6 +94,9 @@ DEFAULT_SETTINGS = {
     'target_count': '10',
     'order': 'viewCount'
 }
+# Search inputs restored at startup and saved on exit
+UI_SETTING_KEYS = ('last_api_alias', 'last_order', 'last_max_subs', 'last_min_views', 'last_min_duration',
+                   'last_target_count', 'last_ranking')
 
 ORDER_OPTIONS = {
     'Most Views': 'viewCount',
@@ -25,6 +104,12 @@ ORDER_OPTIONS = {
     'Latest Upload': 'date'
 }
 
+RANKING_OPTIONS = {
+    'View Velocity': 'view_velocity',
+    'Channel Outlier (x median)': 'channel_velocity_ratio',
+    'Views per Subscriber': 'views_per_subscriber'
+}
+
 COLORS = {
     'background': '#2c313c',
     'widget_bg': '#353b48',
@@ -186,6 +271,10 @@ def get_platform_stylesheet():
         border: none; 
         background-color: {COLORS['background']}; 
     }}
+    QListView {{ 
+        border: none; 
+        background-color: {COLORS['background']}; 
+    }}
     QScrollBar:vertical {{ 
         border: none; 
         background: {COLORS['widget_bg']}; 
@@ -1,44 +1,451 @@
+import os
+import gzip
+import json
 import sqlite3
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+from constants import DEFAULT_RETENTION_RULES, METRICS_RETENTION_DAYS
+
+SQL_CHUNK_SIZE = 500
+
+SYNC_TABLE_KEYS = {
+    'settings': 'key',
+    'api_keys': 'alias',
+    'analyzed_videos': 'id',
+    'excluded_videos': 'id',
+    'watchlists': 'keyword',
+    'channels': 'id'
+}
+SYNC_TIMESTAMP_COLUMNS = {
+    'settings': 'updated_at',
+    'analyzed_videos': 'retrieved_at',
+    'excluded_videos': 'excluded_at',
+    'watchlists': 'updated_at',
+    'channels': 'refreshed_at'
+}
+# Row ids that only mean something on this device; watchlist runs refer to them
+SYNC_LOCAL_COLUMNS = {
+    'watchlists': ('id',)
+}
+# Channels seen in videos but never fetched, then tracked channels older than the cutoff
+STALE_CHANNELS_QUERY = '''
+    SELECT DISTINCT channel_id, NULL AS refreshed_at FROM analyzed_videos 
+    WHERE channel_id IS NOT NULL 
+      AND channel_id NOT IN (SELECT id FROM channels)
+    UNION ALL
+    SELECT id, refreshed_at FROM channels 
+    WHERE refreshed_at IS NULL OR refreshed_at < ?'''
+OUTLIER_SCORE_COLUMNS = ('views_per_subscriber', 'channel_velocity_ratio')
+LOCAL_ONLY_SETTINGS = ('google_auth_token', 'credentials_path', 'sync_enabled', 'metrics_log_enabled', 
+                       'api_base_url')
+
+
+def chunked(items, size=SQL_CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def is_synced_setting(key):
+    return key not in LOCAL_ONLY_SETTINGS and not key.startswith('sync_')
+
+
+def analyzed_videos_filter(search_term='', collapse_duplicates=False):
+    where_clause = ""
+    params = []
+    
+    if search_term:
+        where_clause = "WHERE search_keyword LIKE ?"
+        params.append(f"%{search_term}%")
+    
+    if collapse_duplicates:
+        # Keep the most viewed video per title cluster within the current filter
+        cluster_filter = f'''id IN (
+            SELECT id FROM (
+                SELECT videos.id, ROW_NUMBER() OVER (
+                    PARTITION BY COALESCE(clusters.cluster_id, videos.id) ORDER BY videos.views DESC
+                ) AS cluster_rank
+                FROM analyzed_videos AS videos
+                LEFT JOIN video_clusters AS clusters ON clusters.video_id = videos.id
+                {where_clause.replace('search_keyword', 'videos.search_keyword')}
+            ) WHERE cluster_rank = 1)'''
+        where_clause = f"{where_clause} AND {cluster_filter}" if where_clause else f"WHERE {cluster_filter}"
+        params = params * 2
+    return where_clause, params
+
+
+def add_condition(where_clause, condition):
+    return f"{where_clause} AND {condition}" if where_clause else f"WHERE {condition}"
+
+
+def analyzed_videos_order(column, descending):
+    order_clause = f"{column} {'DESC' if descending else 'ASC'}"
+    if column in OUTLIER_SCORE_COLUMNS:
+        # Videos without a score sort last in both directions
+        order_clause = f"{column} IS NULL, {order_clause}"
+    return order_clause
+
+
+def new_merge_summary():
+    return {
+        'analyzed_videos': 0,
+        'excluded_added': [],
+        'excluded_removed': [],
+        'settings': {},
+        'api_keys_changed': False
+    }
+
+
+def migrate_initial_schema(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS settings 
+                     (key TEXT PRIMARY KEY, value TEXT)''')
+    
+    cursor.execute('''CREATE TABLE IF NOT EXISTS api_keys 
+                     (alias TEXT PRIMARY KEY, key TEXT UNIQUE)''')
+    
+    cursor.execute('''CREATE TABLE IF NOT EXISTS analyzed_videos 
+                     (id TEXT PRIMARY KEY, title TEXT, channel TEXT, 
+                      upload_date TEXT, views INTEGER, subscribers INTEGER, 
+                      duration INTEGER, view_velocity REAL, retrieved_at TEXT)''')
+    
+    cursor.execute('''CREATE TABLE IF NOT EXISTS excluded_videos 
+                     (id TEXT PRIMARY KEY)''')
+
+
+def migrate_add_search_keyword(cursor):
+    cursor.execute("PRAGMA table_info(analyzed_videos)")
+    columns = [info[1] for info in cursor.fetchall()]
+    
+    if 'search_keyword' not in columns:
+        cursor.execute("ALTER TABLE analyzed_videos ADD COLUMN search_keyword TEXT")
+
+
+def migrate_add_history_indexes(cursor):
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_keyword_retrieved 
+                     ON analyzed_videos (search_keyword, retrieved_at)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_keyword_velocity 
+                     ON analyzed_videos (search_keyword, view_velocity)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_retrieved 
+                     ON analyzed_videos (retrieved_at)''')
+
+
+def migrate_add_sync_changelog(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS sync_changelog 
+                     (seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT, 
+                      row_key TEXT, operation TEXT, changed_at TEXT)''')
+
+
+def migrate_add_sync_timestamps(cursor):
+    cursor.execute("ALTER TABLE settings ADD COLUMN updated_at TEXT")
+    cursor.execute("ALTER TABLE excluded_videos ADD COLUMN excluded_at TEXT")
+
+
+def migrate_add_keyword_stats(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS keyword_weekly_stats 
+                     (search_keyword TEXT, week TEXT, video_count INTEGER, total_views INTEGER, 
+                      avg_velocity REAL, median_velocity REAL, p90_velocity REAL, 
+                      hot_count INTEGER, viral_count INTEGER, 
+                      PRIMARY KEY (search_keyword, week)) WITHOUT ROWID''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS keyword_stats_dirty 
+                     (search_keyword TEXT, week TEXT, 
+                      PRIMARY KEY (search_keyword, week)) WITHOUT ROWID''')
+    
+    # New and updated rows dirty their week buckets; deletes do too since
+    # migrate_add_keyword_stats_delete_trigger.
+    # Queue inserts use NOT EXISTS: an outer UPSERT's conflict handling overrides OR IGNORE
+    # inside the triggers it fires, so an already-queued week would abort the statement.
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_keyword_stats_insert 
+                      AFTER INSERT ON analyzed_videos WHEN NEW.retrieved_at IS NOT NULL 
+                      BEGIN 
+                          INSERT INTO keyword_stats_dirty (search_keyword, week) 
+                          SELECT COALESCE(NEW.search_keyword, ''), 
+                                 date(NEW.retrieved_at, 'weekday 0', '-6 days') 
+                          WHERE NOT EXISTS (SELECT 1 FROM keyword_stats_dirty 
+                                            WHERE search_keyword = COALESCE(NEW.search_keyword, '') 
+                                            AND week = date(NEW.retrieved_at, 'weekday 0', '-6 days')); 
+                      END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_keyword_stats_update 
+                      AFTER UPDATE ON analyzed_videos 
+                      BEGIN 
+                          INSERT INTO keyword_stats_dirty (search_keyword, week) 
+                          SELECT COALESCE(OLD.search_keyword, ''), 
+                                 date(OLD.retrieved_at, 'weekday 0', '-6 days') 
+                          WHERE OLD.retrieved_at IS NOT NULL 
+                          AND NOT EXISTS (SELECT 1 FROM keyword_stats_dirty 
+                                          WHERE search_keyword = COALESCE(OLD.search_keyword, '') 
+                                          AND week = date(OLD.retrieved_at, 'weekday 0', '-6 days')); 
+                          INSERT INTO keyword_stats_dirty (search_keyword, week) 
+                          SELECT COALESCE(NEW.search_keyword, ''), 
+                                 date(NEW.retrieved_at, 'weekday 0', '-6 days') 
+                          WHERE NEW.retrieved_at IS NOT NULL 
+                          AND NOT EXISTS (SELECT 1 FROM keyword_stats_dirty 
+                                          WHERE search_keyword = COALESCE(NEW.search_keyword, '') 
+                                          AND week = date(NEW.retrieved_at, 'weekday 0', '-6 days')); 
+                      END''')
+    
+    cursor.execute('''INSERT OR IGNORE INTO keyword_stats_dirty (search_keyword, week) 
+                      SELECT DISTINCT COALESCE(search_keyword, ''), 
+                             date(retrieved_at, 'weekday 0', '-6 days') 
+                      FROM analyzed_videos WHERE retrieved_at IS NOT NULL''')
+
+
+def migrate_add_stats_snapshots(cursor):
+    cursor.execute("ALTER TABLE analyzed_videos ADD COLUMN stats_refreshed_at TEXT")
+    cursor.execute("UPDATE analyzed_videos SET stats_refreshed_at = retrieved_at")
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_stats_refreshed 
+                     ON analyzed_videos (stats_refreshed_at)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS video_stats_snapshots 
+                     (video_id TEXT, captured_at TEXT, views INTEGER, likes INTEGER, 
+                      comments INTEGER, PRIMARY KEY (video_id, captured_at)) WITHOUT ROWID''')
+
+
+def migrate_add_channels(cursor):
+    cursor.execute("ALTER TABLE analyzed_videos ADD COLUMN channel_id TEXT")
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_channel_velocity 
+                     ON analyzed_videos (channel_id, view_velocity)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS channels 
+                     (id TEXT PRIMARY KEY, title TEXT, subscribers INTEGER, video_count INTEGER, 
+                      view_count INTEGER, refreshed_at TEXT)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_channels_subscribers 
+                     ON channels (subscribers)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_channels_refreshed 
+                     ON channels (refreshed_at)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS channel_stats_history 
+                     (channel_id TEXT, captured_at TEXT, subscribers INTEGER, video_count INTEGER, 
+                      view_count INTEGER, PRIMARY KEY (channel_id, captured_at)) WITHOUT ROWID''')
+
+
+def migrate_add_watchlists(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS watchlists 
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT UNIQUE, params TEXT, 
+                      enabled INTEGER DEFAULT 1, created_at TEXT)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS watchlist_runs 
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT, watchlist_id INTEGER, api_key_alias TEXT, 
+                      started_at TEXT, finished_at TEXT, duration_seconds REAL, units_used INTEGER, 
+                      video_count INTEGER, status TEXT, message TEXT)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_watchlist_runs_watchlist 
+                     ON watchlist_runs (watchlist_id, started_at)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_watchlist_runs_key_started 
+                     ON watchlist_runs (api_key_alias, started_at)''')
+
+
+def migrate_add_title_clusters(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS video_clusters 
+                     (video_id TEXT PRIMARY KEY, cluster_id TEXT, signature BLOB)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_video_clusters_cluster 
+                     ON video_clusters (cluster_id)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS title_lsh_buckets 
+                     (bucket INTEGER, video_id TEXT, PRIMARY KEY (bucket, video_id)) WITHOUT ROWID''')
+
+
+def migrate_add_exclusion_state(cursor):
+    # Kept by triggers so the exclusion count and change token are O(1) to read;
+    # every insert gets a fresh token so a replaced DB file never matches an old filter
+    cursor.execute('''CREATE TABLE IF NOT EXISTS exclusion_state 
+                     (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER, 
+                      row_count INTEGER, token TEXT)''')
+    cursor.execute('''INSERT OR IGNORE INTO exclusion_state (id, version, row_count, token) 
+                     SELECT 1, 0, COUNT(*), hex(randomblob(8)) FROM excluded_videos''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS excluded_videos_state_insert 
+                     AFTER INSERT ON excluded_videos BEGIN 
+                         UPDATE exclusion_state SET version = version + 1, 
+                             row_count = row_count + 1, token = hex(randomblob(8)); 
+                     END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS excluded_videos_state_delete 
+                     AFTER DELETE ON excluded_videos BEGIN 
+                         UPDATE exclusion_state SET row_count = row_count - 1; 
+                     END''')
+
+
+def migrate_add_outlier_scores(cursor):
+    # Videos without a channel_id yet (older rows) are grouped by channel title
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_analyzed_channel_key 
+                     ON analyzed_videos (COALESCE(channel_id, channel), view_velocity)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS channel_baselines 
+                     (channel_key TEXT PRIMARY KEY, video_count INTEGER, median_velocity REAL)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS video_outlier_scores 
+                     (video_id TEXT PRIMARY KEY, channel_key TEXT, views_per_subscriber REAL, 
+                      channel_velocity_ratio REAL)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_outlier_channel 
+                     ON video_outlier_scores (channel_key)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_outlier_views_per_subscriber 
+                     ON video_outlier_scores (views_per_subscriber)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_outlier_velocity_ratio 
+                     ON video_outlier_scores (channel_velocity_ratio)''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS outlier_dirty_channels 
+                     (channel_key TEXT PRIMARY KEY) WITHOUT ROWID''')
+    
+    # NOT EXISTS rather than OR IGNORE: the conflict handling of an outer UPSERT (channel stats,
+    # sync merges) overrides OR IGNORE inside the triggers it fires
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_outlier_insert 
+                      AFTER INSERT ON analyzed_videos 
+                      BEGIN 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT COALESCE(NEW.channel_id, NEW.channel) WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = COALESCE(NEW.channel_id, NEW.channel)); 
+                      END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_outlier_update 
+                      AFTER UPDATE ON analyzed_videos 
+                      BEGIN 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT COALESCE(OLD.channel_id, OLD.channel) WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = COALESCE(OLD.channel_id, OLD.channel)); 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT COALESCE(NEW.channel_id, NEW.channel) WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = COALESCE(NEW.channel_id, NEW.channel)); 
+                      END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_outlier_delete 
+                      AFTER DELETE ON analyzed_videos 
+                      BEGIN 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT COALESCE(OLD.channel_id, OLD.channel) WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = COALESCE(OLD.channel_id, OLD.channel)); 
+                      END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_outlier_channel_insert 
+                      AFTER INSERT ON channels 
+                      BEGIN 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT NEW.id WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = NEW.id); 
+                      END''')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_outlier_channel_update 
+                      AFTER UPDATE OF subscribers ON channels 
+                      BEGIN 
+                          INSERT INTO outlier_dirty_channels (channel_key) 
+                          SELECT NEW.id WHERE NOT EXISTS 
+                              (SELECT 1 FROM outlier_dirty_channels 
+                               WHERE channel_key = NEW.id); 
+                      END''')
+    
+    cursor.execute('''INSERT OR IGNORE INTO outlier_dirty_channels 
+                      SELECT DISTINCT COALESCE(channel_id, channel) FROM analyzed_videos''')
+
+
+def migrate_add_search_metrics(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS search_metrics 
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, keyword TEXT, stage TEXT, 
+                      started_at TEXT, duration_ms REAL, item_count INTEGER, units_used INTEGER)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_search_metrics_run 
+                     ON search_metrics (run_id)''')
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_search_metrics_started 
+                     ON search_metrics (started_at)''')
+
+
+def migrate_add_search_metrics_key_alias(cursor):
+    # Lets daily quota use per key be summed over GUI and scheduler searches alike
+    cursor.execute("ALTER TABLE search_metrics ADD COLUMN api_key_alias TEXT")
+    cursor.execute('''CREATE INDEX IF NOT EXISTS idx_search_metrics_alias_started 
+                     ON search_metrics (api_key_alias, started_at)''')
+
+
+def migrate_add_archived_videos(cursor):
+    # Tombstones for archived rows, so a merge or delta from another device cannot bring them back
+    cursor.execute('''CREATE TABLE IF NOT EXISTS archived_videos 
+                     (id TEXT PRIMARY KEY, archived_at TEXT)''')
+
+
+def migrate_reset_title_index(cursor):
+    # Title signatures changed to one-permutation MinHash; old ones are not comparable, so the
+    # index is rebuilt by TitleIndex.refresh during maintenance
+    cursor.execute("DELETE FROM title_lsh_buckets")
+    cursor.execute("DELETE FROM video_clusters")
+
+
+def migrate_add_keyword_stats_delete_trigger(cursor):
+    # Deleted and archived videos must leave their week buckets as well, and buckets that were
+    # left stale before this trigger existed are recomputed on the next refresh
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS trg_keyword_stats_delete 
+                      AFTER DELETE ON analyzed_videos WHEN OLD.retrieved_at IS NOT NULL 
+                      BEGIN 
+                          INSERT INTO keyword_stats_dirty (search_keyword, week) 
+                          SELECT COALESCE(OLD.search_keyword, ''), 
+                                 date(OLD.retrieved_at, 'weekday 0', '-6 days') 
+                          WHERE NOT EXISTS (SELECT 1 FROM keyword_stats_dirty 
+                                            WHERE search_keyword = COALESCE(OLD.search_keyword, '') 
+                                            AND week = date(OLD.retrieved_at, 'weekday 0', '-6 days')); 
+                      END''')
+    cursor.execute('''INSERT OR IGNORE INTO keyword_stats_dirty (search_keyword, week) 
+                      SELECT search_keyword, week FROM keyword_weekly_stats''')
+    cursor.execute('''INSERT OR IGNORE INTO keyword_stats_dirty (search_keyword, week) 
+                      SELECT DISTINCT COALESCE(search_keyword, ''), 
+                             date(retrieved_at, 'weekday 0', '-6 days') 
+                      FROM analyzed_videos WHERE retrieved_at IS NOT NULL''')
+
+
+def migrate_add_watchlist_sync(cursor):
+    cursor.execute("ALTER TABLE watchlists ADD COLUMN updated_at TEXT")
+    cursor.execute("UPDATE watchlists SET updated_at = created_at")
+    # Watchlists saved before they were synced reach other devices with the next delta
+    cursor.execute('''INSERT INTO sync_changelog (table_name, row_key, operation, changed_at) 
+                      SELECT 'watchlists', keyword, 'upsert', updated_at FROM watchlists''')
+
+
+# Applied in order; the list index + 1 is the schema version stored in PRAGMA user_version.
+# Never reorder or edit released entries, only append new ones.
+MIGRATIONS = [
+    migrate_initial_schema,
+    migrate_add_search_keyword,
+    migrate_add_history_indexes,
+    migrate_add_sync_changelog,
+    migrate_add_sync_timestamps,
+    migrate_add_keyword_stats,
+    migrate_add_stats_snapshots,
+    migrate_add_channels,
+    migrate_add_watchlists,
+    migrate_add_title_clusters,
+    migrate_add_exclusion_state,
+    migrate_add_outlier_scores,
+    migrate_add_search_metrics,
+    migrate_add_archived_videos,
+    migrate_add_search_metrics_key_alias,
+    migrate_reset_title_index,
+    migrate_add_keyword_stats_delete_trigger,
+    migrate_add_watchlist_sync,
+]
 
 
 class DatabaseManager:
     
     def __init__(self, db_file):
         self.conn = sqlite3.connect(db_file)
-        self.create_tables()
-        self.update_schema()
+        self.migrate()
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS settings 
-                         (key TEXT PRIMARY KEY, value TEXT)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS api_keys 
-                         (alias TEXT PRIMARY KEY, key TEXT UNIQUE)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS analyzed_videos 
-                         (id TEXT PRIMARY KEY, title TEXT, channel TEXT, 
-                          upload_date TEXT, views INTEGER, subscribers INTEGER, 
-                          duration INTEGER, view_velocity REAL, retrieved_at TEXT)''')
+    def migrate(self):
+        schema_version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version >= len(MIGRATIONS):
+            return
         
-        cursor.execute('''CREATE TABLE IF NOT EXISTS excluded_videos 
-                         (id TEXT PRIMARY KEY)''')
+        if schema_version == 0:
+            self.enable_incremental_vacuum()
         
-        self.conn.commit()
-
-    def update_schema(self):
+        cursor = self.conn.cursor()
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("PRAGMA table_info(analyzed_videos)")
-            columns = [info[1] for info in cursor.fetchall()]
+            cursor.execute("BEGIN IMMEDIATE")
+            schema_version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            
+            for version in range(schema_version + 1, len(MIGRATIONS) + 1):
+                MIGRATIONS[version - 1](cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
             
-            if 'search_keyword' not in columns:
-                cursor.execute("ALTER TABLE analyzed_videos ADD COLUMN search_keyword TEXT")
-                self.conn.commit()
+            self.conn.commit()
+        except sqlite3.Error:
+            # Running on a half-migrated schema would fail later in harder to trace ways
+            self.conn.rollback()
+            raise
+
+    def enable_incremental_vacuum(self):
+        try:
+            auto_vacuum_mode = self.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if auto_vacuum_mode != 2:
+                self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self.conn.execute("VACUUM")
         except sqlite3.Error as e:
-            print(f"Schema update error: {e}")
+            print(f"Auto vacuum setup error: {e}")
 
     def get_setting(self, key, default=None):
         cursor = self.conn.cursor()
@@ -48,8 +455,13 @@ class DatabaseManager:
 
     def set_setting(self, key, value):
         cursor = self.conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
-                      (key, str(value)))
+        value = str(value)
+        if self.get_setting(key) == value:
+            return
+        if is_synced_setting(key):
+            self.record_changes(cursor, 'settings', [key], 'upsert')
+        cursor.execute("INSERT OR REPLACE INTO settings (key, value, updated_at) VALUES (?, ?, ?)", 
+                      (key, value, datetime.now(timezone.utc).isoformat()))
         self.conn.commit()
 
     def get_api_keys(self):
@@ -61,17 +473,22 @@ class DatabaseManager:
         try:
             cursor = self.conn.cursor()
             cursor.execute('INSERT INTO api_keys (alias, key) VALUES (?, ?)', (alias, key))
+            self.record_changes(cursor, 'api_keys', [alias], 'upsert')
             self.conn.commit()
             return True
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             return False
     
     def delete_api_key(self, alias):
         try:
             cursor = self.conn.cursor()
             cursor.execute('DELETE FROM api_keys WHERE alias = ?', (alias,))
+            deleted = cursor.rowcount > 0
+            if deleted:
+                self.record_changes(cursor, 'api_keys', [alias], 'delete')
             self.conn.commit()
-            return cursor.rowcount > 0
+            return deleted
         except sqlite3.Error:
             return False
     
@@ -81,25 +498,50 @@ class DatabaseManager:
         
         video_data = [
             (v['id'], v['title'], v['channel'], v['upload_date'], v['views'], 
-             v['subscribers'], v['duration'], v['view_velocity'], current_time, keyword)
+             v['subscribers'], v['duration'], v['view_velocity'], current_time, keyword, 
+             current_time, v.get('channel_id'))
             for v in videos
         ]
         
         cursor.executemany(
-            '''INSERT OR REPLACE INTO analyzed_videos VALUES (?,?,?,?,?,?,?,?,?,?)''',
+            # An upsert rather than OR REPLACE, so the update triggers see the old keyword and week
+            '''INSERT INTO analyzed_videos 
+               (id, title, channel, upload_date, views, subscribers, duration, 
+                view_velocity, retrieved_at, search_keyword, stats_refreshed_at, channel_id) 
+               VALUES (?,?,?,?,?,?,?,?,?,?,?,?) 
+               ON CONFLICT(id) DO UPDATE SET 
+                   title = excluded.title, channel = excluded.channel, upload_date = excluded.upload_date, 
+                   views = excluded.views, subscribers = excluded.subscribers, duration = excluded.duration, 
+                   view_velocity = excluded.view_velocity, retrieved_at = excluded.retrieved_at, 
+                   search_keyword = excluded.search_keyword, stats_refreshed_at = excluded.stats_refreshed_at, 
+                   channel_id = excluded.channel_id''',
             video_data
         )
+        self.record_changes(cursor, 'analyzed_videos', [v['id'] for v in videos], 'upsert')
         self.conn.commit()
     
     def add_excluded_video(self, video_id):
-        cursor = self.conn.cursor()
-        cursor.execute('INSERT OR IGNORE INTO excluded_videos (id) VALUES (?)', (video_id,))
-        self.conn.commit()
+        return bool(self.add_excluded_videos([video_id]))
 
-    def get_all_excluded_ids(self):
+    def add_excluded_videos(self, video_ids):
+        video_ids = list(dict.fromkeys(video_ids))
+        if not video_ids:
+            return []
+        
         cursor = self.conn.cursor()
-        cursor.execute('SELECT id FROM excluded_videos')
-        return {row[0] for row in cursor.fetchall()}
+        existing_ids = set()
+        for chunk in chunked(video_ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"SELECT id FROM excluded_videos WHERE id IN ({placeholders})", chunk)
+            existing_ids.update(row[0] for row in cursor.fetchall())
+        
+        new_ids = [video_id for video_id in video_ids if video_id not in existing_ids]
+        excluded_at = datetime.now(timezone.utc).isoformat()
+        cursor.executemany('INSERT OR IGNORE INTO excluded_videos (id, excluded_at) VALUES (?, ?)', 
+                           [(video_id, excluded_at) for video_id in new_ids])
+        self.record_changes(cursor, 'excluded_videos', new_ids, 'upsert')
+        self.conn.commit()
+        return new_ids
 
     def delete_excluded_videos(self, video_ids):
         if not video_ids:
@@ -108,6 +550,7 @@ class DatabaseManager:
         cursor = self.conn.cursor()
         placeholders = ','.join('?' for _ in video_ids)
         cursor.execute(f"DELETE FROM excluded_videos WHERE id IN ({placeholders})", video_ids)
+        self.record_changes(cursor, 'excluded_videos', video_ids, 'delete')
         self.conn.commit()
 
     def delete_analyzed_videos(self, video_ids):
@@ -117,4 +560,625 @@ class DatabaseManager:
         cursor = self.conn.cursor()
         placeholders = ','.join('?' for _ in video_ids)
         cursor.execute(f"DELETE FROM analyzed_videos WHERE id IN ({placeholders})", video_ids)
-        self.conn.commit() 
\ No newline at end of file
+        self.record_changes(cursor, 'analyzed_videos', video_ids, 'delete')
+        self.conn.commit()
+
+    def record_changes(self, cursor, table_name, row_keys, operation):
+        changed_at = datetime.now(timezone.utc).isoformat()
+        cursor.executemany(
+            '''INSERT INTO sync_changelog (table_name, row_key, operation, changed_at) 
+               VALUES (?, ?, ?, ?)''',
+            [(table_name, row_key, operation, changed_at) for row_key in row_keys]
+        )
+
+    def has_pending_changes(self):
+        return self.conn.execute("SELECT 1 FROM sync_changelog LIMIT 1").fetchone() is not None
+
+    def get_pending_changes(self):
+        cursor = self.conn.cursor()
+        cursor.execute('''SELECT table_name, row_key, operation, changed_at, MAX(seq) 
+                          FROM sync_changelog GROUP BY table_name, row_key ORDER BY MAX(seq)''')
+        latest_changes = cursor.fetchall()
+        if not latest_changes:
+            return 0, []
+        
+        rows_by_table = {}
+        for table_name in SYNC_TABLE_KEYS:
+            upsert_keys = [
+                row_key for change_table, row_key, operation, _, _ in latest_changes 
+                if change_table == table_name and operation == 'upsert'
+            ]
+            rows_by_table[table_name] = self._fetch_rows_by_key(table_name, upsert_keys)
+        
+        changes = []
+        for table_name, row_key, operation, changed_at, _ in latest_changes:
+            row = rows_by_table.get(table_name, {}).get(row_key)
+            if operation == 'upsert' and row is None:
+                operation = 'delete'
+            changes.append({
+                'table': table_name, 
+                'key': row_key, 
+                'op': operation, 
+                'changed_at': changed_at, 
+                'row': row
+            })
+        
+        return max(change[4] for change in latest_changes), changes
+
+    def _fetch_rows_by_key(self, table_name, row_keys):
+        key_column = SYNC_TABLE_KEYS[table_name]
+        cursor = self.conn.cursor()
+        rows = {}
+        
+        for chunk in chunked(row_keys):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"SELECT * FROM {table_name} WHERE {key_column} IN ({placeholders})", chunk)
+            columns = [description[0] for description in cursor.description]
+            for row in cursor.fetchall():
+                row_dict = dict(zip(columns, row))
+                for column in SYNC_LOCAL_COLUMNS.get(table_name, ()):
+                    row_dict.pop(column, None)
+                rows[row_dict[key_column]] = row_dict
+        
+        return rows
+
+    def clear_pending_changes(self, up_to_seq=None):
+        if up_to_seq is None:
+            self.conn.execute("DELETE FROM sync_changelog")
+        else:
+            self.conn.execute("DELETE FROM sync_changelog WHERE seq <= ?", (up_to_seq,))
+        self.conn.commit()
+
+    def apply_changes(self, changes, record=False, summary=None):
+        cursor = self.conn.cursor()
+        table_columns = {}
+        applied_count = 0
+        
+        for change in changes:
+            table_name = change.get('table')
+            key_column = SYNC_TABLE_KEYS.get(table_name)
+            row_key = change.get('key')
+            if not key_column or row_key is None:
+                continue
+            if table_name == 'settings' and not is_synced_setting(row_key):
+                continue
+            
+            timestamp_column = SYNC_TIMESTAMP_COLUMNS.get(table_name)
+            row = None
+            
+            if change.get('op') == 'delete':
+                if timestamp_column:
+                    cursor.execute(
+                        f"DELETE FROM {table_name} WHERE {key_column} = ? "
+                        f"AND COALESCE({timestamp_column}, '') <= ?",
+                        (row_key, change.get('changed_at') or '')
+                    )
+                else:
+                    cursor.execute(f"DELETE FROM {table_name} WHERE {key_column} = ?", (row_key,))
+            else:
+                if table_name not in table_columns:
+                    table_columns[table_name] = self._get_synced_columns(table_name)
+                
+                row = {
+                    column: value for column, value in (change.get('row') or {}).items() 
+                    if column in table_columns[table_name]
+                }
+                if key_column not in row:
+                    continue
+                if table_name == 'analyzed_videos' and self._is_archived(row_key, row.get('retrieved_at')):
+                    continue
+                
+                columns = list(row)
+                sql = (f"INSERT INTO {table_name} ({', '.join(columns)}) "
+                       f"VALUES ({', '.join('?' for _ in columns)}) "
+                       f"ON CONFLICT({key_column}) DO ")
+                update_columns = [column for column in columns if column != key_column]
+                if update_columns:
+                    sql += "UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in update_columns)
+                    if timestamp_column in row:
+                        sql += (f" WHERE COALESCE(excluded.{timestamp_column}, '') >= "
+                                f"COALESCE({table_name}.{timestamp_column}, '')")
+                else:
+                    sql += "NOTHING"
+                
+                try:
+                    cursor.execute(sql, [row[column] for column in columns])
+                except sqlite3.IntegrityError:
+                    continue
+            
+            if cursor.rowcount <= 0:
+                continue
+            
+            if record:
+                self.record_changes(cursor, table_name, [row_key], change.get('op', 'upsert'))
+            if summary is not None:
+                self._update_merge_summary(summary, table_name, row_key, change.get('op'), row)
+            applied_count += 1
+        
+        self.conn.commit()
+        return applied_count
+
+    def _is_archived(self, video_id, retrieved_at):
+        return self.conn.execute(
+            "SELECT 1 FROM archived_videos WHERE id = ? AND archived_at >= ?", 
+            (video_id, retrieved_at or '')
+        ).fetchone() is not None
+
+    def get_stale_video_ids(self, stale_before, limit):
+        cursor = self.conn.execute(
+            '''SELECT id FROM analyzed_videos 
+               WHERE stats_refreshed_at IS NULL OR stats_refreshed_at < ? 
+               ORDER BY stats_refreshed_at LIMIT ?''',
+            (stale_before, limit)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def count_stale_videos(self, stale_before):
+        return self.conn.execute(
+            '''SELECT COUNT(*) FROM analyzed_videos 
+               WHERE stats_refreshed_at IS NULL OR stats_refreshed_at < ?''',
+            (stale_before,)
+        ).fetchone()[0]
+
+    def save_stats_snapshots(self, stats, requested_ids, captured_at):
+        # Refreshed stats are local history: the rows are updated without changelog entries so
+        # sync keeps treating retrieved_at as the row's version.
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            '''INSERT OR REPLACE INTO video_stats_snapshots 
+               (video_id, captured_at, views, likes, comments) VALUES (?, ?, ?, ?, ?)''',
+            [(video_id, captured_at, s['views'], s['likes'], s['comments']) 
+             for video_id, s in stats.items()]
+        )
+        
+        upload_dates = {}
+        for chunk in chunked(stats):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(
+                f"SELECT id, upload_date FROM analyzed_videos WHERE id IN ({placeholders})", chunk
+            )
+            upload_dates.update(cursor.fetchall())
+        
+        now = datetime.now(timezone.utc)
+        updates = []
+        for video_id, s in stats.items():
+            try:
+                upload_date = datetime.strptime(upload_dates[video_id], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except (KeyError, TypeError, ValueError):
+                continue
+            days_since_upload = (now - upload_date).days + 1
+            updates.append((s['views'], s['views'] / days_since_upload, captured_at, 
+                            s.get('channel_id'), video_id))
+        
+        cursor.executemany(
+            '''UPDATE analyzed_videos SET views = ?, view_velocity = ?, stats_refreshed_at = ?, 
+                      channel_id = COALESCE(channel_id, ?) 
+               WHERE id = ?''',
+            updates
+        )
+        # Videos missing from the response were removed or made private; don't retry them every run
+        missing_ids = [video_id for video_id in requested_ids if video_id not in stats]
+        cursor.executemany(
+            "UPDATE analyzed_videos SET stats_refreshed_at = ? WHERE id = ?",
+            [(captured_at, video_id) for video_id in missing_ids]
+        )
+        self.conn.commit()
+
+    def save_channel_stats(self, channels, captured_at, requested_ids=()):
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            '''INSERT INTO channels (id, title, subscribers, video_count, view_count, refreshed_at) 
+               VALUES (?, ?, ?, ?, ?, ?) 
+               ON CONFLICT(id) DO UPDATE SET 
+                   title = COALESCE(excluded.title, title), subscribers = excluded.subscribers, 
+                   video_count = excluded.video_count, view_count = excluded.view_count, 
+                   refreshed_at = excluded.refreshed_at''',
+            [(channel_id, c['title'], c['subscribers'], c['video_count'], c['view_count'], captured_at) 
+             for channel_id, c in channels.items()]
+        )
+        cursor.executemany(
+            '''INSERT OR REPLACE INTO channel_stats_history 
+               (channel_id, captured_at, subscribers, video_count, view_count) 
+               VALUES (?, ?, ?, ?, ?)''',
+            [(channel_id, captured_at, c['subscribers'], c['video_count'], c['view_count']) 
+             for channel_id, c in channels.items()]
+        )
+        # Channels missing from the response were closed or hidden; keep them out of the stale queue
+        cursor.executemany(
+            '''INSERT INTO channels (id, refreshed_at) VALUES (?, ?) 
+               ON CONFLICT(id) DO UPDATE SET refreshed_at = excluded.refreshed_at''',
+            [(channel_id, captured_at) for channel_id in requested_ids if channel_id not in channels]
+        )
+        self.record_changes(cursor, 'channels', list(dict.fromkeys([*channels, *requested_ids])), 'upsert')
+        self.conn.commit()
+
+    def get_stale_channel_ids(self, stale_before, limit):
+        cursor = self.conn.execute(
+            f"SELECT channel_id FROM ({STALE_CHANNELS_QUERY}) ORDER BY refreshed_at LIMIT ?",
+            (stale_before, limit)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def count_stale_channels(self, stale_before):
+        return self.conn.execute(
+            f"SELECT COUNT(DISTINCT channel_id) FROM ({STALE_CHANNELS_QUERY})", (stale_before,)
+        ).fetchone()[0]
+
+    def find_breakout_videos(self, max_subscribers, min_velocity_ratio, limit=200):
+        # Range scan on channels.subscribers, then the (channel_id, view_velocity) index per channel
+        cursor = self.conn.execute(
+            '''SELECT v.id, v.title, c.title, c.subscribers, v.views, v.view_velocity, 
+                      v.view_velocity / MAX(c.subscribers, 1) AS velocity_ratio 
+               FROM channels AS c 
+               JOIN analyzed_videos AS v ON v.channel_id = c.id 
+               WHERE c.subscribers <= ? AND v.view_velocity >= MAX(c.subscribers, 1) * ? 
+               ORDER BY velocity_ratio DESC LIMIT ?''',
+            (max_subscribers, min_velocity_ratio, limit)
+        )
+        return cursor.fetchall()
+
+    def save_watchlist(self, keyword, params):
+        cursor = self.conn.cursor()
+        saved_at = datetime.now(timezone.utc).isoformat()
+        cursor.execute(
+            '''INSERT INTO watchlists (keyword, params, enabled, created_at, updated_at) VALUES (?, ?, 1, ?, ?) 
+               ON CONFLICT(keyword) DO UPDATE SET params = excluded.params, enabled = 1, 
+                   updated_at = excluded.updated_at''',
+            (keyword, json.dumps(params), saved_at, saved_at)
+        )
+        self.record_changes(cursor, 'watchlists', [keyword], 'upsert')
+        self.conn.commit()
+
+    def get_watchlists(self, enabled_only=True):
+        cursor = self.conn.execute(
+            f'''SELECT id, keyword, params, enabled FROM watchlists 
+                {"WHERE enabled = 1" if enabled_only else ""} ORDER BY id'''
+        )
+        return [
+            {'id': row[0], 'keyword': row[1], 'params': json.loads(row[2]), 'enabled': bool(row[3])} 
+            for row in cursor.fetchall()
+        ]
+
+    def delete_watchlists(self, keywords):
+        if not keywords:
+            return
+        
+        cursor = self.conn.cursor()
+        for chunk in chunked(keywords):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(
+                f'''DELETE FROM watchlist_runs WHERE watchlist_id IN 
+                    (SELECT id FROM watchlists WHERE keyword IN ({placeholders}))''', chunk
+            )
+            cursor.execute(f"DELETE FROM watchlists WHERE keyword IN ({placeholders})", chunk)
+        self.record_changes(cursor, 'watchlists', keywords, 'delete')
+        self.conn.commit()
+
+    def record_watchlist_run(self, watchlist_id, api_key_alias, started_at, finished_at, 
+                             units_used, video_count, status, message=''):
+        self.conn.execute(
+            '''INSERT INTO watchlist_runs (watchlist_id, api_key_alias, started_at, finished_at, 
+                   duration_seconds, units_used, video_count, status, message) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (watchlist_id, api_key_alias, started_at.isoformat(), finished_at.isoformat(), 
+             (finished_at - started_at).total_seconds(), units_used, video_count, status, message)
+        )
+        self.conn.commit()
+
+    def get_last_watchlist_runs(self):
+        cursor = self.conn.execute(
+            '''SELECT watchlist_id, started_at, status, units_used, duration_seconds, video_count 
+               FROM watchlist_runs AS runs 
+               WHERE started_at = (SELECT MAX(started_at) FROM watchlist_runs 
+                                   WHERE watchlist_id = runs.watchlist_id)'''
+        )
+        return {
+            row[0]: {'started_at': row[1], 'status': row[2], 'units_used': row[3], 
+                     'duration_seconds': row[4], 'video_count': row[5]} 
+            for row in cursor.fetchall()
+        }
+
+    def get_average_watchlist_units(self, watchlist_id, sample_size=5):
+        return self.conn.execute(
+            '''SELECT AVG(units_used) FROM (
+                   SELECT units_used FROM watchlist_runs 
+                   WHERE watchlist_id = ? AND status IN ('success', 'error') 
+                   ORDER BY started_at DESC LIMIT ?
+               )''',
+            (watchlist_id, sample_size)
+        ).fetchone()[0]
+
+    def get_units_used_since(self, since):
+        # search_metrics holds every API call of GUI and scheduler searches, tagged with the key used
+        cursor = self.conn.execute(
+            '''SELECT api_key_alias, SUM(units_used) FROM search_metrics 
+               WHERE api_key_alias IS NOT NULL AND started_at >= ? GROUP BY api_key_alias''',
+            (since.isoformat(),)
+        )
+        return dict(cursor.fetchall())
+
+    def get_latest_retrieval(self, keyword):
+        return self.conn.execute(
+            "SELECT MAX(retrieved_at) FROM analyzed_videos WHERE search_keyword = ?", (keyword,)
+        ).fetchone()[0]
+
+    def save_search_metrics(self, run_id, keyword, spans, api_key_alias=None):
+        self.conn.executemany(
+            '''INSERT INTO search_metrics 
+               (run_id, keyword, stage, started_at, duration_ms, item_count, units_used, api_key_alias) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            [(run_id, keyword, span['stage'], span['started_at'], span['duration_ms'], 
+              span['item_count'], span['units_used'], api_key_alias) for span in spans]
+        )
+        self.conn.commit()
+
+    def prune_search_metrics(self, before):
+        cursor = self.conn.execute(
+            "DELETE FROM search_metrics WHERE started_at < ?", (before.isoformat(),)
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def get_column_types(self, table_name):
+        cursor = self.conn.execute(f"PRAGMA table_info({table_name})")
+        return [(info[1], info[2]) for info in cursor.fetchall()]
+
+    def get_analyzed_videos_page(self, columns, where_clause, params, order_column, descending, limit, offset):
+        total_rows = self.conn.execute(f"SELECT COUNT(*) FROM analyzed_videos {where_clause}", params).fetchone()[0]
+        column_list = ', '.join(columns)
+        if order_column not in OUTLIER_SCORE_COLUMNS:
+            # Left join like the exports, so the page rows always match the count
+            rows = self.conn.execute(
+                f"""SELECT {column_list} FROM analyzed_videos 
+                    LEFT JOIN video_outlier_scores AS scores ON scores.video_id = analyzed_videos.id 
+                    {where_clause} ORDER BY {analyzed_videos_order(order_column, descending)} 
+                    LIMIT ? OFFSET ?""",
+                list(params) + [limit, offset]
+            ).fetchall()
+            return total_rows, rows
+        
+        # Scored videos are read in score index order, then the videos without a score; one
+        # ORDER BY over the left join would sort every matching row for each page
+        scored_from = f"""FROM video_outlier_scores AS scores 
+                          CROSS JOIN analyzed_videos ON analyzed_videos.id = scores.video_id 
+                          {add_condition(where_clause, f"scores.{order_column} IS NOT NULL")}"""
+        rows = self.conn.execute(
+            f"""SELECT {column_list} {scored_from} 
+                ORDER BY scores.{order_column} {'DESC' if descending else 'ASC'} 
+                LIMIT ? OFFSET ?""",
+            list(params) + [limit, offset]
+        ).fetchall()
+        if len(rows) < limit:
+            scored_count = self.conn.execute(f"SELECT COUNT(*) {scored_from}", params).fetchone()[0]
+            rows += self.conn.execute(
+                f"""SELECT {column_list} FROM analyzed_videos 
+                    LEFT JOIN video_outlier_scores AS scores ON scores.video_id = analyzed_videos.id 
+                    {add_condition(where_clause, f"scores.{order_column} IS NULL")} 
+                    ORDER BY retrieved_at DESC 
+                    LIMIT ? OFFSET ?""",
+                list(params) + [limit - len(rows), max(offset - scored_count, 0)]
+            ).fetchall()
+        return total_rows, rows
+
+    def iter_query_chunks(self, query, params=(), chunk_size=SQL_CHUNK_SIZE):
+        cursor = self.conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+    def _get_columns(self, table_name, schema='main'):
+        cursor = self.conn.execute(f"PRAGMA {schema}.table_info({table_name})")
+        return [info[1] for info in cursor.fetchall()]
+
+    def _get_synced_columns(self, table_name, schema='main'):
+        local_columns = SYNC_LOCAL_COLUMNS.get(table_name, ())
+        return [column for column in self._get_columns(table_name, schema) if column not in local_columns]
+
+    def _update_merge_summary(self, summary, table_name, row_key, operation, row):
+        if table_name == 'analyzed_videos':
+            summary['analyzed_videos'] += 1
+        elif table_name == 'excluded_videos':
+            target = 'excluded_removed' if operation == 'delete' else 'excluded_added'
+            summary[target].append(row_key)
+        elif table_name == 'settings':
+            summary['settings'][row_key] = None if operation == 'delete' else row.get('value')
+        elif table_name == 'api_keys':
+            summary['api_keys_changed'] = True
+
+    def merge_snapshot(self, snapshot_path, summary):
+        self.conn.commit()
+        cursor = self.conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS remote", (snapshot_path,))
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            cursor.execute('''SELECT id FROM remote.excluded_videos 
+                              WHERE id NOT IN (SELECT id FROM main.excluded_videos)''')
+            summary['excluded_added'].extend(row[0] for row in cursor.fetchall())
+            
+            cursor.execute('''SELECT r.key, r.value FROM remote.settings r 
+                              LEFT JOIN main.settings l ON l.key = r.key 
+                              WHERE l.key IS NULL OR (r.value IS NOT l.value AND 
+                                    COALESCE(r.updated_at, '') > COALESCE(l.updated_at, ''))''')
+            summary['settings'].update(
+                {key: value for key, value in cursor.fetchall() if is_synced_setting(key)}
+            )
+            
+            cursor.execute('''SELECT COUNT(*) FROM remote.api_keys 
+                              WHERE alias NOT IN (SELECT alias FROM main.api_keys)''')
+            if cursor.fetchone()[0]:
+                summary['api_keys_changed'] = True
+            
+            for table_name, key_column in SYNC_TABLE_KEYS.items():
+                remote_columns = set(self._get_columns(table_name, 'remote'))
+                columns = [c for c in self._get_synced_columns(table_name) if c in remote_columns]
+                column_list = ', '.join(columns)
+                
+                if table_name == 'api_keys':
+                    cursor.execute(f"INSERT OR IGNORE INTO main.api_keys ({column_list}) "
+                                   f"SELECT {column_list} FROM remote.api_keys")
+                    continue
+                
+                source_filter = "1"
+                if table_name == 'settings':
+                    local_keys = ', '.join(f"'{key}'" for key in LOCAL_ONLY_SETTINGS)
+                    source_filter = f"key NOT IN ({local_keys}) AND key NOT LIKE 'sync!_%' ESCAPE '!'"
+                elif table_name == 'analyzed_videos':
+                    # Rows archived here stay archived unless the remote copy was retrieved again since
+                    source_filter = '''NOT EXISTS (
+                        SELECT 1 FROM main.archived_videos AS archived 
+                        WHERE archived.id = remote.analyzed_videos.id 
+                          AND archived.archived_at >= COALESCE(remote.analyzed_videos.retrieved_at, ''))'''
+                
+                timestamp_column = SYNC_TIMESTAMP_COLUMNS[table_name]
+                update_columns = [c for c in columns if c != key_column]
+                sql = (f"INSERT INTO main.{table_name} ({column_list}) "
+                       f"SELECT {column_list} FROM remote.{table_name} WHERE {source_filter} "
+                       f"ON CONFLICT({key_column}) DO ")
+                if update_columns:
+                    sql += ("UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in update_columns) +
+                            f" WHERE COALESCE(excluded.{timestamp_column}, '') > "
+                            f"COALESCE({table_name}.{timestamp_column}, '')")
+                else:
+                    sql += "NOTHING"
+                cursor.execute(sql)
+                
+                if table_name == 'analyzed_videos':
+                    summary['analyzed_videos'] += max(cursor.rowcount, 0)
+            
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE remote")
+        
+        return summary
+
+    def create_snapshot(self, snapshot_path):
+        snapshot_conn = sqlite3.connect(snapshot_path)
+        try:
+            self.conn.backup(snapshot_conn)
+            
+            snapshot_conn.execute("PRAGMA secure_delete = ON")
+            local_keys = [
+                row[0] for row in snapshot_conn.execute("SELECT key FROM settings") 
+                if not is_synced_setting(row[0])
+            ]
+            snapshot_conn.executemany("DELETE FROM settings WHERE key = ?", [(key,) for key in local_keys])
+            snapshot_conn.execute("DELETE FROM sync_changelog")
+            snapshot_conn.commit()
+        finally:
+            snapshot_conn.close()
+
+    def get_local_only_settings(self):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT key, value FROM settings")
+        return {key: value for key, value in cursor.fetchall() if not is_synced_setting(key)}
+
+    def restore_local_only_settings(self, local_settings):
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT key FROM settings")
+        stale_keys = [row[0] for row in cursor.fetchall() if not is_synced_setting(row[0])]
+        for chunk in chunked(stale_keys):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"DELETE FROM settings WHERE key IN ({placeholders})", chunk)
+        
+        cursor.executemany(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
+            list(local_settings.items())
+        )
+        self.conn.commit()
+
+    def get_retention_rules(self):
+        rules = dict(DEFAULT_RETENTION_RULES)
+        rules_json = self.get_setting('retention_rules')
+        if rules_json:
+            try:
+                rules.update(json.loads(rules_json))
+            except (json.JSONDecodeError, TypeError):
+                pass
+        return rules
+
+    def set_retention_rule(self, keyword, days, top_k):
+        rules = self.get_retention_rules()
+        rules[keyword or '*'] = {'days': int(days), 'top_k': int(top_k)}
+        self.set_setting('retention_rules', json.dumps(rules, ensure_ascii=False))
+
+    def find_expired_video_ids(self, rules):
+        cursor = self.conn.cursor()
+        default_rule = rules.get('*', {})
+        expired_ids = set()
+        
+        cursor.execute("SELECT DISTINCT search_keyword FROM analyzed_videos")
+        keywords = [row[0] for row in cursor.fetchall()]
+        
+        for keyword in keywords:
+            rule = rules.get(keyword, default_rule)
+            keep_days = int(rule.get('days', 0))
+            keep_top_k = int(rule.get('top_k', 0))
+            
+            if keep_days > 0:
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).isoformat()
+                cursor.execute(
+                    "SELECT id FROM analyzed_videos WHERE search_keyword IS ? AND retrieved_at < ?",
+                    (keyword, cutoff)
+                )
+                expired_ids.update(row[0] for row in cursor.fetchall())
+            
+            if keep_top_k > 0:
+                cursor.execute(
+                    '''SELECT id FROM analyzed_videos WHERE search_keyword IS ?
+                       ORDER BY view_velocity DESC LIMIT -1 OFFSET ?''',
+                    (keyword, keep_top_k)
+                )
+                expired_ids.update(row[0] for row in cursor.fetchall())
+        
+        return expired_ids
+
+    def archive_videos(self, video_ids, archive_dir):
+        if not video_ids:
+            return None
+        
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(
+            archive_dir, f"analyzed_videos_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl.gz"
+        )
+        
+        cursor = self.conn.cursor()
+        with gzip.open(archive_path, 'wt', encoding='utf-8') as f:
+            for chunk in chunked(video_ids):
+                placeholders = ','.join('?' for _ in chunk)
+                cursor.execute(f"SELECT * FROM analyzed_videos WHERE id IN ({placeholders})", chunk)
+                columns = [description[0] for description in cursor.description]
+                for row in cursor:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n')
+        
+        archived_at = datetime.now(timezone.utc).isoformat()
+        for chunk in chunked(video_ids):
+            placeholders = ','.join('?' for _ in chunk)
+            cursor.execute(f"DELETE FROM analyzed_videos WHERE id IN ({placeholders})", chunk)
+        cursor.executemany("INSERT OR REPLACE INTO archived_videos (id, archived_at) VALUES (?, ?)", 
+                           [(video_id, archived_at) for video_id in video_ids])
+        self.record_changes(cursor, 'analyzed_videos', video_ids, 'delete')
+        self.conn.commit()
+        
+        return archive_path
+
+    def incremental_vacuum(self, max_pages):
+        free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free_pages:
+            return 0
+        
+        # executescript steps the pragma to completion; execute() would free a single page
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        return free_pages - self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def run_maintenance(self, archive_dir, vacuum_pages):
+        expired_ids = self.find_expired_video_ids(self.get_retention_rules())
+        archive_path = self.archive_videos(expired_ids, archive_dir)
+        self.prune_search_metrics(datetime.now(timezone.utc) - timedelta(days=METRICS_RETENTION_DAYS))
+        freed_pages = self.incremental_vacuum(vacuum_pages)
+        return len(expired_ids), archive_path, freed_pages
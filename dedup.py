@@ -0,0 +1,157 @@
+import re
+import random
+import operator
+import hashlib
+import unicodedata
+from array import array
+
+from constants import (TITLE_SHINGLE_SIZE, TITLE_LSH_BANDS, TITLE_LSH_ROWS,
+                       TITLE_DUPLICATE_SIMILARITY)
+from database import SQL_CHUNK_SIZE
+
+SIGNATURE_SIZE = TITLE_LSH_BANDS * TITLE_LSH_ROWS
+VALUE_MASK = (1 << 32) - 1
+EMPTY_BIN = 1 << 32
+# Fixed seed: signatures are persisted, so the probe orders must never change between runs
+_random = random.Random(0x5EED)
+PROBE_ORDERS = [_random.sample(range(SIGNATURE_SIZE), SIGNATURE_SIZE) for _ in range(SIGNATURE_SIZE)]
+BRACKETED_PATTERN = re.compile(r'[\(\[【「<][^\)\]】」>]*[\)\]】」>]')
+
+
+def normalize_title(title):
+    title = unicodedata.normalize('NFKC', title or '').lower()
+    # Re-upload tags like "(reupload)" or "[MV]" should not make copies look different
+    title = BRACKETED_PATTERN.sub(' ', title).strip() or title
+    return ' '.join(re.sub(r'[\W_]+', ' ', title).split())
+
+
+def title_shingles(title):
+    text = normalize_title(title)
+    if len(text) <= TITLE_SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + TITLE_SHINGLE_SIZE] for i in range(len(text) - TITLE_SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(title):
+    # One-permutation MinHash: each shingle is hashed once (blake2b, stable across runs since
+    # signatures are persisted) and only lowers the minimum of the bin its hash falls into
+    shingles = title_shingles(title)
+    if not shingles:
+        return None
+    
+    bins = [EMPTY_BIN] * SIGNATURE_SIZE
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        index = value % SIGNATURE_SIZE
+        value = (value // SIGNATURE_SIZE) & VALUE_MASK
+        if value < bins[index]:
+            bins[index] = value
+    
+    # Densification: an empty bin copies the first filled bin in its own fixed probe order, so
+    # short titles still compare bin by bin and no single shingle decides a whole LSH band
+    signature = array('I', [0]) * SIGNATURE_SIZE
+    for index, value in enumerate(bins):
+        if value == EMPTY_BIN:
+            value = next(bins[probe] for probe in PROBE_ORDERS[index] if bins[probe] != EMPTY_BIN)
+        signature[index] = value
+    return signature
+
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(TITLE_LSH_BANDS):
+        rows = signature[band * TITLE_LSH_ROWS:(band + 1) * TITLE_LSH_ROWS]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def estimate_similarity(signature, other_signature):
+    return sum(map(operator.eq, signature, other_signature)) / SIGNATURE_SIZE
+
+
+class TitleIndex:
+
+    def __init__(self, db_manager):
+        self.conn = db_manager.conn
+
+    def lookup(self, video_id, title):
+        # Returns (cluster_id, entry) without writing; pass entry to add() once the video is kept.
+        # A video's cluster is the first-indexed video it resembles.
+        cursor = self.conn.cursor()
+        row = cursor.execute(
+            "SELECT cluster_id FROM video_clusters WHERE video_id = ?", (video_id,)
+        ).fetchone()
+        if row:
+            return row[0], None
+
+        signature = minhash_signature(title)
+        if signature is None:
+            return video_id, None
+        buckets = band_buckets(signature)
+
+        placeholders = ','.join('?' for _ in buckets)
+        candidates = cursor.execute(
+            f'''SELECT clusters.cluster_id, clusters.signature FROM video_clusters AS clusters
+                WHERE clusters.video_id IN
+                    (SELECT DISTINCT video_id FROM title_lsh_buckets WHERE bucket IN ({placeholders}))''',
+            buckets
+        ).fetchall()
+
+        cluster_id, best_similarity = video_id, TITLE_DUPLICATE_SIMILARITY
+        for candidate_cluster, candidate_signature in candidates:
+            similarity = estimate_similarity(signature, array('I', candidate_signature))
+            if similarity >= best_similarity:
+                cluster_id, best_similarity = candidate_cluster, similarity
+        return cluster_id, (signature, buckets)
+
+    def add(self, video_id, cluster_id, entry):
+        if entry is None:
+            return
+        signature, buckets = entry
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "INSERT INTO video_clusters (video_id, cluster_id, signature) VALUES (?, ?, ?)",
+            (video_id, cluster_id, signature.tobytes())
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO title_lsh_buckets (bucket, video_id) VALUES (?, ?)",
+            [(bucket, video_id) for bucket in buckets]
+        )
+
+    def assign(self, video_id, title):
+        cluster_id, entry = self.lookup(video_id, title)
+        self.add(video_id, cluster_id, entry)
+        return cluster_id
+
+    def commit(self):
+        self.conn.commit()
+
+    def refresh(self, should_stop=None):
+        # Index videos that arrived without passing through a search (sync, older history)
+        # and drop entries for videos that are no longer stored. Every batch is committed, so
+        # a stopped run resumes where it left off.
+        cursor = self.conn.cursor()
+        cursor.execute('''DELETE FROM title_lsh_buckets WHERE video_id NOT IN
+                          (SELECT id FROM analyzed_videos)''')
+        cursor.execute('''DELETE FROM video_clusters WHERE video_id NOT IN
+                          (SELECT id FROM analyzed_videos)''')
+        self.conn.commit()
+
+        # rowid order follows insertion (re-retrieved rows are re-inserted), so earlier videos
+        # become cluster representatives without sorting the whole table
+        unindexed = self.conn.execute(
+            '''SELECT id, title FROM analyzed_videos
+               WHERE id NOT IN (SELECT video_id FROM video_clusters) ORDER BY rowid'''
+        )
+        indexed_count = 0
+        while not (should_stop and should_stop()):
+            rows = unindexed.fetchmany(SQL_CHUNK_SIZE)
+            if not rows:
+                break
+            for video_id, title in rows:
+                self.assign(video_id, title)
+            self.conn.commit()
+            indexed_count += len(rows)
+        unindexed.close()
+        return indexed_count
@@ -0,0 +1,157 @@
+import os
+import math
+import mmap
+import struct
+import hashlib
+
+from constants import (EXCLUSION_FILTER_FILE, EXCLUSION_FILTER_MIN_CAPACITY,
+                       EXCLUSION_FILTER_FALSE_POSITIVE_RATE)
+
+FILTER_MAGIC = b'YTEXCL01'
+# magic, bit count, hash count, capacity, items added, exclusion_state version, token
+HEADER = struct.Struct('<8sQQQQQ16s')
+
+
+def filter_size(capacity, false_positive_rate=EXCLUSION_FILTER_FALSE_POSITIVE_RATE):
+    bit_count = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+    hash_count = max(1, round(bit_count / capacity * math.log(2)))
+    return bit_count, hash_count
+
+
+class ExclusionFilter:
+    # Bloom filter over excluded_videos, memory-mapped from disk so opening it costs O(1).
+    # A negative answer is final; a positive one is confirmed against the primary key.
+
+    def __init__(self, db_manager, path=EXCLUSION_FILTER_FILE):
+        self.conn = db_manager.conn
+        self.path = path
+        self.bits = None
+        self._file = None
+        if not self._open():
+            self.rebuild()
+
+    def _get_state(self):
+        return self.conn.execute(
+            "SELECT version, row_count, token FROM exclusion_state WHERE id = 1"
+        ).fetchone()
+
+    def _open(self):
+        try:
+            self._file = open(self.path, 'r+b')
+            self.bits = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_WRITE)
+        except (OSError, ValueError):
+            self.close()
+            return False
+
+        self._read_header()
+        version, row_count, token = self._get_state()
+        is_valid = (
+            self.magic == FILTER_MAGIC
+            and len(self.bits) == HEADER.size + math.ceil(self.bit_count / 8)
+            and self.version == version and self.token == token.encode('ascii')
+            and self.item_count <= self.capacity
+        )
+        if not is_valid:
+            self.close()
+        return is_valid
+
+    def _read_header(self):
+        (self.magic, self.bit_count, self.hash_count, self.capacity,
+         self.item_count, self.version, self.token) = HEADER.unpack_from(self.bits, 0)
+
+    def _write_header(self):
+        HEADER.pack_into(self.bits, 0, FILTER_MAGIC, self.bit_count, self.hash_count,
+                         self.capacity, self.item_count, self.version, self.token)
+
+    def _positions(self, video_id):
+        digest = hashlib.blake2b(video_id.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def _set_bits(self, video_ids):
+        for video_id in video_ids:
+            for position in self._positions(video_id):
+                offset = HEADER.size + (position >> 3)
+                self.bits[offset] |= 1 << (position & 7)
+
+    def might_contain(self, video_id):
+        for position in self._positions(video_id):
+            if not self.bits[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, video_id):
+        if not self.might_contain(video_id):
+            return False
+        return self.conn.execute(
+            "SELECT 1 FROM excluded_videos WHERE id = ?", (video_id,)
+        ).fetchone() is not None
+
+    def __len__(self):
+        return self._get_state()[1]
+
+    def add(self, video_ids):
+        # video_ids must be rows this caller just inserted; any other insert since the
+        # filter was last in sync means bits are missing, so it is rebuilt instead
+        video_ids = list(video_ids)
+        if not video_ids:
+            return
+
+        version, _, token = self._get_state()
+        if (self.version + len(video_ids) != version
+                or self.item_count + len(video_ids) > self.capacity):
+            self.rebuild()
+            return
+
+        self._set_bits(video_ids)
+        self.item_count += len(video_ids)
+        self.version, self.token = version, token.encode('ascii')
+        self._write_header()
+        if isinstance(self.bits, mmap.mmap):
+            self.bits.flush()
+
+    def rebuild(self):
+        # The state is read before the ids so concurrent inserts can only make the
+        # filter look stale, never miss an id
+        version, row_count, token = self._get_state()
+        self.close()
+
+        self.capacity = max(row_count * 2, EXCLUSION_FILTER_MIN_CAPACITY)
+        self.bit_count, self.hash_count = filter_size(self.capacity)
+        self.magic, self.item_count = FILTER_MAGIC, 0
+        self.version, self.token = version, token.encode('ascii')
+        self.bits = bytearray(HEADER.size + math.ceil(self.bit_count / 8))
+
+        cursor = self.conn.execute("SELECT id FROM excluded_videos")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            self._set_bits(row[0] for row in rows)
+            self.item_count += len(rows)
+        self._write_header()
+
+        in_memory_bits = self.bits
+        temp_path = self.path + '.part'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(in_memory_bits)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            # e.g. another process still maps the old file on Windows; keep the in-memory copy
+            print(f"Could not save exclusion filter: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        if not self._open():
+            self.bits = in_memory_bits
+            self._read_header()
+
+    def close(self):
+        if isinstance(self.bits, mmap.mmap):
+            self.bits.close()
+            self.bits = None
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,116 @@
+import os
+import csv
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from constants import EXPORT_CHUNK_SIZE
+
+EXPORT_FORMATS = {
+    'csv': "CSV Files (*.csv)",
+    'jsonl': "JSON Lines Files (*.jsonl)",
+    'parquet': "Parquet Files (*.parquet)"
+}
+
+RESULT_EXPORT_COLUMNS = [
+    ('id', 'TEXT'), ('title', 'TEXT'), ('channel', 'TEXT'), ('upload_date', 'TEXT'),
+    ('views', 'INTEGER'), ('subscribers', 'INTEGER'), ('duration', 'INTEGER'),
+    ('view_velocity', 'REAL'), ('views_per_subscriber', 'REAL'), ('channel_velocity_ratio', 'REAL'),
+    ('url', 'TEXT'), ('thumbnail_url', 'TEXT')
+]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def is_parquet_available():
+    return pq is not None
+
+
+def available_export_formats():
+    return {
+        export_format: file_filter for export_format, file_filter in EXPORT_FORMATS.items()
+        if export_format != 'parquet' or is_parquet_available()
+    }
+
+
+def iter_dict_chunks(records, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    chunk = []
+    for record in records:
+        chunk.append(tuple(record.get(name) for name, _ in columns))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_chunks(row_chunks, columns, file_path, export_format):
+    # columns is a list of (name, sqlite type); a partial file never replaces the target
+    writers = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+    if export_format not in writers:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if export_format == 'parquet' and not is_parquet_available():
+        raise ValueError("Parquet export requires the optional 'pyarrow' package.")
+
+    temp_path = file_path + '.part'
+    try:
+        row_count = writers[export_format](row_chunks, columns, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return row_count
+
+
+def _write_csv(row_chunks, columns, file_path):
+    row_count = 0
+    with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in columns])
+        for chunk in row_chunks:
+            writer.writerows(chunk)
+            row_count += len(chunk)
+    return row_count
+
+
+def _write_jsonl(row_chunks, columns, file_path):
+    names = [name for name, _ in columns]
+    row_count = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for chunk in row_chunks:
+            f.writelines(
+                json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n' for row in chunk
+            )
+            row_count += len(chunk)
+    return row_count
+
+
+def _arrow_type(sqlite_type):
+    sqlite_type = (sqlite_type or '').upper()
+    if 'INT' in sqlite_type:
+        return pa.int64()
+    if 'REAL' in sqlite_type or 'FLOA' in sqlite_type or 'DOUB' in sqlite_type:
+        return pa.float64()
+    return pa.string()
+
+
+def _write_parquet(row_chunks, columns, file_path):
+    schema = pa.schema([(name, _arrow_type(sqlite_type)) for name, sqlite_type in columns])
+    row_count = 0
+    with pq.ParquetWriter(file_path, schema) as writer:
+        for chunk in row_chunks:
+            arrays = [
+                pa.array([row[i] for row in chunk], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            row_count += len(chunk)
+    return row_count
@@ -1,18 +1,29 @@
 import sys
 import os
-import threading
+import sqlite3
 import qtawesome as qta
-from datetime import datetime
+import math
+from datetime import datetime, timezone, timedelta
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                                QGridLayout, QLabel, QLineEdit, QPushButton, QComboBox,
-                               QScrollArea, QGroupBox, QInputDialog, QMessageBox,
+                               QGroupBox, QInputDialog, QMessageBox,
                                QFileDialog, QCheckBox)
-from PySide6.QtCore import Qt, Slot
+from PySide6.QtCore import Qt, Slot, QTimer
 
-from constants import DB_FILE, DEFAULT_SETTINGS, ORDER_OPTIONS, get_platform_stylesheet
+from constants import (DB_FILE, ARCHIVE_DIR, DEFAULT_SETTINGS, ORDER_OPTIONS, RANKING_OPTIONS,
+                       MAINTENANCE_INTERVAL_MS, VACUUM_PAGES_PER_RUN, AUTOSYNC_QUIET_PERIOD_MS,
+                       CLOSE_POLL_INTERVAL_MS, STATS_REFRESH_QUOTA_UNITS, STATS_REFRESH_STALE_HOURS,
+                       STATS_REFRESH_BATCH_SIZE, CHANNEL_REFRESH_QUOTA_UNITS, 
+                       CHANNEL_REFRESH_STALE_HOURS, METRICS_LOG_FILE, UI_SETTING_KEYS,
+                       get_platform_stylesheet)
 from database import DatabaseManager
-from workers import Worker, SyncWorker
-from widgets import DBViewerDialog, ResultCard
+from exclusions import ExclusionFilter
+from workers import (Worker, SyncWorker, SyncScheduler, MaintenanceWorker, BatchRefreshWorker,
+                     VideoStatsRefresh, ChannelStatsRefresh)
+from widgets import DBViewerDialog, ResultListView, ThumbnailExportDialog
+from thumbnails import ThumbnailLoader, get_thumbnail_cache, thumbnail_candidate_urls
+from exporters import (available_export_formats, export_chunks, iter_dict_chunks,
+                       RESULT_EXPORT_COLUMNS)
 
 
 class YoutubeAnalyzerApp(QMainWindow):
@@ -26,16 +37,38 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         self._cleanup_old_token_file()
         self.db_manager = DatabaseManager(DB_FILE)
+        self.excluded_filter = None
         self.load_settings()
         
         self.last_results_data = []
         self.last_used_keyword = ""
+        self.thumbnail_loader = ThumbnailLoader(get_thumbnail_cache(), parent=self)
         
         self._create_central_widget()
         self.restore_ui_state()
         
+        self.worker = None
+        self.stats_worker = None
+        self.sync_worker = None
+        self.sync_in_background = False
+        self.sync_scheduler = SyncScheduler(AUTOSYNC_QUIET_PERIOD_MS, self)
+        self.sync_scheduler.sync_due.connect(self.run_background_sync)
+        
         if self.sync_enabled:
-            threading.Timer(0.5, lambda: self.run_sync('download')).start()
+            QTimer.singleShot(500, lambda: self.run_sync('download'))
+        
+        self.closing = False
+        self.close_flush_started = False
+        self.close_timer = QTimer(self)
+        self.close_timer.setSingleShot(True)
+        self.close_timer.setInterval(CLOSE_POLL_INTERVAL_MS)
+        self.close_timer.timeout.connect(self.close)
+        
+        self.maintenance_worker = None
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self.run_maintenance)
+        self.maintenance_timer.start(MAINTENANCE_INTERVAL_MS)
+        QTimer.singleShot(5000, self.run_maintenance)
 
     def _cleanup_old_token_file(self):
     
@@ -51,9 +84,12 @@ class YoutubeAnalyzerApp(QMainWindow):
     def load_settings(self):
     
         self.api_keys = self.db_manager.get_api_keys()
-        self.used_video_ids = self.db_manager.get_all_excluded_ids()
+        if self.excluded_filter:
+            self.excluded_filter.close()
+        self.excluded_filter = ExclusionFilter(self.db_manager)
         self.credentials_path = self.db_manager.get_setting('credentials_path', '')
         self.sync_enabled = self.db_manager.get_setting('sync_enabled', 'false').lower() == 'true'
+        self.metrics_log_enabled = self.db_manager.get_setting('metrics_log_enabled', 'false').lower() == 'true'
 
     def _create_central_widget(self):
     
@@ -123,9 +159,25 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         parent_layout.addLayout(sync_buttons_layout)
         
+        db_buttons_layout = QHBoxLayout()
+        
         db_viewer_button = QPushButton(qta.icon('fa5s.database', color='white'), " DB Manager")
         db_viewer_button.clicked.connect(self.open_db_viewer)
-        parent_layout.addWidget(db_viewer_button)
+        db_buttons_layout.addWidget(db_viewer_button)
+        
+        self.refresh_stats_button = QPushButton(qta.icon('fa5s.chart-line', color='white'), " Refresh Video Stats")
+        self.refresh_stats_button.setToolTip("Update view counts of stored videos in batches of 50 per API call.")
+        self.refresh_stats_button.clicked.connect(self.refresh_video_stats)
+        db_buttons_layout.addWidget(self.refresh_stats_button)
+        
+        self.metrics_log_checkbox = QCheckBox("Metrics Log (JSON)")
+        self.metrics_log_checkbox.setToolTip(
+            f"Append per-stage search timings and quota units to {os.path.basename(METRICS_LOG_FILE)}"
+        )
+        self.metrics_log_checkbox.toggled.connect(self.toggle_metrics_log)
+        db_buttons_layout.addWidget(self.metrics_log_checkbox)
+        
+        parent_layout.addLayout(db_buttons_layout)
 
     def _create_search_conditions_group(self, parent_layout):
     
@@ -154,6 +206,10 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         self.search_button = QPushButton(qta.icon('fa5s.search'), " Start Analysis")
         self.search_button.clicked.connect(self.start_search)
+        
+        self.add_watchlist_button = QPushButton(qta.icon('fa5s.clock'), " Add to Watchlist")
+        self.add_watchlist_button.setToolTip("Save this keyword and filters for the background scheduler")
+        self.add_watchlist_button.clicked.connect(self.add_to_watchlist)
 
     def _layout_search_widgets(self, layout):
     
@@ -174,27 +230,51 @@ class YoutubeAnalyzerApp(QMainWindow):
         layout.addWidget(self.target_count_entry, 3, 1)
         layout.addWidget(self.shorts_only_checkbox, 3, 2, 1, 2)
         
-        layout.addWidget(self.search_button, 4, 0, 1, 4)
+        layout.addWidget(self.search_button, 4, 0, 1, 3)
+        layout.addWidget(self.add_watchlist_button, 4, 3)
 
     def _create_results_section(self, parent_layout):
     
         results_group = QGroupBox("Analysis Results")
         results_group_layout = QVBoxLayout(results_group)
         
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        
-        self.scroll_content_widget = QWidget()
-        self.results_layout = QVBoxLayout(self.scroll_content_widget)
-        self.results_layout.setAlignment(Qt.AlignTop)
+        self.no_results_label = QLabel("No videos found for the specified conditions.")
+        self.no_results_label.hide()
+        results_group_layout.addWidget(self.no_results_label)
         
-        self.scroll_area.setWidget(self.scroll_content_widget)
-        results_group_layout.addWidget(self.scroll_area)
+        self.results_view = ResultListView(self.thumbnail_loader)
+        self.results_view.exclude_requested.connect(self.exclude_video)
+        self.results_view.status_update.connect(self.update_status_bar)
+        self.results_view.selectionModel().selectionChanged.connect(
+            lambda *_: self.exclude_selected_button.setEnabled(
+                self.results_view.selectionModel().hasSelection()
+            )
+        )
+        results_group_layout.addWidget(self.results_view)
         
-        self.save_results_button = QPushButton(qta.icon('fa5s.save'), " Save Results as Text")
-        self.save_results_button.clicked.connect(self.save_results_as_text)
+        self.save_results_button = QPushButton(qta.icon('fa5s.save'), " Save Results")
+        self.save_results_button.clicked.connect(self.save_results)
         self.save_results_button.setEnabled(False)
-        results_group_layout.addWidget(self.save_results_button)
+        
+        self.export_thumbnails_button = QPushButton(qta.icon('fa5s.images'), " Export Thumbnails")
+        self.export_thumbnails_button.clicked.connect(self.export_result_thumbnails)
+        self.export_thumbnails_button.setEnabled(False)
+        
+        results_button_layout = QHBoxLayout()
+        results_button_layout.addWidget(QLabel("Rank by:"))
+        self.ranking_combobox = QComboBox()
+        self.ranking_combobox.addItems(list(RANKING_OPTIONS.keys()))
+        self.ranking_combobox.currentTextChanged.connect(self.rerank_results)
+        results_button_layout.addWidget(self.ranking_combobox)
+        
+        self.exclude_selected_button = QPushButton(qta.icon('fa5s.trash-alt'), " Exclude Selected")
+        self.exclude_selected_button.clicked.connect(self.exclude_selected_videos)
+        self.exclude_selected_button.setEnabled(False)
+        
+        results_button_layout.addWidget(self.save_results_button)
+        results_button_layout.addWidget(self.export_thumbnails_button)
+        results_button_layout.addWidget(self.exclude_selected_button)
+        results_group_layout.addLayout(results_button_layout)
         
         parent_layout.addWidget(results_group, 1)
 
@@ -215,8 +295,12 @@ class YoutubeAnalyzerApp(QMainWindow):
         dialog.exec()
         
         self.load_settings()
+        self.results_view.remove_videos(
+            [video['id'] for video in self.last_results_data if video['id'] in self.excluded_filter]
+        )
         self.restore_ui_state()
         self.update_status_bar()
+        self.schedule_autosync()
 
     def reset_credentials(self):
     
@@ -242,35 +326,54 @@ class YoutubeAnalyzerApp(QMainWindow):
     
         self.api_key_combobox.clear()
         self.api_key_combobox.addItems(self.api_keys.keys())
-        self.api_key_combobox.setCurrentText(
-            self.db_manager.get_setting('last_api_alias', '')
-        )
         
         self.keyword_entry.setText('')
         
-        saved_order = self.db_manager.get_setting('last_order', DEFAULT_SETTINGS['order'])
-        korean_order = self._get_korean_order_name(saved_order)
-        self.order_combobox.setCurrentText(korean_order)
-        
-        self.max_subs_entry.setText(
-            self.db_manager.get_setting('last_max_subs', DEFAULT_SETTINGS['max_subs'])
-        )
-        self.min_views_entry.setText(
-            self.db_manager.get_setting('last_min_views', DEFAULT_SETTINGS['min_views'])
-        )
-        self.min_duration_entry.setText(
-            self.db_manager.get_setting('last_min_duration', DEFAULT_SETTINGS['min_duration'])
-        )
-        self.target_count_entry.setText(
-            self.db_manager.get_setting('last_target_count', DEFAULT_SETTINGS['target_count'])
-        )
+        for key in UI_SETTING_KEYS:
+            self._set_ui_setting(key, self.db_manager.get_setting(key, self._get_ui_setting_default(key)))
+        # What the widgets showed when loaded, so exit only saves what the user changed since
+        self.restored_ui_settings = self._get_ui_settings()
         
         self.sync_checkbox.blockSignals(True)
         self.sync_checkbox.setChecked(self.sync_enabled)
         self.sync_checkbox.blockSignals(False)
         
+        self.metrics_log_checkbox.blockSignals(True)
+        self.metrics_log_checkbox.setChecked(self.metrics_log_enabled)
+        self.metrics_log_checkbox.blockSignals(False)
+        
         self.update_sync_buttons_state()
 
+    def _get_ui_setting_default(self, key):
+        return DEFAULT_SETTINGS.get(key[len('last_'):], '')
+
+    def _get_ui_settings(self):
+        return {
+            'last_api_alias': self.api_key_combobox.currentText(),
+            'last_order': self._get_api_order_value(self.order_combobox.currentText()),
+            'last_max_subs': self.max_subs_entry.text(),
+            'last_min_views': self.min_views_entry.text(),
+            'last_min_duration': self.min_duration_entry.text(),
+            'last_target_count': self.target_count_entry.text(),
+            'last_ranking': self.ranking_combobox.currentText()
+        }
+
+    def _set_ui_setting(self, key, value):
+        if key == 'last_api_alias':
+            self.api_key_combobox.setCurrentText(value)
+        elif key == 'last_ranking':
+            self.ranking_combobox.setCurrentText(value)
+        elif key == 'last_order':
+            self.order_combobox.setCurrentText(self._get_korean_order_name(value))
+        else:
+            entries = {
+                'last_max_subs': self.max_subs_entry,
+                'last_min_views': self.min_views_entry,
+                'last_min_duration': self.min_duration_entry,
+                'last_target_count': self.target_count_entry
+            }
+            entries[key].setText(value)
+
     def _get_korean_order_name(self, api_value):
         for korean_name, api_val in ORDER_OPTIONS.items():
             if api_val == api_value:
@@ -280,9 +383,17 @@ class YoutubeAnalyzerApp(QMainWindow):
     def _get_api_order_value(self, korean_name):
         return ORDER_OPTIONS.get(korean_name, 'viewCount')
 
+    def toggle_metrics_log(self, checked):
+        self.metrics_log_enabled = checked
+        self.db_manager.set_setting('metrics_log_enabled', str(checked).lower())
+
     def toggle_sync(self, checked):
         self.sync_enabled = checked
         self.update_sync_buttons_state()
+        if checked:
+            self.schedule_autosync()
+        else:
+            self.sync_scheduler.mark_clean()
         if checked and not self.credentials_path:
             self.prompt_for_credentials()
 
@@ -359,78 +470,224 @@ class YoutubeAnalyzerApp(QMainWindow):
             )
             self.sync_checkbox.setChecked(False)
 
-    def run_sync(self, direction):
+    def _is_syncing(self):
+        return self.sync_worker is not None and self.sync_worker.isRunning()
+
+    def schedule_autosync(self):
+        if self.sync_enabled and self.db_manager.has_pending_changes():
+            self.sync_scheduler.mark_dirty()
+
+    def run_background_sync(self):
+        if self.closing or not self.sync_enabled or not self.credentials_path:
+            return
+        if self._is_syncing() or (self.worker and self.worker.isRunning()):
+            self.sync_scheduler.mark_dirty()
+            return
+        self.run_sync('upload', background=True)
+
+    def run_sync(self, direction, background=False):
+        if self.closing or self._is_syncing():
+            return
         if not self.credentials_path:
             self.prompt_for_credentials()
             if not self.sync_enabled:
                 return
         
-        self.search_button.setEnabled(False)
+        self.sync_in_background = background
+        if not background:
+            self.search_button.setEnabled(False)
         self.sync_worker = SyncWorker(direction, self.credentials_path)
         self.sync_worker.finished.connect(self.on_sync_finished)
+        self.sync_worker.transfer_progress.connect(self.on_sync_progress)
+        self.sync_worker.merged.connect(self.on_sync_merged)
         self.sync_worker.start()
         self.update_status_bar(f"Syncing with cloud... ({direction})")
 
+    @Slot(str, object, object, float)
+    def on_sync_progress(self, direction, done_bytes, total_bytes, bytes_per_second):
+        megabyte = 1024 * 1024
+        self.update_status_bar(
+            f"Syncing with cloud... ({direction}) "
+            f"{done_bytes / megabyte:.1f} / {total_bytes / megabyte:.1f} MB "
+            f"({bytes_per_second / megabyte:.2f} MB/s)"
+        )
+
+    @Slot(dict)
+    def on_sync_merged(self, summary):
+        self.excluded_filter.add(summary['excluded_added'])
+        self.results_view.remove_videos(summary['excluded_added'])
+        
+        if summary['api_keys_changed']:
+            current_alias = self.api_key_combobox.currentText()
+            self.api_keys = self.db_manager.get_api_keys()
+            self.api_key_combobox.clear()
+            self.api_key_combobox.addItems(self.api_keys.keys())
+            self.api_key_combobox.setCurrentText(current_alias)
+        
+        # Merged values replace the widgets the user has not edited since they were loaded;
+        # edited ones keep the user's value and win at exit
+        current_settings = self._get_ui_settings()
+        for key, value in summary['settings'].items():
+            if key not in UI_SETTING_KEYS:
+                continue
+            if value is None:
+                value = self._get_ui_setting_default(key)
+            if current_settings[key] == self.restored_ui_settings[key]:
+                self._set_ui_setting(key, value)
+                self.restored_ui_settings[key] = self._get_ui_settings()[key]
+
     @Slot(str, str)
     def on_sync_finished(self, status, message):
-        if status == "error":
+        if self.closing:
+            return
+        if status == "error" and self.sync_in_background:
+            self.update_status_bar(f"Background sync failed, will retry later: {message}", 5000)
+            self.sync_scheduler.mark_dirty()
+        elif status == "error":
             QMessageBox.critical(self, "Sync Error", message)
             self.sync_checkbox.setChecked(False)
             self.sync_enabled = False
         else:
-            if status == "success" and "downloaded" in message.lower():
+            if status == "success" and self.sync_worker.replaced_local_db:
                 self.refresh_app_data()
             else:
-                self.db_manager = DatabaseManager(DB_FILE)
-                self.load_settings()
-                self.restore_ui_state()
+                self.update_sync_buttons_state()
                 if status != "skip":
                     self.update_status_bar(message, 5000)
+            
+            if self.db_manager.has_pending_changes():
+                self.schedule_autosync()
+            else:
+                self.sync_scheduler.mark_clean()
         
         self.search_button.setEnabled(True)
         if status != "error":
             self.update_status_bar()
 
-    def save_settings_on_exit(self):
-        self.db_manager.set_setting('sync_enabled', str(self.sync_enabled))
+    def refresh_video_stats(self):
+        selected_alias = self.api_key_combobox.currentText()
+        if not selected_alias:
+            QMessageBox.critical(self, "Error", "Please select or add an API key to use.")
+            return
         
-        api_order_value = self._get_api_order_value(self.order_combobox.currentText())
+        quota_units = int(self.db_manager.get_setting('stats_refresh_quota', STATS_REFRESH_QUOTA_UNITS))
+        stale_before = (datetime.now(timezone.utc) - timedelta(hours=STATS_REFRESH_STALE_HOURS)).isoformat()
+        stale_count = self.db_manager.count_stale_videos(stale_before)
+        channel_stale_before = (datetime.now(timezone.utc) - 
+                                timedelta(hours=CHANNEL_REFRESH_STALE_HOURS)).isoformat()
+        stale_channel_count = self.db_manager.count_stale_channels(channel_stale_before)
+        if not stale_count and not stale_channel_count:
+            QMessageBox.information(self, "Refresh Video Stats", "All stored videos and channels are up to date.")
+            return
         
-        settings_to_save = {
-            'last_api_alias': self.api_key_combobox.currentText(),
-            'last_order': api_order_value,
-            'last_max_subs': self.max_subs_entry.text(),
-            'last_min_views': self.min_views_entry.text(),
-            'last_min_duration': self.min_duration_entry.text(),
-            'last_target_count': self.target_count_entry.text()
-        }
+        refresh_count = min(stale_count, quota_units * STATS_REFRESH_BATCH_SIZE)
+        reply = QMessageBox.question(
+            self, "Refresh Video Stats", 
+            f"{stale_count} videos have stats older than {STATS_REFRESH_STALE_HOURS} hours and "
+            f"{stale_channel_count} channels are older than {CHANNEL_REFRESH_STALE_HOURS} hours.\n"
+            f"Refresh {refresh_count} videos using about "
+            f"{math.ceil(refresh_count / STATS_REFRESH_BATCH_SIZE)} quota units, then the channels?", 
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.refresh_stats_button.setEnabled(False)
+        self.stats_refresh_messages = []
+        self._start_refresh_worker(BatchRefreshWorker(
+            VideoStatsRefresh(), DB_FILE, self.api_keys[selected_alias], quota_units, STATS_REFRESH_STALE_HOURS
+        ))
+
+    def _start_refresh_worker(self, worker):
+        self.stats_worker = worker
+        self.stats_worker.progress.connect(self.update_status_bar)
+        self.stats_worker.finished.connect(self.on_stats_refresh_finished)
+        self.stats_worker.start()
+
+    @Slot(str, str)
+    def on_stats_refresh_finished(self, status, message):
+        if self.closing:
+            return
+        if status == "error":
+            self.refresh_stats_button.setEnabled(True)
+            QMessageBox.critical(self, "Stats Refresh Error", message)
+            self.update_status_bar()
+            return
+        
+        self.stats_refresh_messages.append(message)
+        # Channels go second so channel ids backfilled by the video pass are picked up too
+        if isinstance(self.stats_worker.target, VideoStatsRefresh) and status != "partial":
+            channel_quota_units = int(self.db_manager.get_setting(
+                'channel_refresh_quota', CHANNEL_REFRESH_QUOTA_UNITS
+            ))
+            self._start_refresh_worker(BatchRefreshWorker(
+                ChannelStatsRefresh(), DB_FILE, self.stats_worker.api_key, channel_quota_units, 
+                CHANNEL_REFRESH_STALE_HOURS
+            ))
+            return
         
-        for key, value in settings_to_save.items():
-            self.db_manager.set_setting(key, value)
+        self.refresh_stats_button.setEnabled(True)
+        self.update_status_bar(" ".join(self.stats_refresh_messages), 10000)
+
+    def run_maintenance(self):
+        if self.closing or (self.maintenance_worker and self.maintenance_worker.isRunning()):
+            return
+        if self._is_syncing():
+            return
+        
+        self.maintenance_worker = MaintenanceWorker(DB_FILE, ARCHIVE_DIR, VACUUM_PAGES_PER_RUN)
+        self.maintenance_worker.finished.connect(self.on_maintenance_finished)
+        self.maintenance_worker.start()
+
+    @Slot(str, str)
+    def on_maintenance_finished(self, status, message):
+        if status == "error":
+            print(message)
+        elif status == "success":
+            self.update_status_bar(message, 5000)
+
+    def save_settings_on_exit(self):
+        self.db_manager.set_setting('sync_enabled', str(self.sync_enabled))
+        
+        # Unchanged widgets are not written back, so values merged from another device survive
+        for key, value in self._get_ui_settings().items():
+            if value != self.restored_ui_settings[key]:
+                self.db_manager.set_setting(key, value)
 
     def closeEvent(self, event):
-        self.save_settings_on_exit()
+        if not self.closing:
+            self.closing = True
+            self.save_settings_on_exit()
+            self.sync_scheduler.mark_clean()
+            self.maintenance_timer.stop()
+            self.thumbnail_loader.cancel_pending()
+            self.centralWidget().setEnabled(False)
+            for worker in self._running_workers():
+                worker.requestInterruption()
+        
+        # Destroying a running QThread aborts the app, so close again once they are done
+        if self._running_workers():
+            self.update_status_bar("Waiting for background tasks to finish...")
+            self.close_timer.start()
+            event.ignore()
+            return
         
-        if self.sync_enabled:
-            reply = QMessageBox.question(
-                self, "Exit and Upload", 
-                "Do you want to upload changes to cloud and exit?", 
-                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, 
-                QMessageBox.Save
-            )
-            
-            if reply == QMessageBox.Save:
-                self.update_status_bar("Uploading...")
-                QApplication.processEvents()
-                sync_worker = SyncWorker('upload', self.credentials_path)
-                sync_worker.run()
-                event.accept()
-            elif reply == QMessageBox.Cancel:
-                event.ignore()
-            else:
-                event.accept()
-        else:
-            event.accept()
+        if (not self.close_flush_started and self.sync_enabled and self.credentials_path and 
+                self.db_manager.has_pending_changes()):
+            self.close_flush_started = True
+            self.update_status_bar("Uploading pending changes...")
+            self.sync_worker = SyncWorker('upload', self.credentials_path, flush_only=True)
+            self.sync_worker.start()
+            self.close_timer.start()
+            event.ignore()
+            return
+        
+        self.excluded_filter.close()
+        event.accept()
+
+    def _running_workers(self):
+        workers = (self.worker, self.stats_worker, self.sync_worker, self.maintenance_worker)
+        return [worker for worker in workers if worker is not None and worker.isRunning()]
 
     def add_api_key(self):
         if not self._show_api_key_guide():
@@ -451,6 +708,7 @@ class YoutubeAnalyzerApp(QMainWindow):
             
             QMessageBox.information(self, "Success", f"'{alias}' has been successfully added.")
             self.update_status_bar()
+            self.schedule_autosync()
         else:
             QMessageBox.warning(self, "Duplicate Error", "Already registered API key or alias.")
 
@@ -526,6 +784,23 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         self._execute_search(params)
 
+    def add_to_watchlist(self):
+        keyword = self.keyword_entry.text().strip()
+        if not keyword:
+            QMessageBox.warning(self, "Input Error", "Please input search keyword.")
+            return
+        
+        params = self._prepare_search_params(self.api_key_combobox.currentText())
+        if not params:
+            return
+        
+        # Keys are picked per run by the scheduler, so none is stored with the watchlist
+        del params['api_key']
+        del params['api_key_alias']
+        params['keyword'] = keyword
+        self.db_manager.save_watchlist(keyword, params)
+        self.update_status_bar(f"'{keyword}' saved to watchlists. Run scheduler.py to process them.", 5000)
+
     def _prepare_search_params(self, selected_alias):
         try:
             is_shorts_search = self.shorts_only_checkbox.isChecked()
@@ -534,7 +809,8 @@ class YoutubeAnalyzerApp(QMainWindow):
             api_order_value = self._get_api_order_value(self.order_combobox.currentText())
             
             return {
-                "api_key": self.api_keys[selected_alias],
+                "api_key": self.api_keys.get(selected_alias),
+                "api_key_alias": selected_alias,
                 "keyword": self.last_used_keyword,
                 "order": api_order_value,
                 "max_subs": int(self.max_subs_entry.text()),
@@ -550,60 +826,96 @@ class YoutubeAnalyzerApp(QMainWindow):
     def _execute_search(self, params):
         self.search_button.setEnabled(False)
         self.save_results_button.setEnabled(False)
+        self.export_thumbnails_button.setEnabled(False)
         self.clear_results()
         
-        self.worker = Worker(params, self.used_video_ids)
+        self.worker = Worker(params)
         self.worker.progress.connect(self.update_status_bar)
         self.worker.result.connect(self.display_results)
+        self.worker.channels_fetched.connect(self.save_fetched_channels)
         self.worker.error.connect(self.show_error)
-        self.worker.finished.connect(lambda: self.search_button.setEnabled(True))
+        self.worker.finished.connect(self.on_search_finished)
         self.worker.start()
 
+    def on_search_finished(self):
+        self.search_button.setEnabled(True)
+        self.worker.metrics.save(self.db_manager, self.metrics_log_enabled)
+
+    @Slot(dict)
+    def save_fetched_channels(self, channels):
+        if channels:
+            self.db_manager.save_channel_stats(channels, datetime.now(timezone.utc).isoformat())
+
     @Slot(list)
     def display_results(self, videos):
         self.clear_results()
         
-        sorted_videos = sorted(videos, key=lambda x: x['view_velocity'], reverse=True)
+        sorted_videos = self._rank_videos(videos)
         self.last_results_data = sorted_videos
+        metrics = self.worker.metrics
         
         if not sorted_videos:
-            self.results_layout.addWidget(
-                QLabel("No videos found for the specified conditions.")
-            )
+            self.no_results_label.show()
+            self.update_status_bar(f"No videos found. {metrics.summary_text()}", 10000)
             return
         
-        self.db_manager.add_analyzed_videos(sorted_videos, self.last_used_keyword)
-        self.update_status_bar(f"{len(sorted_videos)} videos saved to DB!", 5000)
-        
-        for video_data in sorted_videos:
-            card = ResultCard(video_data)
-            card.exclude_requested.connect(self.exclude_video)
-            card.status_update.connect(self.update_status_bar)
-            self.results_layout.addWidget(card)
+        with metrics.span('db_write', len(sorted_videos)):
+            self.db_manager.add_analyzed_videos(sorted_videos, self.last_used_keyword)
+        self.schedule_autosync()
         
+        # repaint() draws the visible cards synchronously so the span covers the delegate painting
+        with metrics.span('render', len(sorted_videos)):
+            self.results_view.set_videos(sorted_videos)
+            self.results_view.viewport().repaint()
+        self.update_status_bar(
+            f"{len(sorted_videos)} videos saved to DB! {metrics.summary_text()}", 10000
+        )
         self.save_results_button.setEnabled(True)
+        self.export_thumbnails_button.setEnabled(True)
+
+    def _rank_videos(self, videos):
+        ranking_key = RANKING_OPTIONS.get(self.ranking_combobox.currentText(), 'view_velocity')
+        # Videos without a score (new channel, hidden subscribers) go last, by velocity
+        return sorted(
+            videos, 
+            key=lambda x: (x.get(ranking_key) is not None, x.get(ranking_key) or 0, x['view_velocity']), 
+            reverse=True
+        )
+
+    def rerank_results(self):
+        if not self.last_results_data:
+            return
+        
+        self.last_results_data = self._rank_videos(self.last_results_data)
+        self.results_view.set_videos(
+            [video for video in self.last_results_data if video['id'] not in self.excluded_filter]
+        )
 
     @Slot(str)
     def exclude_video(self, video_id):
-        if video_id not in self.used_video_ids:
-            self.db_manager.add_excluded_video(video_id)
-            self.used_video_ids.add(video_id)
-            
-            QMessageBox.information(
-                self, "Success", 
-                f"Video({video_id}) has been added to exclude list."
-            )
-            self.update_status_bar()
-            
-            for i in reversed(range(self.results_layout.count())):
-                widget = self.results_layout.itemAt(i).widget()
-                if (isinstance(widget, ResultCard) and 
-                    widget.video_data['id'] == video_id):
-                    widget.setParent(None)
-                    widget.deleteLater()
-                    break
-
-    def save_results_as_text(self):
+        self.exclude_videos([video_id])
+
+    def exclude_selected_videos(self):
+        self.exclude_videos(self.results_view.selected_video_ids())
+
+    def exclude_videos(self, video_ids):
+        video_ids = [video_id for video_id in video_ids if video_id not in self.excluded_filter]
+        if not video_ids:
+            return
+        
+        added_ids = self.db_manager.add_excluded_videos(video_ids)
+        self.excluded_filter.add(added_ids)
+        self.results_view.remove_videos(video_ids)
+        
+        if len(video_ids) == 1:
+            message = f"Video({video_ids[0]}) has been added to exclude list."
+        else:
+            message = f"{len(added_ids)} videos have been added to exclude list."
+        self.update_status_bar(message, 5000)
+        if added_ids:
+            self.schedule_autosync()
+
+    def save_results(self):
         if not self.last_results_data:
             QMessageBox.warning(self, "No Data to Save", "Please analyze data first.")
             return
@@ -611,14 +923,60 @@ class YoutubeAnalyzerApp(QMainWindow):
         default_filename = (f"AnalysisResult_{self.keyword_entry.text()}_"
                            f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
         
-        file_path, _ = QFileDialog.getSaveFileName(
+        export_formats = available_export_formats()
+        file_path, selected_filter = QFileDialog.getSaveFileName(
             self, "Save Results", default_filename, 
-            "Text Files (*.txt);;All Files (*)"
+            ";;".join(["Text Files (*.txt)", *export_formats.values(), "All Files (*)"])
         )
         
-        if file_path:
+        if not file_path:
+            return
+        
+        export_format = next(
+            (fmt for fmt, file_filter in export_formats.items() if file_filter == selected_filter), 
+            None
+        )
+        if export_format:
+            self._export_results_to_file(file_path, export_format)
+        else:
             self._write_results_to_file(file_path)
 
+    def _export_results_to_file(self, file_path, export_format):
+        if not file_path.lower().endswith(f".{export_format}"):
+            file_path = f"{os.path.splitext(file_path)[0]}.{export_format}"
+        
+        try:
+            export_chunks(
+                iter_dict_chunks(self.last_results_data, RESULT_EXPORT_COLUMNS), 
+                RESULT_EXPORT_COLUMNS, file_path, export_format
+            )
+            QMessageBox.information(
+                self, "Save Completed", 
+                f"Results have been successfully saved.\nPath: {file_path}"
+            )
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(
+                self, "Save Error", 
+                f"An error occurred while saving file: {e}"
+            )
+
+    def export_result_thumbnails(self):
+        items = [
+            {
+                'id': video['id'], 
+                'title': video['title'], 
+                'urls': thumbnail_candidate_urls(video['id'], video.get('thumbnail_full_url'))
+            }
+            for video in self.last_results_data if video['id'] not in self.excluded_filter
+        ]
+        if not items:
+            QMessageBox.warning(self, "No Data to Export", "Please analyze data first.")
+            return
+        
+        dialog = ThumbnailExportDialog(items, self)
+        if dialog.choose_target():
+            dialog.exec()
+
     def _write_results_to_file(self, file_path):
         try:
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -647,10 +1005,8 @@ class YoutubeAnalyzerApp(QMainWindow):
 
     def clear_results(self):
         self.last_results_data = []
-        while self.results_layout.count():
-            child = self.results_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self.no_results_label.hide()
+        self.results_view.clear()
 
     @Slot(str, int)
     def update_status_bar(self, message="", timeout=0):
@@ -662,7 +1018,7 @@ class YoutubeAnalyzerApp(QMainWindow):
                 
                 message = (f"Waiting... (API Keys: {len(self.api_keys)} / "
                           f"Analyzed Videos: {analyzed_count} / "
-                          f"Excluded Videos: {len(self.used_video_ids)})")
+                          f"Excluded Videos: {len(self.excluded_filter)})")
             except:
                 message = "Waiting..."
         
@@ -673,6 +1029,8 @@ class YoutubeAnalyzerApp(QMainWindow):
 
     @Slot(str)
     def show_error(self, error_message):
+        if self.closing:
+            return
         QMessageBox.critical(self, "Error Occurred", error_message)
         self.update_status_bar("Error occurred. Please try again.", 5000)
 
@@ -707,6 +1065,7 @@ class YoutubeAnalyzerApp(QMainWindow):
                 
                 QMessageBox.information(self, "Success", f"API key '{selected_alias}' has been deleted.")
                 self.update_status_bar()
+                self.schedule_autosync()
             else:
                 QMessageBox.warning(self, "Delete Error", "Failed to delete API key from database.")
 
@@ -727,8 +1086,8 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         reply = QMessageBox.question(
             self, "Refresh from Cloud", 
-            "This will download the latest database from cloud and refresh the app.\n"
-            "Any unsaved local changes will be lost.\n\n"
+            "This will download the latest changes from cloud and refresh the app.\n"
+            "Local changes that have not been uploaded yet are kept.\n\n"
             "Continue?", 
             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
         )
@@ -783,8 +1142,8 @@ class YoutubeAnalyzerApp(QMainWindow):
         
         reply = QMessageBox.question(
             self, "Upload to Cloud", 
-            "This will upload your current local database to cloud.\n"
-            "This will overwrite the existing cloud database.\n\n"
+            "This will upload your local changes to cloud.\n"
+            "If this device has never synced before, the cloud database will be overwritten.\n\n"
             "Continue?", 
             QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
         )
@@ -795,7 +1154,16 @@ class YoutubeAnalyzerApp(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = YoutubeAnalyzerApp()
+    try:
+        window = YoutubeAnalyzerApp()
+    except sqlite3.Error as e:
+        QMessageBox.critical(
+            None, "Database Error", 
+            f"Could not open or upgrade the database:\n{e}\n\n"
+            "The database file was left unchanged. Restore it from a backup or cloud sync, "
+            f"or move it aside to start with a new one:\n{DB_FILE}"
+        )
+        sys.exit(1)
     window.show()
     window.update_status_bar()
     sys.exit(app.exec()) 
\ No newline at end of file
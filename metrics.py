@@ -0,0 +1,73 @@
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from constants import METRICS_LOG_FILE
+
+STAGE_LABELS = {
+    'search': "search", 'videos': "videos", 'channels': "channels",
+    'filter': "filter", 'db_write': "DB write", 'render': "render"
+}
+
+
+class SearchMetrics:
+
+    def __init__(self, keyword='', api_key_alias=None):
+        self.run_id = uuid.uuid4().hex
+        self.keyword = keyword
+        self.api_key_alias = api_key_alias
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage, item_count=0, units_used=0):
+        # The caller may update 'item_count' / 'units_used' on the yielded span once known
+        span = {
+            'stage': stage, 'started_at': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': 0.0, 'item_count': item_count, 'units_used': units_used
+        }
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span['duration_ms'] = (time.perf_counter() - started) * 1000
+            self.spans.append(span)
+
+    def totals(self):
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span['stage'], {'duration_ms': 0.0, 'item_count': 0, 'units_used': 0, 'calls': 0})
+            total['duration_ms'] += span['duration_ms']
+            total['item_count'] += span['item_count']
+            total['units_used'] += span['units_used']
+            total['calls'] += 1
+        return totals
+
+    def summary_text(self):
+        totals = self.totals()
+        parts = []
+        for stage, label in STAGE_LABELS.items():
+            if stage not in totals:
+                continue
+            total = totals[stage]
+            text = f"{label} {total['duration_ms'] / 1000:.2f}s"
+            if total['units_used']:
+                text += f" ({total['units_used']}u)"
+            parts.append(text)
+        units = sum(total['units_used'] for total in totals.values())
+        return f"[{' · '.join(parts)} | {units} units]"
+
+    def save(self, db_manager, write_log=False):
+        db_manager.save_search_metrics(self.run_id, self.keyword, self.spans, self.api_key_alias)
+        if not write_log:
+            return
+
+        try:
+            with open(METRICS_LOG_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'run_id': self.run_id, 'keyword': self.keyword,
+                    'totals': self.totals(), 'spans': self.spans
+                }, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Could not write metrics log: {e}")
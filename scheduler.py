@@ -0,0 +1,171 @@
+import time
+import argparse
+from datetime import datetime, timezone, timedelta
+from googleapiclient.errors import HttpError
+
+from constants import (DB_FILE, API_DAILY_QUOTA_UNITS, WATCHLIST_WINDOW_START_HOUR,
+                       WATCHLIST_WINDOW_END_HOUR, WATCHLIST_FRESH_HOURS,
+                       WATCHLIST_DEFAULT_UNIT_ESTIMATE, WATCHLIST_POLL_SECONDS)
+from database import DatabaseManager
+from search import VideoSearch, is_quota_error
+from analytics import OutlierScores
+from dedup import TitleIndex
+from exclusions import ExclusionFilter
+
+# YouTube quota resets at midnight Pacific time; a fixed UTC-8 offset never
+# starts the new quota day before the real reset.
+QUOTA_RESET_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+def quota_day_start(now):
+    local_now = now.astimezone(QUOTA_RESET_TIMEZONE)
+    return local_now.replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc)
+
+
+class WatchlistScheduler:
+
+    def __init__(self, db_manager, log=print, api_base_url=''):
+        self.db_manager = db_manager
+        self.log = log
+        self.api_base_url = api_base_url
+        self.exhausted_keys = {}
+
+    def get_slot(self, index, count, now):
+        local_now = now.astimezone()
+        window_start = local_now.replace(
+            hour=WATCHLIST_WINDOW_START_HOUR, minute=0, second=0, microsecond=0
+        )
+        window_minutes = (WATCHLIST_WINDOW_END_HOUR - WATCHLIST_WINDOW_START_HOUR) * 60
+        return (window_start + timedelta(minutes=window_minutes * index / count)).astimezone(timezone.utc)
+
+    def get_due_watchlists(self, now):
+        watchlists = self.db_manager.get_watchlists()
+        last_runs = self.db_manager.get_last_watchlist_runs()
+
+        due = []
+        for index, watchlist in enumerate(watchlists):
+            slot = self.get_slot(index, len(watchlists), now)
+            last_run = last_runs.get(watchlist['id'])
+            if now >= slot and (not last_run or last_run['started_at'] < slot.isoformat()):
+                due.append(watchlist)
+        return due
+
+    def pick_api_key(self, estimate, now):
+        day_start = quota_day_start(now)
+        units_used = self.db_manager.get_units_used_since(day_start)
+
+        candidates = [
+            (units_used.get(alias, 0), alias, key)
+            for alias, key in self.db_manager.get_api_keys().items()
+            if self.exhausted_keys.get(alias) != day_start
+            and units_used.get(alias, 0) + estimate <= API_DAILY_QUOTA_UNITS
+        ]
+        if not candidates:
+            return None, None
+        _, alias, key = min(candidates)
+        return alias, key
+
+    def is_fresh(self, keyword, now):
+        latest = self.db_manager.get_latest_retrieval(keyword)
+        return latest is not None and latest >= (now - timedelta(hours=WATCHLIST_FRESH_HOURS)).isoformat()
+
+    def run_pending(self):
+        completed = 0
+        now = datetime.now(timezone.utc)
+        for watchlist in self.get_due_watchlists(now):
+            if self.run_watchlist(watchlist):
+                completed += 1
+        return completed
+
+    def run_watchlist(self, watchlist):
+        keyword = watchlist['keyword']
+        started_at = datetime.now(timezone.utc)
+
+        if self.is_fresh(keyword, started_at):
+            self.db_manager.record_watchlist_run(
+                watchlist['id'], None, started_at, started_at, 0, 0, 'skipped',
+                f"Data retrieved within the last {WATCHLIST_FRESH_HOURS} hours"
+            )
+            self.log(f"[{keyword}] Skipped: cached data is still fresh.")
+            return True
+
+        estimate = self.db_manager.get_average_watchlist_units(watchlist['id']) or WATCHLIST_DEFAULT_UNIT_ESTIMATE
+        alias, api_key = self.pick_api_key(estimate, started_at)
+        if not alias:
+            self.log(f"[{keyword}] Deferred: no API key has {int(estimate)} units left today.")
+            return False
+
+        # Opened per run: it is O(1) and picks up a filter file the GUI has rebuilt since
+        excluded_filter = ExclusionFilter(self.db_manager)
+        # Ranking reads channel baselines, so bring channels changed since the last run up to date
+        outlier_scores = OutlierScores(self.db_manager)
+        outlier_scores.refresh()
+        api_base_url = self.api_base_url or self.db_manager.get_setting('api_base_url', '')
+        search = VideoSearch(
+            dict(watchlist['params'], api_key=api_key, api_key_alias=alias, api_base_url=api_base_url),
+            excluded_filter,
+            title_index=TitleIndex(self.db_manager),
+            outlier_scores=outlier_scores
+        )
+        status, message, video_count = 'success', '', 0
+        try:
+            found_videos = search.run()
+            sorted_videos = sorted(found_videos, key=lambda x: x['view_velocity'], reverse=True)
+            with search.metrics.span('db_write', len(sorted_videos)):
+                self.db_manager.add_analyzed_videos(sorted_videos, keyword)
+            if search.channels:
+                self.db_manager.save_channel_stats(search.channels, datetime.now(timezone.utc).isoformat())
+            video_count = len(sorted_videos)
+        except HttpError as e:
+            status, message = 'error', f"API Error: {e}"
+            if is_quota_error(e):
+                self.exhausted_keys[alias] = quota_day_start(started_at)
+        except Exception as e:
+            status, message = 'error', f"Unknown Error: {e}"
+        finally:
+            excluded_filter.close()
+            search.metrics.save(
+                self.db_manager, 
+                self.db_manager.get_setting('metrics_log_enabled', 'false').lower() == 'true'
+            )
+
+        finished_at = datetime.now(timezone.utc)
+        self.db_manager.record_watchlist_run(
+            watchlist['id'], alias, started_at, finished_at, search.units_used, video_count, status, message
+        )
+        self.log(f"[{keyword}] {status}: {video_count} videos, {search.units_used} units "
+                 f"with '{alias}' in {(finished_at - started_at).total_seconds():.1f}s "
+                 f"{search.metrics.summary_text()} {message}".rstrip())
+        return True
+
+    def run_forever(self, poll_seconds=WATCHLIST_POLL_SECONDS):
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Watchlist scheduler error: {e}")
+            time.sleep(poll_seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run saved keyword watchlists without the GUI.")
+    parser.add_argument('--once', action='store_true', help="run due watchlists once and exit")
+    parser.add_argument('--poll', type=int, default=WATCHLIST_POLL_SECONDS, help="seconds between checks")
+    parser.add_argument('--api-base-url', default='', help="send API requests to this host instead of Google's")
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager(DB_FILE)
+    try:
+        scheduler = WatchlistScheduler(db_manager, api_base_url=args.api_base_url)
+        if args.once:
+            scheduler.run_pending()
+        else:
+            scheduler.run_forever(args.poll)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db_manager.conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+from datetime import datetime, timezone
+from googleapiclient.discovery import build
+from isodate import parse_duration
+
+from constants import THUMBNAIL_DISPLAY_SIZE, API_UNIT_COSTS, SEARCH_MAX_PAGES
+from metrics import SearchMetrics
+
+
+def build_youtube(api_key, base_url='', **kwargs):
+    # base_url points the client at another host serving the same API, e.g. a local fake server
+    client_options = {'api_endpoint': base_url} if base_url else None
+    return build("youtube", "v3", developerKey=api_key, client_options=client_options, **kwargs)
+
+
+def is_quota_error(error):
+    # Other 403s (disabled API, bad key restrictions) are real errors, not an empty quota
+    return error.resp.status == 403 and b'quota' in (error.content or b'').lower()
+
+
+def pick_thumbnail_url(thumbnails, min_width=0, min_height=0):
+    candidates = sorted(
+        (thumbnail for thumbnail in thumbnails.values() if thumbnail.get('url')),
+        key=lambda thumbnail: thumbnail.get('width', 0) * thumbnail.get('height', 0)
+    )
+    for thumbnail in candidates:
+        if thumbnail.get('width', 0) >= min_width and thumbnail.get('height', 0) >= min_height:
+            return thumbnail['url']
+    return candidates[-1]['url'] if candidates else None
+
+
+def largest_thumbnail_url(thumbnails):
+    return pick_thumbnail_url(thumbnails, float('inf'), float('inf'))
+
+
+def parse_channel_item(item):
+    statistics = item.get('statistics', {})
+    hidden_subscribers = statistics.get('hiddenSubscriberCount', False)
+    return {
+        'title': item.get('snippet', {}).get('title'),
+        'subscribers': None if hidden_subscribers else int(statistics.get('subscriberCount', 0)),
+        'video_count': int(statistics.get('videoCount', 0)),
+        'view_count': int(statistics.get('viewCount', 0))
+    }
+
+
+class VideoSearch:
+
+    def __init__(self, params, excluded_ids, progress=None, title_index=None, outlier_scores=None, 
+                 metrics=None, youtube=None, should_stop=None):
+        # excluded_ids is any container: a set, or an ExclusionFilter for large lists
+        self.params = params
+        self.excluded_ids = excluded_ids
+        self.progress = progress or (lambda message: None)
+        self.title_index = title_index
+        self.outlier_scores = outlier_scores
+        self.metrics = metrics or SearchMetrics(params['keyword'], params.get('api_key_alias'))
+        self.youtube = youtube
+        self.should_stop = should_stop
+        self.units_used = 0
+        self.channels = {}
+        self.cluster_representatives = {}
+
+    def _execute(self, request, method_name):
+        # Count the cost before executing: the API charges failed calls too
+        units = API_UNIT_COSTS[method_name]
+        self.units_used += units
+        with self.metrics.span(method_name.split('.')[0], units_used=units) as span:
+            response = request.execute()
+            span['item_count'] = len(response.get('items', []))
+        return response
+
+    def run(self):
+        youtube = self.youtube or build_youtube(self.params['api_key'], self.params.get('api_base_url', ''))
+        self.progress(f"Starting analysis with '{self.params['keyword']}' keyword... (Order: {self.params['order']})")
+
+        found_videos = []
+        next_page_token = None
+        searched_page_count = 0
+
+        while len(found_videos) < self.params['target_count'] and searched_page_count < SEARCH_MAX_PAGES:
+            # Checked once per page: a page is at most three API calls
+            if self.should_stop and self.should_stop():
+                break
+            searched_page_count += 1
+            self.progress(f"[Page {searched_page_count}] Searching...")
+
+            search_response = self._execute(youtube.search().list(
+                q=self.params['keyword'],
+                part="snippet",
+                type="video",
+                order=self.params['order'],
+                maxResults=50,
+                pageToken=next_page_token
+            ), 'search.list')
+
+            video_ids_to_check = [
+                item['id']['videoId']
+                for item in search_response.get('items', [])
+                if 'videoId' in item.get('id', {})
+                and item['id']['videoId'] not in self.excluded_ids
+            ]
+
+            if not video_ids_to_check:
+                next_page_token = search_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+                continue
+
+            video_response = self._execute(youtube.videos().list(
+                part="snippet,statistics,contentDetails",
+                id=",".join(video_ids_to_check)
+            ), 'videos.list')
+
+            valid_channel_ids = [
+                item.get('snippet', {}).get('channelId')
+                for item in video_response.get('items', [])
+                if item.get('snippet', {}).get('channelId')
+            ]
+
+            if not valid_channel_ids:
+                continue
+
+            channel_response = self._execute(youtube.channels().list(
+                part="snippet,statistics",
+                id=",".join(dict.fromkeys(valid_channel_ids))
+            ), 'channels.list')
+
+            page_channels = {
+                item['id']: parse_channel_item(item)
+                for item in channel_response.get('items', [])
+            }
+            self.channels.update(page_channels)
+            subscriber_counts = {
+                channel_id: channel['subscribers'] or 0
+                for channel_id, channel in page_channels.items()
+            }
+
+            with self.metrics.span('filter') as span:
+                channel_baselines = (
+                    self.outlier_scores.get_channel_baselines(page_channels) if self.outlier_scores else {}
+                )
+
+                for item in video_response.get('items', []):
+                    span['item_count'] += 1
+                    video_info = self._process_video_item(item, subscriber_counts, channel_baselines)
+                    if video_info and self._passes_filters(video_info) and not self._is_duplicate(video_info):
+                        found_videos.append(video_info)
+                        self.progress(f"-> Filter passed! '{video_info['title'][:30]}...'")
+
+                        if len(found_videos) >= self.params['target_count']:
+                            break
+
+                if self.title_index:
+                    self.title_index.commit()
+
+            if len(found_videos) >= self.params['target_count']:
+                break
+
+            next_page_token = search_response.get('nextPageToken')
+            if not next_page_token:
+                break
+
+        return found_videos
+
+    def _process_video_item(self, item, subscriber_counts, channel_baselines):
+        snippet = item.get('snippet', {})
+        stats = item.get('statistics', {})
+        details = item.get('contentDetails', {})
+        channel_id = snippet.get('channelId')
+
+        if not all([channel_id, snippet.get('publishedAt'), details.get('duration')]):
+            return None
+
+        subscriber_count = subscriber_counts.get(channel_id, 0)
+        view_count = int(stats.get('viewCount', 0))
+        duration_seconds = parse_duration(details.get('duration', 'PT0S')).total_seconds()
+        upload_date = datetime.fromisoformat(snippet.get('publishedAt').replace('Z', '+00:00'))
+
+        days_since_upload = (datetime.now(timezone.utc) - upload_date).days + 1
+        view_velocity = view_count / days_since_upload
+        baseline_velocity = channel_baselines.get(channel_id)
+        thumbnails = snippet.get('thumbnails', {})
+
+        return {
+            "id": item.get('id'),
+            "title": snippet.get('title', 'No Title'),
+            "channel": snippet.get('channelTitle', 'No Channel'),
+            "channel_id": channel_id,
+            "upload_date": upload_date.strftime("%Y-%m-%d"),
+            "views": view_count,
+            "subscribers": subscriber_count,
+            "duration": int(duration_seconds),
+            "url": f"https://www.youtube.com/watch?v={item.get('id')}",
+            "view_velocity": view_velocity,
+            "views_per_subscriber": view_count / subscriber_count if subscriber_count else None,
+            "channel_velocity_ratio": view_velocity / baseline_velocity if baseline_velocity else None,
+            "thumbnail_url": pick_thumbnail_url(thumbnails, *THUMBNAIL_DISPLAY_SIZE),
+            "thumbnail_full_url": largest_thumbnail_url(thumbnails)
+        }
+
+    def _is_duplicate(self, video_info):
+        if not self.title_index:
+            return False
+
+        # Only accepted videos are written to the index; rejected copies are never stored
+        cluster_id, entry = self.title_index.lookup(video_info['id'], video_info['title'])
+        if cluster_id in self.excluded_ids:
+            self.progress(f"-> Skipped near-duplicate of an excluded video: '{video_info['title'][:30]}...'")
+            return True
+
+        representative = self.cluster_representatives.get(cluster_id)
+        if representative:
+            representative['duplicate_count'] += 1
+            return True
+
+        self.title_index.add(video_info['id'], cluster_id, entry)
+        video_info['duplicate_count'] = 0
+        self.cluster_representatives[cluster_id] = video_info
+        return False
+
+    def _passes_filters(self, video_info):
+        if video_info['views'] < self.params['min_views']:
+            return False
+
+        if video_info['duration'] < self.params['min_duration']:
+            return False
+
+        if self.params['max_duration'] > 0 and video_info['duration'] > self.params['max_duration']:
+            return False
+
+        if self.params['max_subs'] >= 0 and video_info['subscribers'] > self.params['max_subs']:
+            return False
+
+        return True
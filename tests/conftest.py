@@ -0,0 +1,19 @@
+import pytest
+
+from database import DatabaseManager
+
+
+def make_video(video_id, **fields):
+    video = {
+        'id': video_id, 'title': f"Video {video_id}", 'channel': 'Channel', 'upload_date': '2026-01-01',
+        'views': 1000, 'subscribers': 100, 'duration': 60, 'view_velocity': 10.0, 'channel_id': 'UC1'
+    }
+    video.update(fields)
+    return video
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / 'app.db'))
+    yield db_manager
+    db_manager.conn.close()
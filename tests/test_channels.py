@@ -0,0 +1,17 @@
+from conftest import make_video
+
+
+def test_count_stale_channels_matches_stale_ids(db):
+    db.add_analyzed_videos([make_video(f"v{i}", channel_id=f"UC{i % 4}") for i in range(12)], 'cats')
+    db.save_channel_stats({
+        'UC0': {'title': 'Fresh', 'subscribers': 10, 'video_count': 1, 'view_count': 1},
+        'UC1': {'title': 'Old', 'subscribers': 10, 'video_count': 1, 'view_count': 1}
+    }, '2026-01-01T00:00:00+00:00')
+    db.conn.execute("UPDATE channels SET refreshed_at = '2020-01-01T00:00:00+00:00' WHERE id = 'UC1'")
+    db.conn.commit()
+    
+    stale_before = '2025-01-01T00:00:00+00:00'
+    stale_ids = db.get_stale_channel_ids(stale_before, -1)
+    assert sorted(stale_ids) == ['UC1', 'UC2', 'UC3']
+    assert db.count_stale_channels(stale_before) == len(stale_ids)
+    assert len(db.get_stale_channel_ids(stale_before, 2)) == 2
@@ -0,0 +1,58 @@
+from dedup import TitleIndex, minhash_signature, estimate_similarity
+from search import VideoSearch
+from conftest import make_video
+
+TITLE = "Funny cats compilation best moments of the year"
+
+
+def index_rows(db):
+    return db.conn.execute("SELECT video_id, cluster_id FROM video_clusters ORDER BY video_id").fetchall()
+
+
+def test_signature_tracks_title_similarity():
+    signature = minhash_signature(TITLE)
+    assert estimate_similarity(signature, minhash_signature(TITLE + " (reupload)")) == 1.0
+    assert estimate_similarity(signature, minhash_signature("Funny cats compilation best moments")) >= 0.6
+    assert estimate_similarity(signature, minhash_signature("How to cook pasta at home")) < 0.2
+    assert minhash_signature("!!!") is None
+
+
+def test_refresh_clusters_copies_and_resumes(db):
+    db.add_analyzed_videos([
+        make_video('a', title=TITLE), make_video('b', title=TITLE + " [HD]"),
+        make_video('c', title="How to cook pasta at home")
+    ] + [make_video(f"x{i}", title=f"Unrelated video number {i} about topic {i * 7}") for i in range(600)], 'k')
+    title_index = TitleIndex(db)
+    
+    checks = []
+    
+    def stop_after_first_batch():
+        checks.append(True)
+        return len(checks) > 1
+    
+    assert title_index.refresh(stop_after_first_batch) == 500
+    assert title_index.refresh() == 103
+    assert title_index.refresh() == 0
+    
+    clusters = dict(index_rows(db))
+    assert clusters['a'] == clusters['b'] == 'a'
+    assert clusters['c'] == 'c'
+
+
+def test_rejected_duplicates_are_not_indexed(db):
+    search = VideoSearch({'keyword': 'cats'}, set(), title_index=TitleIndex(db))
+    first = {'id': 'a', 'title': TITLE}
+    copy = {'id': 'b', 'title': TITLE + " (reupload)"}
+    
+    assert not search._is_duplicate(first)
+    assert search._is_duplicate(copy)
+    assert first['duplicate_count'] == 1
+    assert index_rows(db) == [('a', 'a')]
+
+
+def test_copies_of_excluded_videos_are_rejected(db):
+    TitleIndex(db).assign('a', TITLE)
+    search = VideoSearch({'keyword': 'cats'}, {'a'}, title_index=TitleIndex(db))
+    
+    assert search._is_duplicate({'id': 'b', 'title': TITLE + " [HD]"})
+    assert index_rows(db) == [('a', 'a')]
@@ -0,0 +1,36 @@
+from analytics import KeywordAnalytics
+from conftest import make_video
+
+
+def buckets(db):
+    KeywordAnalytics(db).refresh()
+    return {(keyword, video_count) for keyword, _, video_count in
+            db.conn.execute("SELECT search_keyword, week, video_count FROM keyword_weekly_stats")}
+
+
+def test_deleted_videos_leave_their_bucket(db):
+    db.add_analyzed_videos([make_video('v1'), make_video('v2')], 'cats')
+    assert buckets(db) == {('cats', 2)}
+    
+    db.delete_analyzed_videos(['v1'])
+    assert buckets(db) == {('cats', 1)}
+    db.conn.execute("DELETE FROM analyzed_videos")
+    assert buckets(db) == set()
+
+
+def test_video_found_again_moves_to_the_new_bucket(db):
+    db.add_analyzed_videos([make_video('v1'), make_video('v2')], 'cats')
+    assert buckets(db) == {('cats', 2)}
+    
+    db.add_analyzed_videos([make_video('v1')], 'dogs')
+    assert buckets(db) == {('cats', 1), ('dogs', 1)}
+    db.conn.execute("UPDATE analyzed_videos SET search_keyword = 'dogs' WHERE id = 'v2'")
+    assert buckets(db) == {('dogs', 2)}
+
+
+def test_archived_videos_leave_their_bucket(db, tmp_path):
+    db.add_analyzed_videos([make_video('v1'), make_video('v2')], 'cats')
+    assert buckets(db) == {('cats', 2)}
+    
+    db.archive_videos({'v1', 'v2'}, str(tmp_path / 'archive'))
+    assert buckets(db) == set()
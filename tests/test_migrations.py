@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+import database
+from database import DatabaseManager, MIGRATIONS
+
+# Schema written by the app before versioned migrations (user_version 0)
+BASELINE_SCHEMA = '''
+CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE api_keys (alias TEXT PRIMARY KEY, key TEXT UNIQUE);
+CREATE TABLE analyzed_videos (id TEXT PRIMARY KEY, title TEXT, channel TEXT, 
+                              upload_date TEXT, views INTEGER, subscribers INTEGER, 
+                              duration INTEGER, view_velocity REAL, retrieved_at TEXT, 
+                              search_keyword TEXT);
+CREATE TABLE excluded_videos (id TEXT PRIMARY KEY);
+INSERT INTO settings VALUES ('default_order', 'viewCount');
+INSERT INTO api_keys VALUES ('main', 'AIza-test');
+INSERT INTO analyzed_videos VALUES ('v1', 'First', 'Channel A', '2025-01-01T00:00:00Z', 1000, 50, 60, 
+                                    12.5, '2025-06-02T10:00:00+00:00', 'cats');
+INSERT INTO analyzed_videos VALUES ('v2', 'Second', 'Channel B', '2025-02-01T00:00:00Z', 500, 10, 30, 
+                                    3.0, '2025-06-03T10:00:00+00:00', 'dogs');
+INSERT INTO excluded_videos VALUES ('x1');
+'''
+
+
+def user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_baseline_database_migrates_to_latest(tmp_path):
+    db_path = str(tmp_path / 'baseline.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    
+    db = DatabaseManager(db_path)
+    
+    assert user_version(db.conn) == len(MIGRATIONS)
+    assert db.get_setting('default_order') == 'viewCount'
+    assert db.get_api_keys() == {'main': 'AIza-test'}
+    assert db.conn.execute("SELECT id, views, search_keyword FROM analyzed_videos ORDER BY id").fetchall() == [
+        ('v1', 1000, 'cats'), ('v2', 500, 'dogs')
+    ]
+    assert db.conn.execute("SELECT id FROM excluded_videos").fetchall() == [('x1',)]
+    # Backfilled derived tables pick up the existing rows
+    assert db.conn.execute("SELECT COUNT(*) FROM keyword_stats_dirty").fetchone()[0] == 2
+    assert db.conn.execute("SELECT COUNT(*) FROM outlier_dirty_channels").fetchone()[0] == 2
+    db.conn.close()
+
+
+@pytest.mark.parametrize('start_version', range(1, len(MIGRATIONS)))
+def test_every_schema_version_migrates_to_latest(tmp_path, monkeypatch, start_version):
+    db_path = str(tmp_path / 'app.db')
+    monkeypatch.setattr(database, 'MIGRATIONS', MIGRATIONS[:start_version])
+    DatabaseManager(db_path).conn.close()
+    monkeypatch.setattr(database, 'MIGRATIONS', MIGRATIONS)
+    
+    db = DatabaseManager(db_path)
+    assert user_version(db.conn) == len(MIGRATIONS)
+    db.conn.close()
+
+
+def test_failed_migration_raises_and_keeps_old_version(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'app.db')
+    DatabaseManager(db_path).conn.close()
+    
+    def broken_migration(cursor):
+        cursor.execute("CREATE TABLE broken_table (id TEXT)")
+        cursor.execute("SELECT missing_column FROM analyzed_videos")
+    
+    monkeypatch.setattr(database, 'MIGRATIONS', MIGRATIONS + [broken_migration])
+    with pytest.raises(sqlite3.Error):
+        DatabaseManager(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    assert user_version(conn) == len(MIGRATIONS)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'broken_table'").fetchone() is None
+    conn.close()
@@ -0,0 +1,72 @@
+from database import DatabaseManager, new_merge_summary
+from conftest import make_video
+
+OLD_RETRIEVAL = '2020-01-01T00:00:00+00:00'
+
+
+def add_old_and_new_videos(db, old_count=7, new_count=3):
+    db.add_analyzed_videos([make_video(f"old{i}") for i in range(old_count)], 'cats')
+    db.add_analyzed_videos([make_video(f"new{i}") for i in range(new_count)], 'cats')
+    db.conn.execute("UPDATE analyzed_videos SET retrieved_at = ? WHERE id LIKE 'old%'", (OLD_RETRIEVAL,))
+    db.conn.commit()
+    db.clear_pending_changes()
+
+
+def video_ids(db):
+    return {row[0] for row in db.conn.execute("SELECT id FROM analyzed_videos")}
+
+
+def test_archive_records_deletes(db, tmp_path):
+    add_old_and_new_videos(db)
+    
+    expired_ids = db.find_expired_video_ids({'*': {'days': 30, 'top_k': 0}})
+    assert db.archive_videos(expired_ids, str(tmp_path / 'archive'))
+    
+    _, changes = db.get_pending_changes()
+    assert {change['key'] for change in changes if change['op'] == 'delete'} == expired_ids
+    assert len(expired_ids) == 7
+
+
+def test_snapshot_merge_does_not_restore_archived_rows(db, tmp_path):
+    add_old_and_new_videos(db)
+    snapshot_path = str(tmp_path / 'before_archive.db')
+    db.create_snapshot(snapshot_path)
+    
+    expired_ids = db.find_expired_video_ids({'*': {'days': 30, 'top_k': 0}})
+    db.archive_videos(expired_ids, str(tmp_path / 'archive'))
+    db.merge_snapshot(snapshot_path, new_merge_summary())
+    
+    assert video_ids(db) == {'new0', 'new1', 'new2'}
+
+
+def test_merge_keeps_rows_retrieved_again_after_archiving(db, tmp_path):
+    add_old_and_new_videos(db)
+    db.archive_videos(db.find_expired_video_ids({'*': {'days': 30, 'top_k': 0}}), str(tmp_path / 'archive'))
+    
+    other = DatabaseManager(str(tmp_path / 'other.db'))
+    other.add_analyzed_videos([make_video('old0')], 'cats')
+    other.create_snapshot(str(tmp_path / 'other_snapshot.db'))
+    other.conn.close()
+    db.merge_snapshot(str(tmp_path / 'other_snapshot.db'), new_merge_summary())
+    
+    assert 'old0' in video_ids(db)
+
+
+def test_deltas_propagate_archive_and_are_not_reapplied(db, tmp_path):
+    add_old_and_new_videos(db)
+    # The rows as another device would still send them after the archive
+    db.record_changes(db.conn.cursor(), 'analyzed_videos', [f"old{i}" for i in range(7)], 'upsert')
+    _, old_changes = db.get_pending_changes()
+    db.clear_pending_changes()
+    
+    other = DatabaseManager(str(tmp_path / 'other.db'))
+    add_old_and_new_videos(other)
+    
+    db.archive_videos(db.find_expired_video_ids({'*': {'days': 30, 'top_k': 0}}), str(tmp_path / 'archive'))
+    _, archive_changes = db.get_pending_changes()
+    other.apply_changes(archive_changes)
+    assert video_ids(other) == {'new0', 'new1', 'new2'}
+    
+    assert db.apply_changes(old_changes) == 0
+    assert video_ids(db) == {'new0', 'new1', 'new2'}
+    other.conn.close()
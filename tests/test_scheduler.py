@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+from constants import API_DAILY_QUOTA_UNITS
+from metrics import SearchMetrics
+from scheduler import WatchlistScheduler
+
+
+def record_search(db, alias, units):
+    metrics = SearchMetrics('cats', alias)
+    with metrics.span('search', units_used=units):
+        pass
+    metrics.save(db)
+
+
+def test_pick_api_key_counts_gui_and_scheduler_searches(db):
+    db.add_api_key('gui', 'key-gui')
+    db.add_api_key('spare', 'key-spare')
+    record_search(db, 'gui', API_DAILY_QUOTA_UNITS - 50)
+    record_search(db, 'spare', 100)
+    record_search(db, None, 5000)
+    scheduler = WatchlistScheduler(db, log=lambda message: None)
+    now = datetime.now(timezone.utc)
+    
+    assert db.get_units_used_since(now.replace(hour=0, minute=0)) == {
+        'gui': API_DAILY_QUOTA_UNITS - 50, 'spare': 100
+    }
+    assert scheduler.pick_api_key(100, now) == ('spare', 'key-spare')
+    assert scheduler.pick_api_key(API_DAILY_QUOTA_UNITS, now) == (None, None)
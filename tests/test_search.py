@@ -0,0 +1,29 @@
+from search import VideoSearch
+from benchmarks.fake_youtube import SyntheticData, FakeYouTube
+
+PARAMS = {
+    'keyword': 'funny cat', 'order': 'viewCount', 'target_count': 10000, 'min_views': 0,
+    'min_duration': 0, 'max_duration': 0, 'max_subs': -1, 'api_key': 'test'
+}
+
+
+class CountingYouTube(FakeYouTube):
+    
+    def __init__(self, data):
+        super().__init__(data)
+        self.calls = []
+    
+    def respond(self, resource, kwargs):
+        self.calls.append(resource)
+        return super().respond(resource, kwargs)
+
+
+def test_search_stops_between_pages():
+    youtube = CountingYouTube(SyntheticData(pages_per_query=10))
+    
+    def stop_after_two_pages():
+        return youtube.calls.count('search') >= 2
+    
+    VideoSearch(dict(PARAMS), set(), youtube=youtube, should_stop=stop_after_two_pages).run()
+    assert youtube.calls.count('search') == 2
+    assert VideoSearch(dict(PARAMS), set(), youtube=youtube, should_stop=lambda: True).run() == []
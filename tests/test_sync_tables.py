@@ -0,0 +1,51 @@
+from database import DatabaseManager, new_merge_summary
+
+CHANNEL = {'title': 'Channel', 'subscribers': 10, 'video_count': 1, 'view_count': 1}
+
+
+def watchlist_keywords(db):
+    return {watchlist['keyword'] for watchlist in db.get_watchlists(enabled_only=False)}
+
+
+def send_changes(source, target):
+    _, changes = source.get_pending_changes()
+    source.clear_pending_changes()
+    return target.apply_changes(changes)
+
+
+def test_watchlists_and_channels_travel_in_deltas(db, tmp_path):
+    other = DatabaseManager(str(tmp_path / 'other.db'))
+    other.save_watchlist('local only', {})
+    db.save_watchlist('cats', {'min_views': 10})
+    db.save_channel_stats({'UC1': CHANNEL}, '2026-01-01T00:00:00+00:00', requested_ids=['UC1', 'UC2'])
+    
+    send_changes(db, other)
+    assert watchlist_keywords(other) == {'local only', 'cats'}
+    assert other.get_watchlists()[1]['params'] == {'min_views': 10}
+    assert other.conn.execute("SELECT id, subscribers FROM channels ORDER BY id").fetchall() == [
+        ('UC1', 10), ('UC2', None)
+    ]
+    
+    db.delete_watchlists(['cats'])
+    send_changes(db, other)
+    assert watchlist_keywords(other) == {'local only'}
+    other.conn.close()
+
+
+def test_merge_copies_watchlists_and_newer_channels(db, tmp_path):
+    db.save_watchlist('dogs', {})
+    db.save_channel_stats({'UC1': CHANNEL}, '2026-01-01T00:00:00+00:00')
+    
+    other = DatabaseManager(str(tmp_path / 'other.db'))
+    other.save_watchlist('cats', {})
+    other.save_watchlist('dogs', {'min_views': 5})
+    other.save_channel_stats({'UC1': dict(CHANNEL, subscribers=99)}, '2026-02-01T00:00:00+00:00')
+    other.create_snapshot(str(tmp_path / 'other_snapshot.db'))
+    other.conn.close()
+    db.merge_snapshot(str(tmp_path / 'other_snapshot.db'), new_merge_summary())
+    
+    watchlists = {watchlist['keyword']: watchlist for watchlist in db.get_watchlists()}
+    assert set(watchlists) == {'cats', 'dogs'}
+    assert watchlists['dogs']['params'] == {'min_views': 5}
+    assert len({watchlist['id'] for watchlist in watchlists.values()}) == 2
+    assert db.conn.execute("SELECT subscribers FROM channels WHERE id = 'UC1'").fetchone()[0] == 99
@@ -0,0 +1,59 @@
+from database import DatabaseManager, new_merge_summary
+from conftest import make_video
+
+CHANNEL = {'title': 'Channel', 'subscribers': 10, 'video_count': 1, 'view_count': 1}
+
+
+def keyword_weeks(db):
+    return set(db.conn.execute("SELECT search_keyword, week FROM keyword_stats_dirty"))
+
+
+def dirty_channels(db):
+    return {row[0] for row in db.conn.execute("SELECT channel_key FROM outlier_dirty_channels")}
+
+
+def upsert_change(video_id, **fields):
+    fields = dict({'retrieved_at': '2026-01-07T00:00:00+00:00', 'search_keyword': 'cats'}, **fields)
+    row = make_video(video_id, **fields)
+    return {'table': 'analyzed_videos', 'key': video_id, 'op': 'upsert', 'row': row,
+            'changed_at': row['retrieved_at']}
+
+
+def test_upserts_on_queued_rows_do_not_abort(db):
+    db.apply_changes([upsert_change('v1'), upsert_change('v2', channel_id='UC2')])
+    assert db.apply_changes([upsert_change('v1', views=2000), upsert_change('v2', views=3000)]) == 2
+    
+    assert keyword_weeks(db) == {('cats', '2026-01-05')}
+    assert dirty_channels(db) == {'UC1', 'UC2'}
+    assert db.conn.execute("SELECT views FROM analyzed_videos WHERE id = 'v2'").fetchone()[0] == 3000
+
+
+def test_update_queues_old_and_new_keys(db):
+    db.apply_changes([upsert_change('v1')])
+    db.apply_changes([upsert_change('v1', channel_id='UC9', search_keyword='dogs')])
+    
+    assert keyword_weeks(db) == {('cats', '2026-01-05'), ('dogs', '2026-01-05')}
+    assert dirty_channels(db) == {'UC1', 'UC9'}
+
+
+def test_repeated_channel_stats_do_not_abort(db):
+    db.save_channel_stats({'UC1': CHANNEL, 'UC2': CHANNEL}, '2026-01-01T00:00:00+00:00')
+    db.save_channel_stats({'UC1': dict(CHANNEL, subscribers=20), 'UC2': CHANNEL}, '2026-01-02T00:00:00+00:00',
+                          requested_ids=['UC1', 'UC2', 'UC3'])
+    
+    assert dirty_channels(db) == {'UC1', 'UC2', 'UC3'}
+    assert db.conn.execute("SELECT subscribers FROM channels WHERE id = 'UC1'").fetchone()[0] == 20
+
+
+def test_merge_snapshot_over_queued_rows(db, tmp_path):
+    db.add_analyzed_videos([make_video('v1'), make_video('v2')], 'cats')
+    
+    other = DatabaseManager(str(tmp_path / 'other.db'))
+    other.add_analyzed_videos([make_video('v1', views=5000), make_video('v3', channel_id='UC3')], 'cats')
+    other.create_snapshot(str(tmp_path / 'other_snapshot.db'))
+    other.conn.close()
+    db.merge_snapshot(str(tmp_path / 'other_snapshot.db'), new_merge_summary())
+    
+    assert db.conn.execute("SELECT views FROM analyzed_videos WHERE id = 'v1'").fetchone()[0] == 5000
+    assert dirty_channels(db) == {'UC1', 'UC3'}
+    assert {keyword for keyword, _ in keyword_weeks(db)} == {'cats'}
@@ -0,0 +1,59 @@
+from database import analyzed_videos_filter
+from analytics import OutlierScores
+from conftest import make_video
+
+COLUMNS = ['id', 'views_per_subscriber']
+
+
+def page(db, descending, limit=50, offset=0):
+    where_clause, params = analyzed_videos_filter()
+    return db.get_analyzed_videos_page(COLUMNS, where_clause, params, 'views_per_subscriber', descending,
+                                       limit, offset)
+
+
+def add_scored_and_unscored(db):
+    db.add_analyzed_videos([make_video('v1', views=1000), make_video('v2', views=2000)], 'cats')
+    OutlierScores(db).refresh()
+    db.add_analyzed_videos([make_video('v3', channel_id='UC2')], 'cats')
+
+
+def test_unscored_videos_are_counted_shown_and_sorted_last(db):
+    add_scored_and_unscored(db)
+    
+    total_rows, rows = page(db, descending=False)
+    assert total_rows == 3
+    assert rows == [('v1', 10.0), ('v2', 20.0), ('v3', None)]
+    assert [video_id for video_id, _ in page(db, descending=True)[1]] == ['v2', 'v1', 'v3']
+
+
+def test_score_pages_cross_into_unscored_videos(db):
+    add_scored_and_unscored(db)
+    db.add_analyzed_videos([make_video('v4', channel_id='UC3')], 'cats')
+    
+    pages = [page(db, descending=True, limit=2, offset=offset)[1] for offset in (0, 2)]
+    assert [video_id for video_id, _ in pages[0]] == ['v2', 'v1']
+    assert {video_id for video_id, _ in pages[1]} == {'v3', 'v4'}
+    assert page(db, descending=True, limit=2, offset=1)[1][0][0] == 'v1'
+
+
+def test_score_sort_walks_the_score_index(db):
+    add_scored_and_unscored(db)
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    page(db, descending=True, limit=1)
+    db.conn.set_trace_callback(None)
+    
+    scored_query = next(statement for statement in statements if 'CROSS JOIN' in statement)
+    plan = ' '.join(row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {scored_query}"))
+    assert 'idx_outlier_views_per_subscriber' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_page_slices_the_filtered_rows(db):
+    db.add_analyzed_videos([make_video(f"v{i}") for i in range(5)], 'cats')
+    db.add_analyzed_videos([make_video('d1')], 'dogs')
+    where_clause, params = analyzed_videos_filter('cat')
+    
+    total_rows, rows = db.get_analyzed_videos_page(['id'], where_clause, params, 'id', False, 2, 2)
+    assert total_rows == 5
+    assert rows == [('v2',), ('v3',)]
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import queue
+import itertools
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from PySide6.QtCore import Qt, QObject, Signal, QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QImageReader
+
+from constants import (THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_CACHE_BYTES, THUMBNAIL_DISK_CACHE_BYTES,
+                       THUMBNAIL_REVALIDATE_AFTER_DAYS, THUMBNAIL_REQUEST_TIMEOUT,
+                       THUMBNAIL_WORKER_COUNT)
+
+PRIORITY_VISIBLE = 0
+PRIORITY_NORMAL = 10
+
+
+def thumbnail_candidate_urls(video_id, preferred_url=None):
+    # Not every video has a maxres variant, so fall back to the always-present hq image
+    urls = [f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+            f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"]
+    if preferred_url and preferred_url not in urls:
+        urls.insert(0, preferred_url)
+    return urls
+
+
+def thumbnail_file_name(video_id, title):
+    safe_title = "".join(
+        c for c in (title or '') 
+        if c.isalnum() or c in " _-"
+    ).rstrip()
+    return f"{video_id}_{safe_title[:20]}.jpg"
+
+
+def decode_image(data, scaled_size=None):
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.ReadOnly)
+    
+    reader = QImageReader(buffer)
+    if scaled_size is not None:
+        source_size = reader.size()
+        if source_size.isValid():
+            # Let the decoder downscale while reading instead of scaling a full-size image later
+            reader.setScaledSize(source_size.scaled(scaled_size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class ThumbnailCache:
+    
+    def __init__(self, cache_dir, memory_limit_bytes, disk_limit_bytes):
+        self.cache_dir = cache_dir
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self.revalidate_after_seconds = THUMBNAIL_REVALIDATE_AFTER_DAYS * 24 * 60 * 60
+        
+        self._pixmaps = OrderedDict()
+        self._memory_usage = 0
+        self._lock = threading.Lock()
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_usage = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file()
+        )
+
+    def _cache_key(self, video_id, variant):
+        return f"{video_id}_{variant}"
+
+    def _pixmap_size(self, pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def get_pixmap(self, video_id, variant):
+        key = self._cache_key(video_id, variant)
+        with self._lock:
+            pixmap = self._pixmaps.get(key)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(key)
+            return pixmap
+
+    def put_pixmap(self, video_id, variant, pixmap):
+        key = self._cache_key(video_id, variant)
+        size = self._pixmap_size(pixmap)
+        if size > self.memory_limit_bytes:
+            return
+        
+        with self._lock:
+            previous = self._pixmaps.pop(key, None)
+            if previous is not None:
+                self._memory_usage -= self._pixmap_size(previous)
+            
+            self._pixmaps[key] = pixmap
+            self._memory_usage += size
+            
+            while self._memory_usage > self.memory_limit_bytes:
+                _, evicted = self._pixmaps.popitem(last=False)
+                self._memory_usage -= self._pixmap_size(evicted)
+
+    def _disk_paths(self, video_id, variant):
+        base_path = os.path.join(self.cache_dir, self._cache_key(video_id, variant))
+        return f"{base_path}.img", f"{base_path}.json"
+
+    def _miss_path(self, video_id, variant):
+        return os.path.join(self.cache_dir, self._cache_key(video_id, variant)) + '.miss'
+
+    def _read_misses(self, video_id, variant):
+        try:
+            with open(self._miss_path(video_id, variant), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def is_missing(self, video_id, variant, url):
+        missed_at = self._read_misses(video_id, variant).get(url)
+        return missed_at is not None and time.time() - missed_at < self.revalidate_after_seconds
+
+    def mark_missing(self, video_id, variant, url):
+        # Remembered per URL, so a video without maxres goes straight to the next candidate
+        miss_path = self._miss_path(video_id, variant)
+        with self._lock:
+            misses = self._read_misses(video_id, variant)
+            misses[url] = time.time()
+            old_size = os.path.getsize(miss_path) if os.path.exists(miss_path) else 0
+            try:
+                with open(miss_path, 'w', encoding='utf-8') as f:
+                    json.dump(misses, f)
+            except OSError:
+                return
+            self._disk_usage += os.path.getsize(miss_path) - old_size
+
+    def read_disk(self, video_id, variant):
+        image_path, meta_path = self._disk_paths(video_id, variant)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(image_path, 'rb') as f:
+                data = f.read()
+        except (OSError, json.JSONDecodeError):
+            return None, None
+        
+        os.utime(image_path)
+        return data, meta
+
+    def write_disk(self, video_id, variant, data, meta):
+        image_path, meta_path = self._disk_paths(video_id, variant)
+        old_size = sum(os.path.getsize(path) for path in (image_path, meta_path) if os.path.exists(path))
+        
+        try:
+            with open(image_path, 'wb') as f:
+                f.write(data)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError:
+            return
+        
+        new_size = os.path.getsize(image_path) + os.path.getsize(meta_path)
+        with self._lock:
+            self._disk_usage += new_size - old_size
+            over_limit = self._disk_usage > self.disk_limit_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(('.img', '.miss'))),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        target_usage = self.disk_limit_bytes * 0.9
+        
+        for entry in entries:
+            with self._lock:
+                if self._disk_usage <= target_usage:
+                    return
+            base_path = os.path.splitext(entry.path)[0]
+            for path in (base_path + '.img', base_path + '.json', base_path + '.miss'):
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    continue
+                with self._lock:
+                    self._disk_usage -= size
+
+    def fetch(self, video_id, variant, url, session=requests):
+        data, meta = self.read_disk(video_id, variant)
+        if data is not None and meta.get('url') == url:
+            if time.time() - meta.get('validated_at', 0) < self.revalidate_after_seconds:
+                return data
+        else:
+            data, meta = None, {}
+            if self.is_missing(video_id, variant, url):
+                return None
+        
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        
+        try:
+            response = session.get(url, headers=headers, timeout=THUMBNAIL_REQUEST_TIMEOUT)
+        except requests.RequestException:
+            return data
+        
+        if response.status_code == 304 and data is not None:
+            meta['validated_at'] = time.time()
+            self.write_disk(video_id, variant, data, meta)
+            return data
+        
+        if response.status_code in (404, 410) and data is None:
+            self.mark_missing(video_id, variant, url)
+            return None
+        
+        if response.status_code != 200:
+            return data
+        
+        self.write_disk(video_id, variant, response.content, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'validated_at': time.time()
+        })
+        return response.content
+
+
+class ThumbnailLoader(QObject):
+    
+    thumbnail_loaded = Signal(str, str, QImage)
+    thumbnail_failed = Signal(str, str)
+    
+    def __init__(self, thumbnail_cache, worker_count=THUMBNAIL_WORKER_COUNT, parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=worker_count, pool_maxsize=worker_count)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._queue = queue.PriorityQueue()
+        self._pending = {}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        
+        for _ in range(worker_count):
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+
+    def request(self, video_id, variant, url, priority=PRIORITY_NORMAL, scaled_size=None):
+        key = (video_id, variant)
+        with self._lock:
+            pending_priority = self._pending.get(key)
+            if pending_priority is not None and pending_priority <= priority:
+                return
+            self._pending[key] = priority
+        self._queue.put((priority, next(self._order), video_id, variant, url, scaled_size))
+
+    def prioritize(self, requests_by_id, variant, scaled_size=None):
+        for video_id, url in requests_by_id.items():
+            self.request(video_id, variant, url, PRIORITY_VISIBLE, scaled_size)
+
+    def cancel_pending(self):
+        with self._lock:
+            self._pending.clear()
+
+    def _worker_loop(self):
+        while True:
+            priority, _, video_id, variant, url, scaled_size = self._queue.get()
+            key = (video_id, variant)
+            with self._lock:
+                # Stale entry: cancelled, or re-queued with a higher priority
+                if self._pending.get(key) != priority:
+                    continue
+                self._pending[key] = -1
+            
+            image = QImage()
+            try:
+                data = self.thumbnail_cache.fetch(video_id, variant, url, self.session)
+                if data:
+                    image = decode_image(data, scaled_size)
+                loaded = not image.isNull()
+            except Exception:
+                loaded = False
+            
+            with self._lock:
+                self._pending.pop(key, None)
+            
+            if loaded:
+                self.thumbnail_loaded.emit(video_id, variant, image)
+            else:
+                self.thumbnail_failed.emit(video_id, variant)
+
+
+_thumbnail_cache = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(
+                THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_CACHE_BYTES, THUMBNAIL_DISK_CACHE_BYTES
+            )
+        return _thumbnail_cache
@@ -1,17 +1,25 @@
 import os
 import math
 import webbrowser
-import threading
+from datetime import datetime
 import qtawesome as qta
-import requests
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                                QPushButton, QTabWidget, QTableWidget, QTableWidgetItem, 
-                               QAbstractItemView, QMessageBox, QFrame, QFileDialog)
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QPixmap
+                               QAbstractItemView, QMessageBox, QFileDialog, QInputDialog,
+                               QListView, QStyledItemDelegate, QProgressBar, QStyle, QCheckBox)
+from PySide6.QtCore import (Qt, Signal, Slot, QTimer, QAbstractListModel, QModelIndex, 
+                            QRect, QPoint, QSize)
+from PySide6.QtGui import QPixmap, QImage, QPainter, QColor, QFont, QFontMetrics, QPen
 
-from constants import DB_FILE
-from database import DatabaseManager
+from constants import (DB_FILE, COLORS, THUMBNAIL_DISPLAY_VARIANT, THUMBNAIL_FULL_VARIANT,
+                       BREAKOUT_MAX_SUBSCRIBERS, BREAKOUT_MIN_VELOCITY_RATIO)
+from database import DatabaseManager, analyzed_videos_filter, analyzed_videos_order
+from workers import ThumbnailExportWorker, HistoryExportWorker
+from exporters import available_export_formats
+from analytics import KeywordAnalytics, OutlierScores
+from exclusions import ExclusionFilter
+from thumbnails import (get_thumbnail_cache, thumbnail_candidate_urls, thumbnail_file_name,
+                        PRIORITY_VISIBLE)
 
 
 class DBViewerDialog(QDialog):
@@ -23,6 +31,8 @@ class DBViewerDialog(QDialog):
         self.setStyleSheet(parent.styleSheet())
         
         self.db_manager = DatabaseManager(DB_FILE)
+        self.export_worker = None
+        self.is_exporting = False
         self._init_state_variables()
         self._setup_ui()
         self._connect_signals()
@@ -35,7 +45,8 @@ class DBViewerDialog(QDialog):
         self.current_sort_order = Qt.DescendingOrder
         self.column_map = {
             0: 'id', 1: 'search_keyword', 2: 'title', 
-            3: 'channel', 4: 'views', 5: 'upload_date', 6: 'retrieved_at'
+            3: 'channel', 4: 'views', 5: 'upload_date', 6: 'retrieved_at',
+            7: 'views_per_subscriber', 8: 'channel_velocity_ratio'
         }
 
     def _setup_ui(self):
@@ -53,6 +64,10 @@ class DBViewerDialog(QDialog):
         self.search_input.setPlaceholderText("Enter keyword to search and press Enter...")
         search_layout.addWidget(self.search_input)
         
+        self.collapse_checkbox = QCheckBox("Collapse near-duplicates")
+        self.collapse_checkbox.setToolTip("Show only the most viewed video of each group of near-identical titles")
+        search_layout.addWidget(self.collapse_checkbox)
+        
         parent_layout.addLayout(search_layout)
 
     def _create_tab_widget(self, parent_layout):
@@ -64,6 +79,22 @@ class DBViewerDialog(QDialog):
         
         self.excluded_table = self._create_table_widget(['Excluded Video ID'])
         self.tab_widget.addTab(self.excluded_table, "Excluded Videos")
+        
+        self.trends_table = self._create_table_widget([
+            'search_keyword', 'week', 'videos', 'median_velocity', 'p90_velocity', 
+            'hot_count', 'viral_count', 'wow_growth_%'
+        ])
+        self.tab_widget.addTab(self.trends_table, "Keyword Trends")
+        
+        self.breakout_table = self._create_table_widget([
+            'id', 'title', 'channel', 'subscribers', 'views', 'view_velocity', 'velocity_per_subscriber'
+        ])
+        self.tab_widget.addTab(self.breakout_table, "Breakout Videos")
+        
+        self.watchlist_table = self._create_table_widget([
+            'keyword', 'params', 'last_run', 'status', 'units_used', 'duration_s', 'videos'
+        ])
+        self.tab_widget.addTab(self.watchlist_table, "Watchlists")
 
     def _create_bottom_buttons(self, parent_layout):
         bottom_layout = QHBoxLayout()
@@ -75,15 +106,34 @@ class DBViewerDialog(QDialog):
         bottom_layout.addWidget(self.prev_button)
         bottom_layout.addWidget(self.page_label)
         bottom_layout.addWidget(self.next_button)
+        
+        self.notice_label = QLabel()
+        bottom_layout.addWidget(self.notice_label)
         bottom_layout.addStretch()
         
+        self.notice_timer = QTimer(self)
+        self.notice_timer.setSingleShot(True)
+        self.notice_timer.timeout.connect(self.notice_label.clear)
+        
+        exclude_button = QPushButton("Exclude Selected")
+        export_data_button = QPushButton("Export Data")
+        export_thumbnails_button = QPushButton("Export Thumbnails")
+        retention_button = QPushButton("Retention Rules")
         delete_button = QPushButton("Delete Selected")
         close_button = QPushButton("Close")
+        bottom_layout.addWidget(exclude_button)
+        bottom_layout.addWidget(export_data_button)
+        bottom_layout.addWidget(export_thumbnails_button)
+        bottom_layout.addWidget(retention_button)
         bottom_layout.addWidget(delete_button)
         bottom_layout.addWidget(close_button)
         
         parent_layout.addLayout(bottom_layout)
         
+        self.exclude_button = exclude_button
+        self.export_data_button = export_data_button
+        self.export_thumbnails_button = export_thumbnails_button
+        self.retention_button = retention_button
         self.delete_button = delete_button
         self.close_button = close_button
 
@@ -101,14 +151,21 @@ class DBViewerDialog(QDialog):
     def _connect_signals(self):
         self.tab_widget.currentChanged.connect(self.trigger_update)
         self.search_input.returnPressed.connect(self.trigger_update)
+        self.collapse_checkbox.toggled.connect(self.trigger_update)
         self.analyzed_table.horizontalHeader().sectionClicked.connect(self.on_header_clicked)
         self.prev_button.clicked.connect(self.go_to_previous_page)
         self.next_button.clicked.connect(self.go_to_next_page)
+        self.exclude_button.clicked.connect(self.exclude_selected_rows)
+        self.export_data_button.clicked.connect(self.export_data)
+        self.export_thumbnails_button.clicked.connect(self.export_thumbnails)
+        self.retention_button.clicked.connect(self.edit_retention_rules)
         self.delete_button.clicked.connect(self.delete_selected_rows)
         self.close_button.clicked.connect(self.accept)
         self.analyzed_table.cellDoubleClicked.connect(self.open_video_url)
+        self.breakout_table.cellDoubleClicked.connect(self.open_video_url)
 
     def trigger_update(self):
+        self.notice_label.clear()
         self.current_page = 1
         self.update_view()
 
@@ -139,39 +196,56 @@ class DBViewerDialog(QDialog):
             self.update_excluded_table()
             return
         
+        if current_table is self.trends_table:
+            self.update_trends_table()
+            return
+        
+        if current_table is self.breakout_table:
+            self.update_breakout_table()
+            return
+        
+        if current_table is self.watchlist_table:
+            self.update_watchlist_table()
+            return
+        
         self._update_analyzed_table()
 
+    def _get_query_filter(self):
+        where_clause, params = analyzed_videos_filter(
+            self.search_input.text().strip(), self.collapse_checkbox.isChecked()
+        )
+
+        return where_clause, params, analyzed_videos_order(*self._get_sort_order())
+
+    def _get_sort_order(self):
+        return (self.column_map.get(self.current_sort_column, 'retrieved_at'),
+                self.current_sort_order == Qt.DescendingOrder)
+
     def _update_analyzed_table(self):
-        search_term = self.search_input.text().strip()
-        where_clause = ""
-        params = []
+        where_clause, params, _ = self._get_query_filter()
         
-        if search_term:
-            where_clause = "WHERE search_keyword LIKE ?"
-            params.append(f"%{search_term}%")
-
-        order_by_column = self.column_map.get(self.current_sort_column, 'retrieved_at')
-        order_direction = "DESC" if self.current_sort_order == Qt.DescendingOrder else "ASC"
+        OutlierScores(self.db_manager).refresh()
         
-        cursor = self.db_manager.conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM analyzed_videos {where_clause}", params)
-        total_rows = cursor.fetchone()[0]
+        total_rows, rows = self.db_manager.get_analyzed_videos_page(
+            self.column_map.values(), where_clause, params, *self._get_sort_order(),
+            self.rows_per_page, (self.current_page - 1) * self.rows_per_page
+        )
         self.total_pages = math.ceil(total_rows / self.rows_per_page) or 1
-        
-        offset = (self.current_page - 1) * self.rows_per_page
-        query = f"""SELECT {', '.join(self.column_map.values())} FROM analyzed_videos
-                    {where_clause} ORDER BY {order_by_column} {order_direction}
-                    LIMIT ? OFFSET ?"""
-        params.extend([self.rows_per_page, offset])
-        cursor.execute(query, params)
 
         self.analyzed_table.setRowCount(0)
-        for row_idx, row_data in enumerate(cursor.fetchall()):
+        for row_idx, row_data in enumerate(rows):
             self.analyzed_table.insertRow(row_idx)
             for col_idx, cell_data in enumerate(row_data):
                 item = QTableWidgetItem(str(cell_data))
                 item.setToolTip("Double-click to watch video")
                 
+                if self.column_map[col_idx] in ('views_per_subscriber', 'channel_velocity_ratio'):
+                    item = QTableWidgetItem()
+                    if cell_data is None:
+                        item.setText("-")
+                    else:
+                        item.setData(Qt.DisplayRole, round(cell_data, 2))
+                
                 if self.column_map[col_idx] == 'views':
                     try: 
                         num_item = QTableWidgetItem()
@@ -187,6 +261,104 @@ class DBViewerDialog(QDialog):
         self.analyzed_table.resizeColumnsToContents()
         self.update_pagination_controls(total_rows)
 
+    def update_trends_table(self):
+        analytics = KeywordAnalytics(self.db_manager)
+        analytics.refresh()
+        
+        search_term = self.search_input.text().strip()
+        rows = analytics.get_weekly_trends(search_term, latest_only=not search_term)
+        
+        self.trends_table.setRowCount(len(rows))
+        for row_idx, row_data in enumerate(rows):
+            for col_idx, cell_data in enumerate(row_data):
+                item = QTableWidgetItem()
+                if isinstance(cell_data, float):
+                    item.setData(Qt.DisplayRole, round(cell_data, 1))
+                elif cell_data is None:
+                    item.setText("-")
+                else:
+                    item.setData(Qt.DisplayRole, cell_data)
+                self.trends_table.setItem(row_idx, col_idx, item)
+        
+        self.trends_table.resizeColumnsToContents()
+        self.update_pagination_controls(len(rows), is_excluded=True)
+        self.show_notice(
+            "Weekly history for matching keywords." if search_term 
+            else "Latest week per keyword. Enter a keyword to see its weekly history.", 0
+        )
+
+    def update_breakout_table(self):
+        rows = self.db_manager.find_breakout_videos(
+            BREAKOUT_MAX_SUBSCRIBERS, BREAKOUT_MIN_VELOCITY_RATIO
+        )
+        
+        self.breakout_table.setRowCount(len(rows))
+        for row_idx, row_data in enumerate(rows):
+            for col_idx, cell_data in enumerate(row_data):
+                item = QTableWidgetItem()
+                if isinstance(cell_data, float):
+                    item.setData(Qt.DisplayRole, round(cell_data, 2))
+                else:
+                    item.setData(Qt.DisplayRole, cell_data)
+                item.setToolTip("Double-click to watch video")
+                self.breakout_table.setItem(row_idx, col_idx, item)
+        
+        self.breakout_table.resizeColumnsToContents()
+        self.update_pagination_controls(len(rows), is_excluded=True)
+        self.show_notice(
+            f"Channels with at most {BREAKOUT_MAX_SUBSCRIBERS:,} subscribers whose videos gain "
+            f"{BREAKOUT_MIN_VELOCITY_RATIO:g}+ daily views per subscriber. "
+            "Use 'Refresh Video Stats' to fill in channel data.", 0
+        )
+
+    def update_watchlist_table(self):
+        watchlists = self.db_manager.get_watchlists(enabled_only=False)
+        last_runs = self.db_manager.get_last_watchlist_runs()
+        
+        self.watchlist_table.setRowCount(len(watchlists))
+        for row_idx, watchlist in enumerate(watchlists):
+            params = watchlist['params']
+            last_run = last_runs.get(watchlist['id'], {})
+            row_data = [
+                watchlist['keyword'],
+                f"order={params.get('order')}, target={params.get('target_count')}, "
+                f"min_views={params.get('min_views')}, max_subs={params.get('max_subs')}",
+                last_run.get('started_at', '-'),
+                last_run.get('status', 'pending'),
+                last_run.get('units_used'),
+                round(last_run['duration_seconds'], 1) if last_run else None,
+                last_run.get('video_count')
+            ]
+            for col_idx, cell_data in enumerate(row_data):
+                item = QTableWidgetItem()
+                if cell_data is None:
+                    item.setText("-")
+                else:
+                    item.setData(Qt.DisplayRole, cell_data)
+                self.watchlist_table.setItem(row_idx, col_idx, item)
+        
+        self.watchlist_table.resizeColumnsToContents()
+        self.update_pagination_controls(len(watchlists), is_excluded=True)
+        self.show_notice("Run 'python scheduler.py' to process watchlists in the background.", 0)
+
+    def show_notice(self, message, timeout=5000):
+        self.notice_label.setText(message)
+        if timeout > 0:
+            self.notice_timer.start(timeout)
+        else:
+            self.notice_timer.stop()
+
+    def _update_action_buttons(self):
+        current_table = self.tab_widget.currentWidget()
+        is_analyzed = current_table is self.analyzed_table
+        self.exclude_button.setEnabled(is_analyzed)
+        self.export_data_button.setEnabled(is_analyzed and not self.is_exporting)
+        is_report = current_table in (self.trends_table, self.breakout_table)
+        self.export_thumbnails_button.setEnabled(
+            current_table in (self.analyzed_table, self.excluded_table)
+        )
+        self.delete_button.setEnabled(not is_report)
+
     def update_excluded_table(self):
         self.excluded_table.setRowCount(0)
         cursor = self.db_manager.conn.cursor()
@@ -199,6 +371,7 @@ class DBViewerDialog(QDialog):
         self.update_pagination_controls(self.excluded_table.rowCount(), is_excluded=True)
 
     def update_pagination_controls(self, total_rows, is_excluded=False):
+        self._update_action_buttons()
         if is_excluded:
             self.page_label.setText(f"Total {total_rows} items")
             self.prev_button.hide()
@@ -230,152 +403,606 @@ class DBViewerDialog(QDialog):
             
             if current_table is self.excluded_table:
                 self.db_manager.delete_excluded_videos(ids_to_delete)
+            elif current_table is self.watchlist_table:
+                self.db_manager.delete_watchlists(ids_to_delete)
             else:
                 self.db_manager.delete_analyzed_videos(ids_to_delete)
             
             self.update_view()
             QMessageBox.information(self, "Complete", "Selected items have been deleted.")
     
+    def exclude_selected_rows(self):
+        selected_rows = {index.row() for index in self.analyzed_table.selectedIndexes()}
+        if not selected_rows:
+            self.show_notice("Please select videos to exclude.")
+            return
+        
+        video_ids = [self.analyzed_table.item(row, 0).text() for row in sorted(selected_rows)]
+        # Opened before the insert so the new ids can be added without a full rebuild
+        excluded_filter = ExclusionFilter(self.db_manager)
+        try:
+            added_ids = self.db_manager.add_excluded_videos(video_ids)
+            excluded_filter.add(added_ids)
+        finally:
+            excluded_filter.close()
+        self.show_notice(
+            f"{len(added_ids)} videos added to exclude list "
+            f"({len(video_ids) - len(added_ids)} already excluded)."
+        )
+
+    def export_data(self):
+        if self.is_exporting:
+            self.show_notice("An export is already in progress.")
+            return
+        
+        export_formats = available_export_formats()
+        default_filename = f"AnalyzedVideos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export DB History", default_filename, ";;".join(export_formats.values())
+        )
+        if not file_path:
+            return
+        
+        export_format = next(
+            (fmt for fmt, file_filter in export_formats.items() if file_filter == selected_filter), 
+            'csv'
+        )
+        if not file_path.lower().endswith(f".{export_format}"):
+            file_path += f".{export_format}"
+        
+        where_clause, params, order_clause = self._get_query_filter()
+        self.export_worker = HistoryExportWorker(
+            DB_FILE, where_clause, params, order_clause, file_path, export_format
+        )
+        self.export_worker.progress.connect(
+            lambda row_count: self.show_notice(f"Exporting... {row_count:,} rows written", 0)
+        )
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.is_exporting = True
+        self._update_action_buttons()
+        self.export_worker.start()
+
+    def on_export_finished(self, status, message):
+        self.is_exporting = False
+        self._update_action_buttons()
+        self.show_notice(message, 10000)
+        if status == "error":
+            QMessageBox.critical(self, "Export Error", message)
+
+    def done(self, result):
+        if self.export_worker and self.export_worker.isRunning():
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        super().done(result)
+
+    def export_thumbnails(self):
+        if self.tab_widget.currentWidget() is self.excluded_table:
+            rows = self.db_manager.conn.execute(
+                "SELECT id, NULL FROM excluded_videos ORDER BY rowid DESC"
+            )
+        else:
+            where_clause, params, order_clause = self._get_query_filter()
+            rows = self.db_manager.conn.execute(
+                f"SELECT id, title FROM analyzed_videos "
+                f"LEFT JOIN video_outlier_scores AS scores ON scores.video_id = analyzed_videos.id "
+                f"{where_clause} ORDER BY {order_clause}", 
+                params
+            )
+        
+        items = [
+            {'id': video_id, 'title': title, 'urls': thumbnail_candidate_urls(video_id)} 
+            for video_id, title in rows
+        ]
+        if not items:
+            QMessageBox.warning(self, "Notice", "There are no videos to export.")
+            return
+        
+        dialog = ThumbnailExportDialog(items, self)
+        if dialog.choose_target():
+            dialog.exec()
+
+    def edit_retention_rules(self):
+        keyword, ok = QInputDialog.getText(
+            self, "Retention Rules", 
+            "Keyword to configure (leave empty for the default rule):", 
+            text=self.search_input.text().strip()
+        )
+        if not ok:
+            return
+        
+        keyword = keyword.strip()
+        rules = self.db_manager.get_retention_rules()
+        rule = rules.get(keyword or '*', rules['*'])
+        
+        days, ok = QInputDialog.getInt(
+            self, "Retention Rules", 
+            "Keep videos retrieved within the last N days (0 = no limit):", 
+            int(rule.get('days', 0)), 0, 36500
+        )
+        if not ok:
+            return
+        
+        top_k, ok = QInputDialog.getInt(
+            self, "Retention Rules", 
+            "Keep only the top K videos by view velocity (0 = no limit):", 
+            int(rule.get('top_k', 0)), 0, 10000000
+        )
+        if not ok:
+            return
+        
+        self.db_manager.set_retention_rule(keyword, days, top_k)
+        QMessageBox.information(
+            self, "Saved", 
+            f"Retention rule for '{keyword or 'all keywords'}' has been saved.\n"
+            "Older videos will be moved to the archive during the next maintenance run."
+        )
+
     def open_video_url(self, row, column):
-        if self.tab_widget.currentWidget() is not self.analyzed_table:
+        current_table = self.tab_widget.currentWidget()
+        if current_table not in (self.analyzed_table, self.breakout_table):
             return
         
-        id_item = self.analyzed_table.item(row, 0)
+        id_item = current_table.item(row, 0)
         if id_item:
             webbrowser.open_new_tab(f"https://www.youtube.com/watch?v={id_item.text()}")
 
 
-class ResultCard(QFrame):
-    
-    exclude_requested = Signal(str)
-    status_update = Signal(str, int)
+class ThumbnailExportDialog(QDialog):
     
-    def __init__(self, video_data):
-        super().__init__()
-        self.video_data = video_data
-        self.setFrameShape(QFrame.StyledPanel)
-        self.setStyleSheet("QFrame { background-color: #353b48; border-radius: 8px; }")
+    def __init__(self, items, parent=None):
+        super().__init__(parent)
+        self.items = items
+        self.worker = None
+        self.setWindowTitle("Export Thumbnails")
+        self.setMinimumWidth(450)
+        self.setStyleSheet(parent.styleSheet())
         self._setup_ui()
-        self._load_thumbnail_async()
 
     def _setup_ui(self):
-        main_layout = QHBoxLayout(self)
-        main_layout.setContentsMargins(10, 10, 10, 10)
-        main_layout.setSpacing(15)
-        
-        self._create_thumbnail_section(main_layout)
-        self._create_info_section(main_layout)
-        self._create_button_section(main_layout)
-
-    def _create_thumbnail_section(self, main_layout):
-        self.thumbnail_label = QLabel("Loading...")
-        self.thumbnail_label.setFixedSize(160, 90)
-        self.thumbnail_label.setAlignment(Qt.AlignCenter)
-        self.thumbnail_label.setStyleSheet(
-            "background-color: #4a5160; border-radius: 4px; color: #a0a0a0;"
-        )
-        self.thumbnail_label.mousePressEvent = self.download_thumbnail
-        main_layout.addWidget(self.thumbnail_label)
-
-    def _create_info_section(self, main_layout):
-        info_layout = QVBoxLayout()
-        info_layout.setSpacing(5)
-        
-        title_text = (f"<a href='{self.video_data['url']}' "
-                     f"style='color: #e0e0e0; text-decoration: none;'>"
-                     f"<b>{self.video_data['title']}</b></a>")
-        title_label = QLabel(title_text)
-        title_label.setWordWrap(True)
-        title_label.setOpenExternalLinks(True)
-        
-        channel_label = QLabel(
-            f"<font color='#a0a0a0'>{self.video_data['channel']} "
-            f"({self.video_data['subscribers']:,} subscribers)</font>"
-        )
-        channel_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout = QVBoxLayout(self)
         
-        duration_min, duration_sec = divmod(self.video_data['duration'], 60)
-        meta_text = (f"<font color='#a0a0a0'>Views: {self.video_data['views']:,} / "
-                    f"Duration: {duration_min}m {duration_sec}s</font>")
-        meta_label = QLabel(meta_text)
-        meta_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.status_label = QLabel(f"Preparing to export {len(self.items)} thumbnails...")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
         
-        velocity_label = QLabel(
-            f"🔥 View velocity: {self.video_data['view_velocity']:.1f} "
-            f"({self.video_data['upload_date']})"
-        )
-        velocity_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        velocity_label.setStyleSheet("color: #5dade2;")
-        
-        info_layout.addWidget(title_label)
-        info_layout.addWidget(channel_label)
-        info_layout.addWidget(meta_label)
-        info_layout.addWidget(velocity_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, len(self.items))
+        layout.addWidget(self.progress_bar)
         
-        main_layout.addLayout(info_layout)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.reject)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
 
-    def _create_button_section(self, main_layout):
-        button_layout = QVBoxLayout()
-        button_layout.setSpacing(10)
-        button_width = 110
+    def choose_target(self):
+        message_box = QMessageBox(self)
+        message_box.setWindowTitle("Export Thumbnails")
+        message_box.setText(f"Export {len(self.items)} thumbnails as a ZIP archive or into a folder?")
+        zip_button = message_box.addButton("ZIP Archive", QMessageBox.AcceptRole)
+        folder_button = message_box.addButton("Folder", QMessageBox.AcceptRole)
+        message_box.addButton(QMessageBox.Cancel)
+        message_box.exec()
+        
+        if message_box.clickedButton() is zip_button:
+            target_path, _ = QFileDialog.getSaveFileName(
+                self, "Save Thumbnails", "thumbnails.zip", "ZIP Archive (*.zip)"
+            )
+            as_zip = True
+        elif message_box.clickedButton() is folder_button:
+            target_path = QFileDialog.getExistingDirectory(self, "Select Thumbnail Folder")
+            as_zip = False
+        else:
+            return False
+        
+        if not target_path:
+            return False
         
-        url_button = QPushButton(qta.icon('fa5s.link', color='white'), " Watch Video")
-        url_button.setFixedWidth(button_width)
-        url_button.clicked.connect(
-            lambda: webbrowser.open_new_tab(self.video_data['url'])
+        self.worker = ThumbnailExportWorker(self.items, target_path, as_zip)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.start()
+        return True
+
+    def on_progress(self, done_count, total_count, failed_count):
+        self.progress_bar.setValue(done_count)
+        self.status_label.setText(
+            f"Exported {done_count - failed_count} / {total_count} thumbnails "
+            f"({failed_count} failed)"
         )
+
+    def on_finished(self, status, message):
+        self.status_label.setText(message)
+        self.cancel_button.setText("Close")
+        self.cancel_button.clicked.disconnect()
+        self.cancel_button.clicked.connect(self.accept)
+        if status == "error":
+            QMessageBox.critical(self, "Export Error", message)
+
+    def reject(self):
+        if self.worker and self.worker.isRunning():
+            self.status_label.setText("Cancelling...")
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
+
+
+class ResultListModel(QAbstractListModel):
+    
+    VIDEO_ROLE = Qt.UserRole
+    THUMBNAIL_ROLE = Qt.UserRole + 1
+    THUMBNAIL_FAILED_ROLE = Qt.UserRole + 2
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.videos = []
+        self.row_by_id = {}
+        self.failed_thumbnails = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.videos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        video_data = self.videos[index.row()]
+        if role == Qt.DisplayRole or role == Qt.ToolTipRole:
+            return video_data['title']
+        if role == self.VIDEO_ROLE:
+            return video_data
+        if role == self.THUMBNAIL_ROLE:
+            return get_thumbnail_cache().get_pixmap(video_data['id'], THUMBNAIL_DISPLAY_VARIANT)
+        if role == self.THUMBNAIL_FAILED_ROLE:
+            return video_data['id'] in self.failed_thumbnails
+        return None
+
+    def set_videos(self, videos):
+        self.beginResetModel()
+        self.videos = list(videos)
+        self._rebuild_index()
+        self.failed_thumbnails = set()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_videos([])
+
+    def remove_videos(self, video_ids):
+        rows = sorted({self.row_by_id[video_id] for video_id in video_ids 
+                       if video_id in self.row_by_id}, reverse=True)
+        if not rows:
+            return
+        
+        # Remove contiguous runs from the bottom up so earlier row numbers stay valid
+        range_end = range_start = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == range_start - 1:
+                range_start = row
+                continue
+            
+            self.beginRemoveRows(QModelIndex(), range_start, range_end)
+            del self.videos[range_start:range_end + 1]
+            self.endRemoveRows()
+            if row is not None:
+                range_end = range_start = row
+        
+        self._rebuild_index()
+        self.failed_thumbnails.difference_update(video_ids)
+
+    def _rebuild_index(self):
+        self.row_by_id = {video_data['id']: row for row, video_data in enumerate(self.videos)}
+
+    def thumbnail_updated(self, video_id, failed=False):
+        row = self.row_by_id.get(video_id)
+        if row is None:
+            return
+        
+        if failed:
+            self.failed_thumbnails.add(video_id)
+        else:
+            self.failed_thumbnails.discard(video_id)
+        
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [self.THUMBNAIL_ROLE, self.THUMBNAIL_FAILED_ROLE])
+
+
+class ResultCardDelegate(QStyledItemDelegate):
+    
+    CARD_MARGIN = 10
+    THUMBNAIL_WIDTH = 160
+    THUMBNAIL_HEIGHT = 90
+    BUTTON_WIDTH = 110
+    BUTTON_HEIGHT = 32
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watch_icon = qta.icon('fa5s.link', color='white')
+        self.exclude_icon = qta.icon('fa5s.trash-alt', color='white')
+
+    def sizeHint(self, option, index):
+        minimum_width = self.THUMBNAIL_WIDTH + self.BUTTON_WIDTH + self.CARD_MARGIN * 2 + 200
+        return QSize(minimum_width, self.THUMBNAIL_HEIGHT + self.CARD_MARGIN * 2)
+
+    def card_regions(self, rect):
+        margin = self.CARD_MARGIN
+        thumbnail_rect = QRect(rect.left() + margin, rect.top() + margin, 
+                               self.THUMBNAIL_WIDTH, self.THUMBNAIL_HEIGHT)
+        watch_rect = QRect(rect.right() - margin - self.BUTTON_WIDTH, rect.top() + margin, 
+                           self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+        exclude_rect = watch_rect.translated(0, self.BUTTON_HEIGHT + margin)
+        
+        text_left = thumbnail_rect.right() + 15
+        text_rect = QRect(text_left, thumbnail_rect.top(), 
+                          max(watch_rect.left() - 15 - text_left, 0), self.THUMBNAIL_HEIGHT)
+        return {
+            'thumbnail': thumbnail_rect, 
+            'text': text_rect, 
+            'watch': watch_rect, 
+            'exclude': exclude_rect
+        }
+
+    def hit_test(self, rect, pos, option_font):
+        regions = self.card_regions(rect)
+        for name in ('thumbnail', 'watch', 'exclude'):
+            if regions[name].contains(pos):
+                return name
+        
+        title_rect = QRect(regions['text'])
+        title_rect.setHeight(QFontMetrics(option_font).height())
+        if title_rect.contains(pos):
+            return 'title'
+        return None
+
+    def paint(self, painter, option, index):
+        video_data = index.data(ResultListModel.VIDEO_ROLE)
+        regions = self.card_regions(option.rect)
+        
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(QPen(QColor(COLORS['accent']), 2))
+        else:
+            painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(COLORS['widget_bg']))
+        painter.drawRoundedRect(option.rect.adjusted(1, 1, -1, -1), 8, 8)
+        painter.setPen(Qt.NoPen)
+        
+        self._paint_thumbnail(painter, option, index, regions['thumbnail'])
+        self._paint_text(painter, option, video_data, regions['text'])
+        self._paint_button(painter, option, regions['watch'], self.watch_icon, 
+                           "Watch Video", COLORS['accent'])
+        self._paint_button(painter, option, regions['exclude'], self.exclude_icon, 
+                           "Exclude", '#e74c3c')
+        painter.restore()
+
+    def _paint_thumbnail(self, painter, option, index, rect):
+        pixmap = index.data(ResultListModel.THUMBNAIL_ROLE)
+        if pixmap is not None:
+            scaled_size = pixmap.size().scaled(rect.size(), Qt.KeepAspectRatio)
+            target_rect = QRect(QPoint(0, 0), scaled_size)
+            target_rect.moveCenter(rect.center())
+            painter.drawPixmap(target_rect, pixmap)
+            return
         
-        exclude_button = QPushButton(qta.icon('fa5s.trash-alt', color='white'), " Exclude")
-        exclude_button.setFixedWidth(button_width)
-        exclude_button.setStyleSheet("background-color: #e74c3c;")
-        exclude_button.clicked.connect(
-            lambda: self.exclude_requested.emit(self.video_data['id'])
+        painter.setBrush(QColor(COLORS['input_bg']))
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setPen(QColor(COLORS['text_dim']))
+        placeholder = ("No\nImage" if index.data(ResultListModel.THUMBNAIL_FAILED_ROLE) 
+                       else "Loading...")
+        painter.drawText(rect, Qt.AlignCenter, placeholder)
+
+    def _paint_text(self, painter, option, video_data, rect):
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        line_height = QFontMetrics(option.font).height() + 5
+        duration_min, duration_sec = divmod(video_data['duration'], 60)
+        
+        velocity_text = f"🔥 View velocity: {video_data['view_velocity']:.1f} ({video_data['upload_date']})"
+        if video_data.get('channel_velocity_ratio'):
+            velocity_text += f" · {video_data['channel_velocity_ratio']:.1f}x channel median"
+        if video_data.get('duplicate_count'):
+            velocity_text += f" · +{video_data['duplicate_count']} similar"
+        
+        lines = [
+            (title_font, COLORS['text'], video_data['title']),
+            (option.font, COLORS['text_dim'], 
+             f"{video_data['channel']} ({video_data['subscribers']:,} subscribers)"),
+            (option.font, COLORS['text_dim'], 
+             f"Views: {video_data['views']:,} / Duration: {duration_min}m {duration_sec}s"),
+            (option.font, COLORS['accent'], velocity_text)
+        ]
+        
+        for line_index, (font, color, text) in enumerate(lines):
+            line_rect = QRect(rect.left(), rect.top() + line_index * line_height, 
+                              rect.width(), line_height)
+            painter.setFont(font)
+            painter.setPen(QColor(color))
+            painter.drawText(line_rect, Qt.AlignLeft | Qt.AlignVCenter, 
+                             QFontMetrics(font).elidedText(text, Qt.ElideRight, rect.width()))
+
+    def _paint_button(self, painter, option, rect, icon, text, color):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(rect, 4, 4)
+        
+        button_font = QFont(option.font)
+        button_font.setBold(True)
+        painter.setFont(button_font)
+        painter.setPen(QColor('#ffffff'))
+        
+        icon_rect = QRect(rect.left() + 10, rect.center().y() - 7, 14, 14)
+        icon.paint(painter, icon_rect)
+        painter.drawText(rect.adjusted(icon_rect.width() + 14, 0, 0, 0), 
+                         Qt.AlignCenter, text)
+
+
+class ResultListView(QListView):
+    
+    exclude_requested = Signal(str)
+    status_update = Signal(str, int)
+    
+    def __init__(self, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.result_model = ResultListModel(self)
+        self.card_delegate = ResultCardDelegate(self)
+        self.pending_downloads = {}
+        
+        self.setModel(self.result_model)
+        self.setItemDelegate(self.card_delegate)
+        self.setUniformItemSizes(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setSpacing(5)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setMouseTracking(True)
+        
+        self.visible_thumbnail_timer = QTimer(self)
+        self.visible_thumbnail_timer.setSingleShot(True)
+        self.visible_thumbnail_timer.setInterval(100)
+        self.visible_thumbnail_timer.timeout.connect(self.request_visible_thumbnails)
+        
+        self.verticalScrollBar().valueChanged.connect(
+            lambda _: self.visible_thumbnail_timer.start()
         )
+        self.result_model.modelReset.connect(self.visible_thumbnail_timer.start)
+        self.result_model.rowsRemoved.connect(self.visible_thumbnail_timer.start)
+        self.thumbnail_loader.thumbnail_loaded.connect(self.on_thumbnail_loaded)
+        self.thumbnail_loader.thumbnail_failed.connect(self.on_thumbnail_failed)
+
+    def set_videos(self, videos):
+        self.thumbnail_loader.cancel_pending()
+        self.pending_downloads = {}
+        self.result_model.set_videos(videos)
+
+    def clear(self):
+        self.set_videos([])
+
+    def remove_videos(self, video_ids):
+        self.result_model.remove_videos(video_ids)
+
+    def selected_video_ids(self):
+        return [index.data(ResultListModel.VIDEO_ROLE)['id'] 
+                for index in self.selectionModel().selectedIndexes()]
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.visible_thumbnail_timer.start()
+
+    def _visible_rows(self):
+        first_index = self.indexAt(QPoint(0, 0))
+        if not first_index.isValid():
+            first_index = self.indexAt(QPoint(0, self.spacing() * 2))
+        if not first_index.isValid():
+            return []
+        
+        rows = []
+        viewport_height = self.viewport().height()
+        for row in range(first_index.row(), self.result_model.rowCount()):
+            if self.visualRect(self.result_model.index(row)).top() > viewport_height:
+                break
+            rows.append(row)
+        return rows
+
+    def request_visible_thumbnails(self):
+        visible_requests = {}
+        for row in self._visible_rows():
+            index = self.result_model.index(row)
+            video_data = index.data(ResultListModel.VIDEO_ROLE)
+            if (index.data(ResultListModel.THUMBNAIL_ROLE) is None and 
+                    not index.data(ResultListModel.THUMBNAIL_FAILED_ROLE)):
+                if video_data.get('thumbnail_url'):
+                    visible_requests[video_data['id']] = video_data['thumbnail_url']
+                else:
+                    self.result_model.thumbnail_updated(video_data['id'], failed=True)
+        
+        ratio = self.devicePixelRatioF()
+        scaled_size = QSize(round(ResultCardDelegate.THUMBNAIL_WIDTH * ratio), 
+                            round(ResultCardDelegate.THUMBNAIL_HEIGHT * ratio))
+        self.thumbnail_loader.prioritize(visible_requests, THUMBNAIL_DISPLAY_VARIANT, scaled_size)
+
+    @Slot(str, str, QImage)
+    def on_thumbnail_loaded(self, video_id, variant, image):
+        if variant == THUMBNAIL_FULL_VARIANT:
+            self._save_downloaded_thumbnail(video_id, image)
+            return
         
-        button_layout.addWidget(url_button)
-        button_layout.addWidget(exclude_button)
-        button_layout.addStretch()
+        get_thumbnail_cache().put_pixmap(video_id, variant, QPixmap.fromImage(image))
+        self.result_model.thumbnail_updated(video_id)
+
+    @Slot(str, str)
+    def on_thumbnail_failed(self, video_id, variant):
+        if variant == THUMBNAIL_FULL_VARIANT:
+            if self.pending_downloads.pop(video_id, None):
+                self.status_update.emit("Error: Failed to download thumbnail.", 5000)
+            return
         
-        main_layout.addLayout(button_layout)
+        self.result_model.thumbnail_updated(video_id, failed=True)
 
-    def _load_thumbnail_async(self):
-        threading.Thread(target=self._load_thumbnail, daemon=True).start()
+    def _hit_test(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return None, None
+        return index, self.card_delegate.hit_test(self.visualRect(index), pos, self.font())
 
-    def _load_thumbnail(self):
-        try:
-            response = requests.get(self.video_data['thumbnail_url'], stream=True)
-            if response.status_code == 200:
-                self.pixmap = QPixmap()
-                self.pixmap.loadFromData(response.content)
-                self.thumbnail_label.setPixmap(
-                    self.pixmap.scaled(160, 90, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                )
-                self.thumbnail_label.setToolTip("Click to download thumbnail")
-                self.thumbnail_label.setCursor(Qt.PointingHandCursor)
-        except Exception:
-            self.thumbnail_label.setText("No\nImage")
-
-    def download_thumbnail(self, event):
-        if not hasattr(self, 'pixmap'):
-            self.status_update.emit("Thumbnail image not yet loaded.", 3000)
+    def mouseMoveEvent(self, event):
+        _, region = self._hit_test(event.position().toPoint())
+        self.viewport().setCursor(Qt.PointingHandCursor if region else Qt.ArrowCursor)
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        index, region = self._hit_test(event.position().toPoint())
+        if event.button() != Qt.LeftButton or region is None:
+            super().mouseReleaseEvent(event)
             return
         
-        safe_title = "".join(
-            c for c in self.video_data['title'] 
-            if c.isalnum() or c in " _-"
-        ).rstrip()
+        video_data = index.data(ResultListModel.VIDEO_ROLE)
+        if region in ('title', 'watch'):
+            webbrowser.open_new_tab(video_data['url'])
+        elif region == 'exclude':
+            self.exclude_requested.emit(video_data['id'])
+        elif region == 'thumbnail':
+            self.download_thumbnail(index)
+
+    def download_thumbnail(self, index):
+        video_data = index.data(ResultListModel.VIDEO_ROLE)
+        full_url = video_data.get('thumbnail_full_url') or video_data.get('thumbnail_url')
+        if not full_url:
+            self.status_update.emit("No thumbnail available for this video.", 3000)
+            return
         
-        default_filename = f"{self.video_data['id']}_{safe_title[:20]}.jpg"
+        default_filename = thumbnail_file_name(video_data['id'], video_data['title'])
         
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Save Thumbnail", default_filename, "JPEG Image (*.jpg)"
         )
         
         if file_path:
-            try:
-                self.pixmap.save(file_path, "JPG", 95)
-                self.status_update.emit(
-                    f"Success: {os.path.basename(file_path)} saved!", 5000
-                )
-            except Exception as e:
-                self.status_update.emit(f"Error: Failed to save thumbnail - {e}", 5000) 
\ No newline at end of file
+            self.pending_downloads[video_data['id']] = file_path
+            self.status_update.emit("Downloading full-resolution thumbnail...", 0)
+            self.thumbnail_loader.request(
+                video_data['id'], THUMBNAIL_FULL_VARIANT, full_url, PRIORITY_VISIBLE
+            )
+
+    def _save_downloaded_thumbnail(self, video_id, image):
+        file_path = self.pending_downloads.pop(video_id, None)
+        if not file_path:
+            return
+        
+        try:
+            # The loader just cached the original file; saving those bytes avoids a lossy re-encode
+            data, _ = get_thumbnail_cache().read_disk(video_id, THUMBNAIL_FULL_VARIANT)
+            if data is not None:
+                with open(file_path, 'wb') as f:
+                    f.write(data)
+            elif not image.save(file_path, "JPG", 95):
+                raise IOError("could not write image file")
+            self.status_update.emit(
+                f"Success: {os.path.basename(file_path)} saved!", 5000
+            )
+        except Exception as e:
+            self.status_update.emit(f"Error: Failed to save thumbnail - {e}", 5000)
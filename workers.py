@@ -1,105 +1,71 @@
 import os
+import io
+import gzip
 import json
-from datetime import datetime, timezone
-from PySide6.QtCore import QThread, Signal
+import uuid
+import shutil
+import time
+import random
+import hashlib
+import sqlite3
+import zipfile
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone, timedelta
+import httplib2
+import requests
+from requests.adapters import HTTPAdapter
+from PySide6.QtCore import QObject, QThread, QTimer, Signal
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload, MediaIoBaseDownload
 from googleapiclient.errors import HttpError
-from isodate import parse_duration
 
-from constants import DB_FILE, SCOPES
-from database import DatabaseManager
+from constants import (DB_FILE, SCOPES, SYNC_COMPACT_THRESHOLD, SNAPSHOT_COPY_BUFFER,
+                       SYNC_CHUNK_SIZE_MB, SYNC_MAX_RETRIES,
+                       THUMBNAIL_FULL_VARIANT, THUMBNAIL_EXPORT_WORKER_COUNT, EXPORT_CHUNK_SIZE,
+                       STATS_REFRESH_BATCH_SIZE, STATS_REFRESH_WORKER_COUNT, 
+                       STATS_REFRESH_WRITE_BATCHES)
+from database import DatabaseManager, new_merge_summary
+from exporters import export_chunks, ExportCancelled
+from analytics import KeywordAnalytics, OutlierScores
+from dedup import TitleIndex
+from exclusions import ExclusionFilter
+from metrics import SearchMetrics
+from search import VideoSearch, build_youtube, is_quota_error, parse_channel_item
+from thumbnails import thumbnail_file_name, get_thumbnail_cache
 
 
 class Worker(QThread):    
     progress = Signal(str)
     result = Signal(list)
+    channels_fetched = Signal(dict)
     error = Signal(str)
     finished = Signal()
     
-    def __init__(self, params, used_video_ids):
+    def __init__(self, params):
         super().__init__()
         self.params = params
-        self.used_video_ids = used_video_ids
+        self.metrics = SearchMetrics(params['keyword'], params.get('api_key_alias'))
 
     def run(self):
+        db_manager = None
+        excluded_filter = None
         try:
-            youtube = build("youtube", "v3", developerKey=self.params['api_key'])
-            self.progress.emit(f"Starting analysis with '{self.params['keyword']}' keyword... (Order: {self.params['order']})")
-            
-            found_videos = []
-            next_page_token = None
-            searched_page_count = 0
-            
-            while len(found_videos) < self.params['target_count'] and searched_page_count < 20:
-                searched_page_count += 1
-                self.progress.emit(f"[Page {searched_page_count}] Searching...")
-                
-                search_response = youtube.search().list(
-                    q=self.params['keyword'], 
-                    part="snippet", 
-                    type="video", 
-                    order=self.params['order'], 
-                    maxResults=50, 
-                    pageToken=next_page_token
-                ).execute()
-                
-                video_ids_to_check = [
-                    item['id']['videoId'] 
-                    for item in search_response.get('items', []) 
-                    if 'videoId' in item.get('id', {}) 
-                    and item['id']['videoId'] not in self.used_video_ids
-                ]
-                
-                if not video_ids_to_check:
-                    next_page_token = search_response.get('nextPageToken')
-                    if not next_page_token:
-                        break
-                    continue
-                
-                video_response = youtube.videos().list(
-                    part="snippet,statistics,contentDetails", 
-                    id=",".join(video_ids_to_check)
-                ).execute()
-                
-                valid_channel_ids = [
-                    item.get('snippet', {}).get('channelId') 
-                    for item in video_response.get('items', []) 
-                    if item.get('snippet', {}).get('channelId')
-                ]
-                
-                if not valid_channel_ids:
-                    continue
-                
-                channel_response = youtube.channels().list(
-                    part="statistics", 
-                    id=",".join(valid_channel_ids)
-                ).execute()
-                
-                subscriber_counts = {
-                    item['id']: int(item['statistics'].get('subscriberCount', 0)) 
-                    for item in channel_response.get('items', [])
-                }
-                
-                for item in video_response.get('items', []):
-                    video_info = self._process_video_item(item, subscriber_counts)
-                    if video_info and self._passes_filters(video_info):
-                        found_videos.append(video_info)
-                        self.progress.emit(f"-> Filter passed! '{video_info['title'][:30]}...'")
-                        
-                        if len(found_videos) >= self.params['target_count']:
-                            break
-                
-                if len(found_videos) >= self.params['target_count']:
-                    break
-                
-                next_page_token = search_response.get('nextPageToken')
-                if not next_page_token:
-                    break
-                
+            db_manager = DatabaseManager(DB_FILE)
+            excluded_filter = ExclusionFilter(db_manager)
+            outlier_scores = OutlierScores(db_manager)
+            outlier_scores.refresh()
+            params = dict(self.params, api_base_url=db_manager.get_setting('api_base_url', ''))
+            search = VideoSearch(
+                params, excluded_filter, self.progress.emit, TitleIndex(db_manager), outlier_scores, 
+                self.metrics, should_stop=self.isInterruptionRequested
+            )
+            found_videos = search.run()
+            self.channels_fetched.emit(search.channels)
             self.result.emit(found_videos)
             
         except HttpError as e:
@@ -107,63 +73,26 @@ class Worker(QThread):
         except Exception as e:
             self.error.emit(f"Unknown Error: {e}")
         finally:
+            if excluded_filter:
+                excluded_filter.close()
+            if db_manager:
+                db_manager.conn.close()
             self.finished.emit()
 
-    def _process_video_item(self, item, subscriber_counts):
-        snippet = item.get('snippet', {})
-        stats = item.get('statistics', {})
-        details = item.get('contentDetails', {})
-        channel_id = snippet.get('channelId')
-        
-        if not all([channel_id, snippet.get('publishedAt'), details.get('duration')]):
-            return None
-        
-        subscriber_count = subscriber_counts.get(channel_id, 0)
-        view_count = int(stats.get('viewCount', 0))
-        duration_seconds = parse_duration(details.get('duration', 'PT0S')).total_seconds()
-        upload_date = datetime.fromisoformat(snippet.get('publishedAt').replace('Z', '+00:00'))
-        
-        days_since_upload = (datetime.now(timezone.utc) - upload_date).days + 1
-        view_velocity = view_count / days_since_upload
-        
-        return {
-            "id": item.get('id'),
-            "title": snippet.get('title', 'No Title'),
-            "channel": snippet.get('channelTitle', 'No Channel'),
-            "upload_date": upload_date.strftime("%Y-%m-%d"),
-            "views": view_count,
-            "subscribers": subscriber_count,
-            "duration": int(duration_seconds),
-            "url": f"https://www.youtube.com/watch?v={item.get('id')}",
-            "view_velocity": view_velocity,
-            "thumbnail_url": snippet.get('thumbnails', {}).get('high', {}).get('url')
-        }
-
-    def _passes_filters(self, video_info):    
-        if video_info['views'] < self.params['min_views']:
-            return False
-        
-        if video_info['duration'] < self.params['min_duration']:
-            return False
-        
-        if self.params['max_duration'] > 0 and video_info['duration'] > self.params['max_duration']:
-            return False
-        
-        if self.params['max_subs'] >= 0 and video_info['subscribers'] > self.params['max_subs']:
-            return False
-        
-        return True
-
 
 class SyncWorker(QThread):
     
     finished = Signal(str, str)
+    transfer_progress = Signal(str, object, object, float)
+    merged = Signal(dict)
     
-    def __init__(self, direction, credentials_path):
+    def __init__(self, direction, credentials_path, flush_only=False):
         super().__init__()
         self.direction = direction
         self.credentials_path = credentials_path
+        self.flush_only = flush_only
         self.db_manager = None
+        self.replaced_local_db = False
     
     def get_credentials(self):
     
@@ -180,6 +109,9 @@ class SyncWorker(QThread):
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 creds.refresh(Request())
+            elif self.flush_only:
+                # Never open a browser sign-in while the app is closing
+                return None
             else:
                 if not os.path.exists(self.credentials_path):
                     raise FileNotFoundError(
@@ -201,67 +133,878 @@ class SyncWorker(QThread):
                 return
             
             self.db_manager = DatabaseManager(DB_FILE)
+            if self.direction == 'upload' and not self._has_local_changes():
+                self.finished.emit("skip", "No local changes to upload.")
+                return
+            
             creds = self.get_credentials()
+            if creds is None:
+                self.finished.emit("skip", "Not signed in; pending changes are kept for the next sync.")
+                return
             service = build('drive', 'v3', credentials=creds)
             
-            db_filename = os.path.basename(DB_FILE)
-            response = service.files().list(
-                q=f"name='{db_filename}' and trashed=false", 
-                spaces='drive', 
-                fields='files(id, name, modifiedTime)'
-            ).execute()
-            
-            files = response.get('files', [])
+            base_file, delta_files = self._list_sync_files(service)
             
             if self.direction == 'download':
-                self._handle_download(service, files)
+                self._handle_download(service, base_file, delta_files)
             elif self.direction == 'upload':
-                self._handle_upload(service, files)
+                self._handle_upload(service, base_file, delta_files)
                 
         except FileNotFoundError as e:
             self.finished.emit("error", str(e))
         except Exception as e:
             self.finished.emit("error", f"Sync error occurred: {e}")
 
-    def _handle_download(self, service, files):
-        if not files:
-            self._handle_upload(service, files)
+    def _has_local_changes(self):
+        return (self.db_manager.get_setting('sync_generation') is None or 
+                self.db_manager.has_pending_changes())
+
+    def _list_sync_files(self, service):
+        db_filename = os.path.basename(DB_FILE)
+        query = (
+            f"((name='{db_filename}.gz' or name='{db_filename}') or "
+            "(appProperties has { key='kind' and value='delta' } and "
+            f"appProperties has {{ key='db' and value='{db_filename}' }})) and trashed=false"
+        )
+        
+        files = []
+        page_token = None
+        while True:
+            response = service.files().list(
+                q=query, 
+                spaces='drive', 
+                orderBy='createdTime', 
+                pageToken=page_token, 
+                fields='nextPageToken, files(id, name, size, md5Checksum, modifiedTime, createdTime, appProperties)'
+            ).execute()
+            files.extend(response.get('files', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        
+        delta_files = [f for f in files if (f.get('appProperties') or {}).get('kind') == 'delta']
+        base_files = sorted(
+            [f for f in files if (f.get('appProperties') or {}).get('kind') != 'delta'], 
+            key=lambda f: not f['name'].endswith('.gz')
+        )
+        return (base_files[0] if base_files else None), delta_files
+
+    def _filter_generation(self, delta_files, generation):
+        return [
+            f for f in delta_files 
+            if (f.get('appProperties') or {}).get('generation') == generation
+        ]
+
+    def _get_generation(self, base_file):
+        return (base_file.get('appProperties') or {}).get('generation', '0')
+
+    def _get_device_id(self):
+        device_id = self.db_manager.get_setting('sync_device_id')
+        if not device_id:
+            device_id = uuid.uuid4().hex
+            self.db_manager.set_setting('sync_device_id', device_id)
+        return device_id
+
+    def _is_base_changed(self, base_file):
+        return (
+            self._get_generation(base_file) != self.db_manager.get_setting('sync_generation') or
+            base_file.get('md5Checksum') != self.db_manager.get_setting('sync_base_md5') or
+            base_file.get('modifiedTime') != self.db_manager.get_setting('sync_base_modified')
+        )
+
+    def _remember_base(self, db_manager, base_file):
+        db_manager.set_setting('sync_generation', self._get_generation(base_file))
+        db_manager.set_setting('sync_base_md5', base_file.get('md5Checksum', ''))
+        db_manager.set_setting('sync_base_modified', base_file.get('modifiedTime', ''))
+        db_manager.set_setting('sync_applied_deltas', '[]')
+
+    def _create_temp_path(self, suffix):
+        db_dir = os.path.dirname(os.path.abspath(DB_FILE))
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f"{os.path.basename(DB_FILE)}.", suffix=suffix, dir=db_dir
+        )
+        os.close(fd)
+        return temp_path
+
+    def _remove_temp_files(self, *paths):
+        for path in paths:
+            try:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _get_chunk_size(self):
+        try:
+            chunk_size_mb = max(1, int(self.db_manager.get_setting('sync_chunk_size_mb', SYNC_CHUNK_SIZE_MB)))
+        except ValueError:
+            chunk_size_mb = SYNC_CHUNK_SIZE_MB
+        return chunk_size_mb * 1024 * 1024
+
+    def _load_transfer_session(self, key):
+        session_json = self.db_manager.get_setting(key)
+        if not session_json:
+            return None
+        try:
+            return json.loads(session_json)
+        except json.JSONDecodeError:
+            return None
+
+    def _save_transfer_session(self, key, session):
+        self.db_manager.set_setting(key, json.dumps(session))
+
+    def _discard_transfer_session(self, key, keep_file=False):
+        session = self._load_transfer_session(key)
+        if session and not keep_file:
+            self._remove_temp_files(session.get('path'))
+        self.db_manager.set_setting(key, '')
+
+    def _emit_transfer_progress(self, direction, done_bytes, total_bytes, started_at, start_bytes):
+        elapsed = time.monotonic() - started_at
+        bytes_per_second = (done_bytes - start_bytes) / elapsed if elapsed > 0 else 0.0
+        self.transfer_progress.emit(direction, done_bytes, total_bytes, bytes_per_second)
+
+    def _file_md5(self, path):
+        digest = hashlib.md5()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(SNAPSHOT_COPY_BUFFER), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _create_compressed_snapshot(self):
+        snapshot_path = self._create_temp_path('.snapshot')
+        compressed_path = self._create_temp_path('.snapshot.gz')
+        try:
+            self.db_manager.create_snapshot(snapshot_path)
+            with open(snapshot_path, 'rb') as src, open(compressed_path, 'wb') as dst:
+                with gzip.GzipFile(filename='', mode='wb', fileobj=dst, mtime=0) as gz:
+                    shutil.copyfileobj(src, gz, SNAPSHOT_COPY_BUFFER)
+        except Exception:
+            self._remove_temp_files(compressed_path)
+            raise
+        finally:
+            self._remove_temp_files(snapshot_path)
+        return compressed_path
+
+    def _restore_snapshot_file(self, download_path, restored_path):
+        with open(download_path, 'rb') as f:
+            is_gzip = f.read(2) == b'\x1f\x8b'
+        
+        source = gzip.open(download_path, 'rb') if is_gzip else open(download_path, 'rb')
+        with source, open(restored_path, 'wb') as dst:
+            shutil.copyfileobj(source, dst, SNAPSHOT_COPY_BUFFER)
+        
+        conn = sqlite3.connect(restored_path)
+        try:
+            check_result = conn.execute("PRAGMA quick_check").fetchone()
+        finally:
+            conn.close()
+        if not check_result or check_result[0] != 'ok':
+            raise sqlite3.DatabaseError("Downloaded DB snapshot failed the integrity check.")
+
+    def _handle_download(self, service, base_file, delta_files):
+        if not base_file:
+            self._handle_upload(service, base_file, delta_files)
             return
         
-        cloud_file = files[0]
-        local_token = self.db_manager.get_setting('google_auth_token')
+        summary = new_merge_summary()
+        downloaded_base = self._is_base_changed(base_file)
+        if downloaded_base:
+            self._download_base(service, base_file, summary)
         
-        request = service.files().get_media(fileId=cloud_file['id'])
-        with open(DB_FILE, 'wb') as f:
-            downloader = MediaIoBaseDownload(f, request)
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
+        generation = self._get_generation(base_file)
+        applied_count = self._apply_remote_deltas(
+            service, self._filter_generation(delta_files, generation), summary
+        )
         
-        downloaded_db_manager = DatabaseManager(DB_FILE)
-        if local_token and not downloaded_db_manager.get_setting('google_auth_token'):
-            downloaded_db_manager.set_setting('google_auth_token', local_token)
+        if self.replaced_local_db:
+            self.finished.emit("success", "DB file successfully downloaded from cloud.")
+        elif downloaded_base or applied_count:
+            self.merged.emit(summary)
+            self.finished.emit(
+                "success", 
+                f"Merged cloud data: {summary['analyzed_videos']} videos, "
+                f"{len(summary['excluded_added'])} exclusions updated."
+            )
+        else:
+            self.finished.emit("skip", "Already up to date with cloud.")
+
+    def _download_base(self, service, base_file, summary):
+        download_path = self._download_resumable(service, base_file)
+        restored_path = self._create_temp_path('.restored')
+        try:
+            try:
+                self._restore_snapshot_file(download_path, restored_path)
+            except (OSError, EOFError, sqlite3.DatabaseError):
+                self._discard_transfer_session('sync_download_session')
+                raise
+            
+            restored_db_manager = DatabaseManager(restored_path)
+            if self.db_manager.get_setting('sync_download_mode', 'merge') == 'replace':
+                self._replace_with_snapshot(restored_db_manager, restored_path, base_file)
+            else:
+                restored_db_manager.conn.close()
+                self.db_manager.merge_snapshot(restored_path, summary)
+                self._remember_base(self.db_manager, base_file)
+                self._discard_transfer_session('sync_download_session', keep_file=True)
+        finally:
+            self._remove_temp_files(restored_path)
         
-        self.finished.emit("success", "DB file successfully downloaded from cloud.")
+        self._remove_temp_files(download_path)
 
-    def _handle_upload(self, service, files):
+    def _replace_with_snapshot(self, restored_db_manager, restored_path, base_file):
+        local_settings = self.db_manager.get_local_only_settings()
+        local_settings.pop('sync_download_session', None)
+        _, pending_changes = self.db_manager.get_pending_changes()
+        
+        try:
+            restored_db_manager.clear_pending_changes()
+            restored_db_manager.restore_local_only_settings(local_settings)
+            self._remember_base(restored_db_manager, base_file)
+            restored_db_manager.apply_changes(pending_changes, record=True)
+            restored_db_manager.conn.close()
+            
+            self.db_manager.conn.close()
+            os.replace(restored_path, DB_FILE)
+            self.replaced_local_db = True
+        finally:
+            self.db_manager = DatabaseManager(DB_FILE)
 
+    def _download_resumable(self, service, remote_file):
+        session = self._load_transfer_session('sync_download_session')
+        if (session and session.get('file_id') == remote_file['id'] and 
+                session.get('md5') == remote_file.get('md5Checksum') and 
+                os.path.exists(session.get('path', ''))):
+            download_path = session['path']
+        else:
+            self._discard_transfer_session('sync_download_session')
+            download_path = self._create_temp_path('.download')
+            self._save_transfer_session('sync_download_session', {
+                'file_id': remote_file['id'],
+                'md5': remote_file.get('md5Checksum'),
+                'path': download_path
+            })
+        
+        total_bytes = int(remote_file.get('size') or 0)
+        start_bytes = os.path.getsize(download_path)
+        if total_bytes and start_bytes >= total_bytes:
+            return download_path
+        
+        request = service.files().get_media(fileId=remote_file['id'])
+        chunk_size = self._get_chunk_size()
+        done_bytes = start_bytes
+        started_at = time.monotonic()
+        with open(download_path, 'ab') as f:
+            while not total_bytes or done_bytes < total_bytes:
+                chunk_end = done_bytes + chunk_size - 1
+                if total_bytes:
+                    chunk_end = min(chunk_end, total_bytes - 1)
+                headers = dict(request.headers, range=f"bytes={done_bytes}-{chunk_end}")
+                resp, content = self._request_with_retries(request.http, request.uri, 'GET', headers=headers)
+                if resp.status == 416:
+                    break
+                if resp.status not in (200, 206):
+                    raise HttpError(resp, content, uri=request.uri)
+                if resp.status == 200 and done_bytes:
+                    # The server ignored Range and sent the whole file
+                    f.seek(0)
+                    f.truncate()
+                    done_bytes = 0
+                
+                f.write(content)
+                done_bytes += len(content)
+                content_range = resp.get('content-range', '')
+                if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+                    total_bytes = int(content_range.rsplit('/', 1)[1])
+                self._emit_transfer_progress('download', done_bytes, total_bytes, started_at, start_bytes)
+                if resp.status == 200 or not content:
+                    break
+        
+        return download_path
+
+    def _download_json(self, service, file_id):
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, service.files().get_media(fileId=file_id))
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+        return json.loads(gzip.decompress(buffer.getvalue()).decode('utf-8'))
+
+    def _apply_remote_deltas(self, service, delta_files, summary=None):
+        device_id = self._get_device_id()
+        applied_names = set(json.loads(self.db_manager.get_setting('sync_applied_deltas', '[]')))
+        applied_count = 0
+        
+        for delta_file in delta_files:
+            if delta_file['name'] in applied_names:
+                continue
+            if (delta_file.get('appProperties') or {}).get('device') == device_id:
+                continue
+            
+            payload = self._download_json(service, delta_file['id'])
+            applied_count += self.db_manager.apply_changes(payload.get('changes', []), summary=summary)
+            applied_names.add(delta_file['name'])
+            self.db_manager.set_setting('sync_applied_deltas', json.dumps(sorted(applied_names)))
+        
+        return applied_count
+
+    def _handle_upload(self, service, base_file, delta_files):
+        local_generation = self.db_manager.get_setting('sync_generation')
+        
+        if not base_file or local_generation is None:
+            if self.flush_only:
+                self.finished.emit("skip", "Full DB upload deferred to the next background sync.")
+                return
+            if self._upload_new_base(service, base_file, delta_files):
+                self.finished.emit("success", "DB file successfully uploaded to cloud.")
+            else:
+                self.finished.emit("skip", "Cloud DB is already identical to the local DB.")
+            return
+        
+        max_seq, changes = self.db_manager.get_pending_changes()
+        if not changes:
+            self.finished.emit("skip", "No local changes to upload.")
+            return
+        
+        generation = self._get_generation(base_file)
+        uploaded_delta = self._upload_delta(service, generation, max_seq, changes)
+        self.db_manager.clear_pending_changes(max_seq)
+        
+        generation_deltas = self._filter_generation(delta_files, generation)
+        if not self.flush_only and len(generation_deltas) + 1 >= SYNC_COMPACT_THRESHOLD:
+            self._apply_remote_deltas(service, generation_deltas)
+            self._upload_new_base(service, base_file, generation_deltas + [uploaded_delta])
+        
+        self.finished.emit("success", f"{len(changes)} changes uploaded to cloud.")
+
+    def _upload_delta(self, service, generation, max_seq, changes):
         db_filename = os.path.basename(DB_FILE)
-        file_metadata = {'name': db_filename}
-        media = MediaFileUpload(DB_FILE, mimetype='application/x-sqlite3')
-        
-        if files:
-            service.files().update(
-                fileId=files[0]['id'], 
-                body=file_metadata, 
-                media_body=media, 
-                fields='id'
-            ).execute()
+        device_id = self._get_device_id()
+        created_at = datetime.now(timezone.utc)
+        
+        payload = {
+            'device': device_id,
+            'generation': generation,
+            'created_at': created_at.isoformat(),
+            'changes': changes
+        }
+        data = gzip.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        
+        file_metadata = {
+            'name': f"{db_filename}.delta-{generation}-{device_id}-{created_at.strftime('%Y%m%d%H%M%S')}-{max_seq}.json.gz",
+            'appProperties': {
+                'kind': 'delta',
+                'db': db_filename,
+                'generation': generation,
+                'device': device_id,
+                'seq': str(max_seq)
+            }
+        }
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype='application/gzip')
+        return service.files().create(
+            body=file_metadata, 
+            media_body=media, 
+            fields='id, name, appProperties'
+        ).execute()
+
+    def _upload_new_base(self, service, base_file, delta_files):
+        db_filename = os.path.basename(DB_FILE)
+        old_generation = self._get_generation(base_file) if base_file else None
+        base_file_id = base_file['id'] if base_file else None
+        
+        session = self._load_transfer_session('sync_upload_session')
+        if not (session and session.get('file_id') == base_file_id and 
+                os.path.exists(session.get('path', ''))):
+            self._discard_transfer_session('sync_upload_session')
+            max_seq, _ = self.db_manager.get_pending_changes()
+            session = {
+                'file_id': base_file_id,
+                'path': self._create_compressed_snapshot(),
+                'max_seq': max_seq,
+                'generation': str(int(old_generation) + 1) if old_generation else '1',
+                'uri': None
+            }
+            self._save_transfer_session('sync_upload_session', session)
+        
+        if base_file and base_file.get('md5Checksum') == self._file_md5(session['path']):
+            uploaded_file = None
         else:
-            service.files().create(
-                body=file_metadata, 
-                media_body=media, 
-                fields='id'
-            ).execute()
+            file_metadata = {
+                'name': f"{db_filename}.gz", 
+                'appProperties': {'generation': session['generation'], 'compression': 'gzip'}
+            }
+            uploaded_file = self._upload_snapshot_resumable(service, base_file, file_metadata, session)
+        
+        self._discard_transfer_session('sync_upload_session')
+        self.db_manager.clear_pending_changes(session['max_seq'])
+        self._remember_base(self.db_manager, uploaded_file or base_file)
+        
+        if not uploaded_file:
+            return False
+        
+        if old_generation is not None:
+            for delta_file in self._filter_generation(delta_files, old_generation):
+                service.files().delete(fileId=delta_file['id']).execute()
+        return True
+
+    def _upload_snapshot_resumable(self, service, base_file, file_metadata, session):
+        media = MediaFileUpload(
+            session['path'], 
+            mimetype='application/gzip', 
+            chunksize=self._get_chunk_size(), 
+            resumable=True
+        )
+        fields = 'id, md5Checksum, modifiedTime, appProperties'
+        if base_file:
+            request = service.files().update(
+                fileId=base_file['id'], body=file_metadata, media_body=media, fields=fields
+            )
+        else:
+            request = service.files().create(body=file_metadata, media_body=media, fields=fields)
+        
+        total_bytes = os.path.getsize(session['path'])
+        # media only makes the client build the resumable upload request; chunks are sent below
+        media.stream().close()
+        upload_uri = session.get('uri')
+        done_bytes = 0
+        
+        if upload_uri:
+            # Ask the server how much of the previous session it already has before sending
+            resp, content = self._request_with_retries(
+                request.http, upload_uri, 'PUT', 
+                headers={'content-range': f"bytes */{total_bytes}", 'content-length': '0'}
+            )
+            if resp.status in (200, 201):
+                return request.postproc(resp, content)
+            if resp.status == 308:
+                done_bytes = self._get_uploaded_bytes(resp)
+            elif resp.status in (404, 410):
+                upload_uri = None
+            else:
+                raise HttpError(resp, content, uri=upload_uri)
+        
+        if not upload_uri:
+            headers = dict(request.headers, **{
+                'x-upload-content-type': 'application/gzip',
+                'x-upload-content-length': str(total_bytes),
+                'content-length': str(len(request.body or ''))
+            })
+            resp, content = self._request_with_retries(
+                request.http, request.uri, request.method, body=request.body, headers=headers
+            )
+            if resp.status != 200 or 'location' not in resp:
+                raise HttpError(resp, content, uri=request.uri)
+            upload_uri = resp['location']
+            session['uri'] = upload_uri
+            self._save_transfer_session('sync_upload_session', session)
+        
+        chunk_size = self._get_chunk_size()
+        start_bytes = done_bytes
+        started_at = time.monotonic()
+        with open(session['path'], 'rb') as f:
+            while True:
+                f.seek(done_bytes)
+                chunk = f.read(chunk_size)
+                if chunk:
+                    content_range = f"bytes {done_bytes}-{done_bytes + len(chunk) - 1}/{total_bytes}"
+                else:
+                    content_range = f"bytes */{total_bytes}"
+                resp, content = self._request_with_retries(
+                    request.http, upload_uri, 'PUT', body=chunk, 
+                    headers={'content-range': content_range, 'content-length': str(len(chunk))}
+                )
+                if resp.status in (200, 201):
+                    self._emit_transfer_progress('upload', total_bytes, total_bytes, started_at, start_bytes)
+                    return request.postproc(resp, content)
+                if resp.status != 308:
+                    raise HttpError(resp, content, uri=upload_uri)
+                
+                done_bytes = self._get_uploaded_bytes(resp)
+                self._emit_transfer_progress('upload', done_bytes, total_bytes, started_at, start_bytes)
+
+    def _get_uploaded_bytes(self, resp):
+        # 308 responses carry the stored range as "bytes=0-N"; no header means nothing was stored
+        uploaded_range = resp.get('range', '')
+        return int(uploaded_range.rsplit('-', 1)[1]) + 1 if '-' in uploaded_range else 0
+
+    def _request_with_retries(self, http, uri, method, body=None, headers=None):
+        for attempt in range(SYNC_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(random.random() * 2 ** attempt)
+            try:
+                resp, content = http.request(uri, method=method, body=body, headers=headers)
+            except (OSError, httplib2.HttpLib2Error):
+                if attempt == SYNC_MAX_RETRIES:
+                    raise
+                continue
+            if resp.status < 500 and resp.status != 429:
+                break
+        return resp, content
+
+
+class SyncScheduler(QObject):
+    
+    sync_due = Signal()
+    
+    def __init__(self, quiet_period_ms, parent=None):
+        super().__init__(parent)
+        self.dirty = False
+        self.quiet_timer = QTimer(self)
+        self.quiet_timer.setSingleShot(True)
+        self.quiet_timer.setInterval(quiet_period_ms)
+        self.quiet_timer.timeout.connect(self._on_quiet_period_elapsed)
+    
+    def mark_dirty(self):
+        self.dirty = True
+        self.quiet_timer.start()
+    
+    def mark_clean(self):
+        self.dirty = False
+        self.quiet_timer.stop()
+    
+    def _on_quiet_period_elapsed(self):
+        if self.dirty:
+            self.sync_due.emit()
+
+
+class MaintenanceWorker(QThread):
+    
+    finished = Signal(str, str)
+    
+    def __init__(self, db_file, archive_dir, vacuum_pages):
+        super().__init__()
+        self.db_file = db_file
+        self.archive_dir = archive_dir
+        self.vacuum_pages = vacuum_pages
+    
+    def run(self):
+        try:
+            db_manager = DatabaseManager(self.db_file)
+            KeywordAnalytics(db_manager).refresh()
+            OutlierScores(db_manager).refresh()
+            TitleIndex(db_manager).refresh(self.isInterruptionRequested)
+            archived_count, archive_path, freed_pages = db_manager.run_maintenance(
+                self.archive_dir, self.vacuum_pages
+            )
+            db_manager.conn.close()
+            
+            if not archived_count and not freed_pages:
+                self.finished.emit("skip", "Nothing to clean up.")
+                return
+            
+            message = f"DB maintenance: {archived_count} videos archived, {freed_pages} pages reclaimed."
+            if archive_path:
+                message += f" ({os.path.basename(archive_path)})"
+            self.finished.emit("success", message)
+        except (sqlite3.Error, OSError) as e:
+            self.finished.emit("error", f"Maintenance error occurred: {e}")
+
+
+class ThumbnailExportWorker(QThread):
+    
+    progress = Signal(int, int, int)
+    finished = Signal(str, str)
+    
+    def __init__(self, items, target_path, as_zip, worker_count=THUMBNAIL_EXPORT_WORKER_COUNT):
+        super().__init__()
+        self.items = items
+        self.target_path = target_path
+        self.as_zip = as_zip
+        self.worker_count = worker_count
+        self._cancelled = False
+        self._archive = None
+        self._archive_lock = threading.Lock()
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.worker_count, pool_maxsize=self.worker_count)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
         
-        self.finished.emit("success", "DB file successfully uploaded to cloud.")
\ No newline at end of file
+        failures = []
+        done_count = 0
+        try:
+            if self.as_zip:
+                self._archive = zipfile.ZipFile(self.target_path, 'w', zipfile.ZIP_STORED)
+            else:
+                os.makedirs(self.target_path, exist_ok=True)
+            
+            with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+                futures = {
+                    executor.submit(self._export_item, item, session): item['id'] 
+                    for item in self.items
+                }
+                for future in as_completed(futures):
+                    failure = future.result()
+                    if failure:
+                        failures.append(f"{futures[future]} ({failure})")
+                    done_count += 1
+                    self.progress.emit(done_count, len(self.items), len(failures))
+                    
+                    if self._cancelled:
+                        for pending in futures:
+                            pending.cancel()
+                        break
+        except OSError as e:
+            self.finished.emit("error", f"Thumbnail export error occurred: {e}")
+            return
+        finally:
+            if self._archive is not None:
+                self._archive.close()
+            session.close()
+        
+        saved_count = done_count - len(failures)
+        message = f"{saved_count} of {len(self.items)} thumbnails exported to {self.target_path}."
+        if failures:
+            message += f"\n{len(failures)} failed: {', '.join(failures[:10])}"
+            if len(failures) > 10:
+                message += ", ..."
+        
+        if self._cancelled:
+            self.finished.emit("cancelled", "Export cancelled. " + message)
+        elif failures:
+            self.finished.emit("partial", message)
+        else:
+            self.finished.emit("success", message)
+    
+    def _export_item(self, item, session):
+        # Returns why the item failed, or None once it is saved
+        if self._cancelled:
+            return "cancelled"
+        
+        thumbnail_cache = get_thumbnail_cache()
+        data = None
+        for url in item['urls']:
+            data = thumbnail_cache.fetch(item['id'], THUMBNAIL_FULL_VARIANT, url, session)
+            if data:
+                break
+        if not data:
+            return "download failed"
+        
+        file_name = thumbnail_file_name(item['id'], item.get('title'))
+        try:
+            if self._archive is not None:
+                with self._archive_lock:
+                    self._archive.writestr(file_name, data)
+            else:
+                with open(os.path.join(self.target_path, file_name), 'wb') as f:
+                    f.write(data)
+        except OSError as e:
+            return str(e)
+        return None
+
+
+class HistoryExportWorker(QThread):
+    
+    progress = Signal(int)
+    finished = Signal(str, str)
+    
+    def __init__(self, db_file, where_clause, params, order_clause, file_path, export_format):
+        super().__init__()
+        self.db_file = db_file
+        self.where_clause = where_clause
+        self.params = params
+        self.order_clause = order_clause
+        self.file_path = file_path
+        self.export_format = export_format
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
+    
+    def run(self):
+        db_manager = None
+        try:
+            db_manager = DatabaseManager(self.db_file)
+            columns = db_manager.get_column_types('analyzed_videos') + [
+                ('views_per_subscriber', 'REAL'), ('channel_velocity_ratio', 'REAL')
+            ]
+            query = (f"SELECT {', '.join(name for name, _ in columns)} FROM analyzed_videos "
+                     f"LEFT JOIN video_outlier_scores AS scores ON scores.video_id = analyzed_videos.id "
+                     f"{self.where_clause} ORDER BY {self.order_clause}")
+            row_chunks = db_manager.iter_query_chunks(query, self.params, EXPORT_CHUNK_SIZE)
+            
+            row_count = export_chunks(
+                self._track_progress(row_chunks), columns, self.file_path, self.export_format
+            )
+            self.finished.emit("success", f"{row_count} rows exported to {self.file_path}.")
+        except ExportCancelled:
+            self.finished.emit("cancelled", "Export cancelled.")
+        except (sqlite3.Error, OSError, ValueError) as e:
+            self.finished.emit("error", f"Export error occurred: {e}")
+        finally:
+            if db_manager is not None:
+                db_manager.conn.close()
+    
+    def _track_progress(self, row_chunks):
+        row_count = 0
+        for chunk in row_chunks:
+            if self._cancelled:
+                raise ExportCancelled()
+            yield chunk
+            row_count += len(chunk)
+            self.progress.emit(row_count)
+
+
+class VideoStatsRefresh:
+    
+    entity_name = "videos"
+    
+    def select_stale_ids(self, db_manager, stale_before, limit):
+        return db_manager.get_stale_video_ids(stale_before, limit)
+    
+    def request_batch(self, youtube, ids):
+        # snippet/channelId costs nothing extra and backfills rows stored before channel tracking
+        return youtube.videos().list(
+            part="statistics,snippet", id=",".join(ids), 
+            fields="items(id,statistics,snippet/channelId)"
+        )
+    
+    def parse_item(self, item):
+        statistics = item.get('statistics', {})
+        return {
+            'views': int(statistics.get('viewCount', 0)),
+            'likes': int(statistics.get('likeCount', 0)),
+            'comments': int(statistics.get('commentCount', 0)),
+            'channel_id': item.get('snippet', {}).get('channelId')
+        }
+    
+    def save(self, db_manager, results, requested_ids, captured_at):
+        db_manager.save_stats_snapshots(results, requested_ids, captured_at)
+
+
+class ChannelStatsRefresh:
+    
+    entity_name = "channels"
+    
+    def select_stale_ids(self, db_manager, stale_before, limit):
+        return db_manager.get_stale_channel_ids(stale_before, limit)
+    
+    def request_batch(self, youtube, ids):
+        return youtube.channels().list(
+            part="snippet,statistics", id=",".join(ids), 
+            fields="items(id,snippet/title,statistics)"
+        )
+    
+    def parse_item(self, item):
+        return parse_channel_item(item)
+    
+    def save(self, db_manager, results, requested_ids, captured_at):
+        db_manager.save_channel_stats(results, captured_at, requested_ids)
+
+
+class BatchRefreshWorker(QThread):
+    # target is VideoStatsRefresh or ChannelStatsRefresh: what to select, request and save
+    
+    progress = Signal(str)
+    finished = Signal(str, str)
+    
+    def __init__(self, target, db_file, api_key, quota_units, stale_hours):
+        super().__init__()
+        self.target = target
+        self.db_file = db_file
+        self.api_key = api_key
+        self.quota_units = quota_units
+        self.stale_hours = stale_hours
+        self.api_base_url = ''
+        self._local = threading.local()
+        self._quota_exhausted = False
+        self._error = None
+    
+    def _get_service(self):
+        # googleapiclient services are not thread-safe, so every pool thread builds its own
+        if not hasattr(self._local, 'youtube'):
+            self._local.youtube = build_youtube(self.api_key, self.api_base_url, cache_discovery=False)
+        return self._local.youtube
+    
+    def _fetch_batch(self, ids):
+        # Skips remaining batches after quota runs out, a batch fails or the app is closing
+        if self._quota_exhausted or self._error or self.isInterruptionRequested():
+            return None
+        
+        try:
+            response = self.target.request_batch(self._get_service(), ids).execute()
+        except HttpError as e:
+            if is_quota_error(e):
+                self._quota_exhausted = True
+                return None
+            raise
+        
+        return {item['id']: self.target.parse_item(item) for item in response.get('items', [])}
+    
+    def run(self):
+        db_manager = None
+        entity_name = self.target.entity_name
+        try:
+            db_manager = DatabaseManager(self.db_file)
+            self.api_base_url = db_manager.get_setting('api_base_url', '')
+            stale_before = (datetime.now(timezone.utc) - timedelta(hours=self.stale_hours)).isoformat()
+            ids = self.target.select_stale_ids(
+                db_manager, stale_before, self.quota_units * STATS_REFRESH_BATCH_SIZE
+            )
+            if not ids:
+                self.finished.emit("skip", f"All tracked {entity_name} are up to date.")
+                return
+            
+            batches = [ids[i:i + STATS_REFRESH_BATCH_SIZE] 
+                       for i in range(0, len(ids), STATS_REFRESH_BATCH_SIZE)]
+            refreshed_count, used_units = self._refresh_batches(db_manager, batches)
+            
+            message = f"Refreshed {refreshed_count} {entity_name} using {used_units} quota units."
+            if self._error:
+                self.finished.emit("partial", message + f" Stopped early: {self._error}")
+            elif self._quota_exhausted:
+                self.finished.emit("partial", message + " Stopped early: API quota exceeded.")
+            else:
+                self.finished.emit("success", message)
+        except HttpError as e:
+            self.finished.emit("error", f"API Error: {e}")
+        except (sqlite3.Error, OSError) as e:
+            self.finished.emit("error", f"Refresh error occurred: {e}")
+        finally:
+            if db_manager is not None:
+                db_manager.conn.close()
+    
+    def _refresh_batches(self, db_manager, batches):
+        pending_results = {}
+        pending_ids = []
+        refreshed_count = 0
+        used_units = 0
+        
+        with ThreadPoolExecutor(max_workers=STATS_REFRESH_WORKER_COUNT) as executor:
+            futures = {executor.submit(self._fetch_batch, batch): batch for batch in batches}
+            for completed_count, future in enumerate(as_completed(futures), 1):
+                try:
+                    results = future.result()
+                except HttpError as e:
+                    self._error = f"API Error: {e}"
+                    continue
+                except (OSError, httplib2.HttpLib2Error) as e:
+                    self._error = f"Network error: {e}"
+                    continue
+                if results is None:
+                    continue
+                
+                used_units += 1
+                pending_results.update(results)
+                pending_ids.extend(futures[future])
+                
+                # The DB connection belongs to this thread, so writes are grouped here in bulk
+                if completed_count % STATS_REFRESH_WRITE_BATCHES == 0:
+                    refreshed_count += self._flush(db_manager, pending_results, pending_ids)
+                    pending_results, pending_ids = {}, []
+                    self.progress.emit(
+                        f"Refreshing {self.target.entity_name}... {completed_count}/{len(batches)} batches"
+                    )
+        
+        refreshed_count += self._flush(db_manager, pending_results, pending_ids)
+        return refreshed_count, used_units
+    
+    def _flush(self, db_manager, results, requested_ids):
+        if not requested_ids:
+            return 0
+        self.target.save(db_manager, results, requested_ids, datetime.now(timezone.utc).isoformat())
+        return len(results)